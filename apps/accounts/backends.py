@@ -0,0 +1,54 @@
+"""Authentication backend that serves the per-request user from the cache.
+
+``AuthenticationMiddleware`` resolves ``request.user`` through the backend's
+``get_user`` on every request. The user row is cached together with its
+department and branch, so role checks and the header's department name
+need no queries.
+
+Saving or deleting a user drops the cached row (see ``signals.py``), so a
+password or role change is seen on the next request. Django still checks
+the session auth hash against the cached password, so changing a password
+ends the other sessions as usual. Renaming a department or branch bumps
+the reference-data version, which is part of the key.
+
+Invalidation only reaches the other workers through a cache they share, so
+with the per-process ``DJANGO_CACHE_BACKEND=locmem`` the user is read from
+the database on every request, as by ``ModelBackend``. The backend's path,
+which sessions store, stays the same whichever cache is configured.
+"""
+
+from django.contrib.auth.backends import ModelBackend
+from django.conf import settings
+from django.core.cache import cache
+
+from apps.departments import cache as reference_cache
+from .models import User
+
+
+USER_KEY = 'accounts:user:{pk}:{version}'
+USER_TIMEOUT = 300
+
+
+def user_cache_key(pk):
+    return USER_KEY.format(pk=pk, version=reference_cache.get_version())
+
+
+def clear_cached_user(pk):
+    cache.delete(user_cache_key(pk))
+
+
+class CachedModelBackend(ModelBackend):
+    """``ModelBackend`` whose ``get_user`` reads through the cache."""
+    
+    def get_user(self, user_id):
+        shared = settings.CACHE_BACKEND != 'locmem'
+        key = user_cache_key(user_id)
+        user = cache.get(key) if shared else None
+        if user is None:
+            try:
+                user = User._default_manager.select_related('department', 'branch').get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+            if shared:
+                cache.set(key, user, USER_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,22 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.core.versions import bump_version
+from .backends import clear_cached_user
+from .models import User
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    """Drop the cached user so password, role and department changes apply.
+    
+    Dropped again after commit, in case a concurrent request re-cached the
+    row before the change was visible.
+    """
+    clear_cached_user(instance.pk)
+    transaction.on_commit(lambda: clear_cached_user(instance.pk))
+    # Cached fragments showing user names vary on this version; logging in
+    # only saves last_login.
+    if kwargs.get('update_fields') != frozenset({'last_login'}):
+        bump_version('users')
@@ -2,10 +2,14 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from django.db.models import Count, Q
+from django.utils.functional import SimpleLazyObject
 from django.views.decorators.http import require_http_methods
 
 from .forms import LoginForm
 from .models import User
+from apps.core.shards import across_shards, aggregate_across
+from apps.core.versions import get_versions
 from apps.orders.models import Order
 from apps.storage.models import StorageItem
 
@@ -38,10 +42,18 @@ def logout_view(request):
 
 @login_required
 def dashboard_view(request):
-    """Display dashboard based on user role."""
+    """Display dashboard based on user role.
+    
+    The role blocks are cached as template fragments keyed by the orders or
+    storage data version, so stats are lazy: each role's counts are one
+    conditional aggregate that only runs when its fragment is re-rendered.
+    """
     user = request.user
     context = {'user': user}
     
+    approved_statuses = ['approved', 'partially_approved']
+    decided_statuses = ['approved', 'partially_approved', 'declined']
+    
     if user.is_department_user:
         # Get user's recent orders
         recent_orders = Order.objects.filter(
@@ -49,73 +61,75 @@ def dashboard_view(request):
         ).select_related('department')[:5]
         
         # Get order counts by status
-        order_stats = {
-            'total': Order.objects.filter(created_by=user).count(),
-            'pending': Order.objects.filter(created_by=user, status__in=['draft', 'pending_pricing', 'pending_approval']).count(),
-            'approved': Order.objects.filter(created_by=user, status__in=['approved', 'partially_approved']).count(),
-            'declined': Order.objects.filter(created_by=user, status='declined').count(),
-        }
+        order_stats = SimpleLazyObject(lambda: Order.objects.filter(created_by=user).aggregate(
+            total=Count('id'),
+            pending=Count('id', filter=Q(status__in=['draft', 'pending_pricing', 'pending_approval'])),
+            approved=Count('id', filter=Q(status__in=approved_statuses)),
+            declined=Count('id', filter=Q(status='declined')),
+        ))
         context['recent_orders'] = recent_orders
         context['order_stats'] = order_stats
-        
+        context['dashboard_version'] = get_versions('orders')
+    
     elif user.is_procurement_committee:
         # Get orders awaiting pricing
-        pending_pricing = Order.objects.filter(
+        pending_pricing = across_shards(Order.objects.filter(
             status='pending_pricing'
-        ).select_related('department', 'created_by')[:5]
+        ).select_related('department', 'created_by').prefetch_related('items'))[:5]
         
         # Get orders with admin decisions awaiting acknowledgment
-        pending_acknowledgment = Order.objects.filter(
-            status__in=['approved', 'partially_approved', 'declined']
-        ).select_related('department', 'created_by')[:5]
+        pending_acknowledgment = across_shards(Order.objects.filter(
+            status__in=decided_statuses
+        ).select_related('department', 'created_by'))[:5]
         
-        stats = {
-            'pending_pricing': Order.objects.filter(status='pending_pricing').count(),
-            'pending_approval': Order.objects.filter(status='pending_approval').count(),
-            'pending_acknowledgment': Order.objects.filter(
-                status__in=['approved', 'partially_approved', 'declined']
-            ).count(),
-        }
+        stats = SimpleLazyObject(lambda: aggregate_across(Order.objects.all(),
+            pending_pricing=Count('id', filter=Q(status='pending_pricing')),
+            pending_approval=Count('id', filter=Q(status='pending_approval')),
+            pending_acknowledgment=Count('id', filter=Q(status__in=decided_statuses)),
+        ))
         context['pending_pricing'] = pending_pricing
         context['pending_acknowledgment'] = pending_acknowledgment
         context['stats'] = stats
-        
+        context['dashboard_version'] = get_versions('orders')
+    
     elif user.is_administrator:
         # Get orders awaiting approval
-        pending_approval = Order.objects.filter(
+        pending_approval = across_shards(Order.objects.filter(
             status='pending_approval'
-        ).select_related('department', 'created_by', 'priced_by')[:5]
+        ).select_related('department', 'created_by', 'priced_by').prefetch_related('items'))[:5]
         
         # Get recent decisions
-        recent_decisions = Order.objects.filter(
+        recent_decisions = across_shards(Order.objects.filter(
             decided_by__isnull=False
-        ).select_related('department', 'created_by').order_by('-decided_at')[:5]
+        ).select_related('department', 'created_by').order_by('-decided_at'))[:5]
         
-        stats = {
-            'pending_approval': Order.objects.filter(status='pending_approval').count(),
-            'approved_today': Order.objects.filter(
-                status__in=['approved', 'partially_approved'],
+        stats = SimpleLazyObject(lambda: aggregate_across(Order.objects.all(),
+            pending_approval=Count('id', filter=Q(status='pending_approval')),
+            approved_today=Count('id', filter=Q(
+                status__in=approved_statuses,
                 decided_at__date=request.user.date_joined.date()  # Just for demo
-            ).count(),
-            'total_processed': Order.objects.filter(decided_by__isnull=False).count(),
-        }
+            )),
+            total_processed=Count('id', filter=Q(decided_by__isnull=False)),
+        ))
         context['pending_approval'] = pending_approval
         context['recent_decisions'] = recent_decisions
         context['stats'] = stats
+        context['dashboard_version'] = get_versions('orders')
     
     elif user.is_storage_user:
         # Get storage stats
-        recent_items = StorageItem.objects.select_related(
+        recent_items = across_shards(StorageItem.objects.select_related(
             'department', 'branch'
-        ).order_by('-created_at')[:5]
+        ).order_by('-created_at'))[:5]
         
-        stats = {
-            'total_items': StorageItem.objects.count(),
-            'low_stock': StorageItem.objects.filter(quantity__lt=10).count(),
-            'out_of_stock': StorageItem.objects.filter(quantity=0).count(),
-        }
+        stats = SimpleLazyObject(lambda: aggregate_across(StorageItem.objects.all(),
+            total_items=Count('id'),
+            low_stock=Count('id', filter=Q(quantity__lt=10)),
+            out_of_stock=Count('id', filter=Q(quantity=0)),
+        ))
         context['recent_items'] = recent_items
         context['stats'] = stats
+        context['dashboard_version'] = get_versions('storage')
     
     return render(request, 'accounts/dashboard.html', context)
 
@@ -0,0 +1 @@
+# Core app: cross-cutting project utilities
@@ -0,0 +1,122 @@
+"""Precompressed, far-future cached static files.
+
+``CompressedManifestStaticFilesStorage`` is Django's manifest storage (every
+file is also stored under a name with a hash of its content, e.g.
+``vendor/htmx.min.4f2b8c1d9e0a.js``) that additionally writes ``.gz`` and,
+with the ``brotli`` package installed, ``.br`` copies of the text files
+during ``collectstatic``. ``StaticFilesMiddleware`` serves ``STATIC_ROOT``
+through ``serve()``: it sends the smallest copy the client accepts with its
+``Content-Encoding`` and marks hashed names immutable, so browsers never
+request them again; a changed file gets a new name.
+"""
+
+import gzip
+import mimetypes
+import os
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+    has_brotli = True
+except ImportError:
+    has_brotli = False
+
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.map', '.json', '.svg', '.txt', '.html', '.xml', '.ico', '.ttf', '.otf', '.eot')
+MIN_COMPRESS_SIZE = 256
+
+# (suffix, Content-Encoding), preferred first
+ENCODINGS = [('.br', 'br'), ('.gz', 'gzip')]
+
+# ManifestStaticFilesStorage puts 12 hex digits before the extension.
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Unhashed names (not referenced through {% static %}) may change in place.
+UNHASHED_MAX_AGE = 60
+
+
+def compress(path):
+    """Write the ``.gz``/``.br`` copies of a file that are smaller than it."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < MIN_COMPRESS_SIZE:
+        return []
+    
+    encoders = [('.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+    if has_brotli:
+        encoders.append(('.br', lambda raw: brotli.compress(raw, quality=11)))
+    written = []
+    for suffix, encode in encoders:
+        encoded = encode(data)
+        if len(encoded) < len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(encoded)
+            written.append(suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that precompresses the collected text files."""
+    
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name, hashed_name in self.hashed_files.items():
+            for stored in {name, hashed_name}:
+                if stored.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(stored):
+                    compress(self.path(stored))
+
+
+def accepted_encodings(header):
+    """Return the content codings an ``Accept-Encoding`` header allows."""
+    codings = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        codings.add(coding.strip().lower())
+    return codings
+
+
+def serve(request, name, root):
+    """Return the response for static file ``name`` under ``root``, or ``None``."""
+    try:
+        path = safe_join(root, name)
+    except SuspiciousFileOperation:
+        return None
+    if not name or not os.path.isfile(path):
+        return None
+    
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    encoding = None
+    for suffix, coding in ENCODINGS:
+        if coding in accepted and os.path.isfile(path + suffix):
+            path, encoding = path + suffix, coding
+            break
+    
+    cache_control = IMMUTABLE if HASHED_NAME.search(name) else f'public, max-age={UNHASHED_MAX_AGE}'
+    mtime = os.stat(path).st_mtime
+    if not was_modified_since(request.headers.get('If-Modified-Since'), mtime):
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+        response.headers['Last-Modified'] = http_date(mtime)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
@@ -0,0 +1,223 @@
+"""Latency, query and memory benchmarks of the hot endpoints.
+
+``manage.py benchmark`` generates a dataset of each requested size (see
+``dataset``) in a throwaway database and requests every endpoint in
+``ENDPOINTS`` a number of times with the test client. Each request runs in
+a rolled-back transaction, so POSTs that move an order through the
+workflow see the same order every time. Per endpoint it records the p50 and
+p95 wall time, the query count and the peak memory allocated while serving
+one request (traced separately, as ``tracemalloc`` slows everything down).
+
+Results are plain JSON::
+    
+    {"sizes": {"10000": {"search_items": {"p50_ms": 4.1, "p95_ms": 5.3,
+                                          "queries": 3, "peak_kb": 310, ...}}}}
+
+and can be compared with a stored baseline by ``compare()``.
+"""
+
+import math
+import platform
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable
+
+import django
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.orders.models import Order
+
+from .query_budgets import data_queries
+
+
+@dataclass
+class Endpoint:
+    name: str
+    role: str
+    url: Callable
+    method: str = 'get'
+    data: Callable = field(default=lambda samples: None)
+
+
+def _price_data(samples):
+    order = samples['pending_pricing']
+    data = {f'price_{item.pk}': 1000 * (index + 1) for index, item in enumerate(order.items.all())}
+    data['action'] = 'forward'
+    return data
+
+
+def _review_data(samples):
+    order = samples['pending_approval']
+    data = {'action': 'save_decisions', 'admin_notes': 'ملاحظة'}
+    for index, item in enumerate(order.items.all()):
+        data[f'status_{item.pk}'] = 'modified' if index % 2 else 'approved'
+        data[f'qty_{item.pk}'] = max(1, item.quantity - 1)
+    return data
+
+
+ENDPOINTS = [
+    Endpoint('search_items', User.Role.DEPARTMENT_USER, lambda s: reverse('orders:search_items') + '?item_name=ورق'),
+    Endpoint('create_order', User.Role.DEPARTMENT_USER, lambda s: reverse('orders:create')),
+    Endpoint(
+        'create_order_post', User.Role.DEPARTMENT_USER, lambda s: reverse('orders:create'), 'post',
+        lambda s: {'item_name': 'ورق طباعة A4', 'quantity': 5},
+    ),
+    Endpoint('my_orders', User.Role.DEPARTMENT_USER, lambda s: reverse('orders:my_orders')),
+    Endpoint('pending_orders', User.Role.PROCUREMENT_COMMITTEE, lambda s: reverse('procurement:pending_orders')),
+    Endpoint(
+        'price_order_post', User.Role.PROCUREMENT_COMMITTEE,
+        lambda s: reverse('procurement:price_order', args=[s['pending_pricing'].pk]), 'post', _price_data,
+    ),
+    Endpoint('decisions', User.Role.PROCUREMENT_COMMITTEE, lambda s: reverse('procurement:decisions')),
+    Endpoint(
+        'export_pdf', User.Role.PROCUREMENT_COMMITTEE,
+        lambda s: reverse('procurement:export_pdf', args=[s['approved'].pk]),
+    ),
+    Endpoint('admin_pending', User.Role.ADMINISTRATOR, lambda s: reverse('procurement:admin_pending')),
+    Endpoint(
+        'admin_review_post', User.Role.ADMINISTRATOR,
+        lambda s: reverse('procurement:admin_review', args=[s['pending_approval'].pk]), 'post', _review_data,
+    ),
+    Endpoint('admin_history', User.Role.ADMINISTRATOR, lambda s: reverse('procurement:admin_history')),
+    Endpoint('storage_list', User.Role.STORAGE_USER, lambda s: reverse('storage:list')),
+    Endpoint('storage_search', User.Role.STORAGE_USER, lambda s: reverse('storage:list') + '?search=ورق'),
+    Endpoint('dashboard_department', User.Role.DEPARTMENT_USER, lambda s: reverse('accounts:dashboard')),
+    Endpoint('dashboard_committee', User.Role.PROCUREMENT_COMMITTEE, lambda s: reverse('accounts:dashboard')),
+    Endpoint('dashboard_administrator', User.Role.ADMINISTRATOR, lambda s: reverse('accounts:dashboard')),
+]
+
+# Relative slowdown (and memory growth) tolerated before a result counts
+# as a regression; query counts must not grow at all.
+DEFAULT_TOLERANCE = 0.25
+# Differences below this many milliseconds are noise, whatever the ratio.
+MIN_REGRESSION_MS = 1.0
+
+
+def samples():
+    """Pick the users and orders the endpoints are requested with."""
+    users = {}
+    for role in User.Role.values:
+        users[role] = User.objects.filter(role=role, is_active=True).order_by('pk').first()
+    # The department user with the most orders.
+    busiest = (
+        Order.objects.values('created_by').order_by().annotate(count=Count('pk'))
+        .order_by('-count').values_list('created_by', flat=True).first()
+    )
+    if busiest:
+        users[User.Role.DEPARTMENT_USER] = User.objects.get(pk=busiest)
+    
+    def largest(status):
+        return (
+            Order.objects.filter(status=status).annotate(item_count=Count('items'))
+            .order_by('-item_count', 'pk').first()
+        )
+    
+    return {
+        'users': users,
+        'pending_pricing': largest(Order.Status.PENDING_PRICING),
+        'pending_approval': largest(Order.Status.PENDING_APPROVAL),
+        'approved': largest(Order.Status.APPROVED),
+    }
+
+
+def request(client, endpoint, url, data):
+    """Send one request in a rolled-back transaction; return status and queries."""
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(client, endpoint.method)(url, data)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+        transaction.set_rollback(True)
+    return response.status_code, len(data_queries(queries.captured_queries))
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    index = min(len(ordered), max(1, math.ceil(fraction * len(ordered)))) - 1
+    return ordered[index]
+
+
+def measure(endpoint, sample, runs, warmup):
+    client = Client()
+    client.force_login(sample['users'][endpoint.role])
+    url = endpoint.url(sample)
+    data = endpoint.data(sample)
+    
+    for _ in range(warmup):
+        request(client, endpoint, url, data)
+    
+    timings, query_counts = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        status, queries = request(client, endpoint, url, data)
+        timings.append((time.perf_counter() - start) * 1000)
+        query_counts.append(queries)
+    
+    tracemalloc.start()
+    try:
+        request(client, endpoint, url, data)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    
+    return {
+        'status': status,
+        'runs': runs,
+        'p50_ms': round(percentile(timings, 0.50), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+        'mean_ms': round(sum(timings) / runs, 2),
+        'queries': max(query_counts),
+        'peak_kb': round(peak / 1024),
+    }
+
+
+def run(names=None, runs=30, warmup=3):
+    """Benchmark the endpoints (all, or those in ``names``) on the current data."""
+    sample = samples()
+    return {
+        endpoint.name: measure(endpoint, sample, runs, warmup)
+        for endpoint in ENDPOINTS
+        if names is None or endpoint.name in names
+    }
+
+
+def environment():
+    return {
+        'created_at': timezone.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'machine': platform.machine(),
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return the regressions of ``results`` against ``baseline`` as strings.
+    
+    Only sizes and endpoints present in both are compared.
+    """
+    regressions = []
+    for size, endpoints in results['sizes'].items():
+        for name, current in endpoints.items():
+            previous = baseline.get('sizes', {}).get(size, {}).get(name)
+            if previous is None:
+                continue
+            label = f'{name} @ {size}'
+            for metric in ('p50_ms', 'p95_ms'):
+                limit = previous[metric] * (1 + tolerance)
+                if current[metric] > limit and current[metric] - previous[metric] >= MIN_REGRESSION_MS:
+                    regressions.append(f'{label}: {metric} {previous[metric]} -> {current[metric]}')
+            if current['queries'] > previous['queries']:
+                regressions.append(f'{label}: queries {previous["queries"]} -> {current["queries"]}')
+            if current['peak_kb'] > previous['peak_kb'] * (1 + tolerance):
+                regressions.append(f'{label}: peak_kb {previous["peak_kb"]} -> {current["peak_kb"]}')
+    return regressions
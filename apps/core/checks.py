@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+# Loaded by templates/base.html with FRONTEND_ASSETS = 'vendored'
+VENDOR_FILES = ['tajawal.css', 'tailwind.css', 'htmx.min.js', 'alpine.min.js']
+
+
+@register()
+def check_vendored_assets(app_configs, **kwargs):
+    if settings.FRONTEND_ASSETS != 'vendored':
+        return []
+    vendor = settings.BASE_DIR / 'static' / 'vendor'
+    missing = [name for name in VENDOR_FILES if not (vendor / name).is_file()]
+    if not missing:
+        return []
+    return [Warning(
+        f'static/vendor lacks {", ".join(missing)}, which base.html loads.',
+        hint="Run 'manage.py vendor_assets' and commit static/vendor, or set DJANGO_FRONTEND_ASSETS=cdn.",
+        id='core.W001',
+    )]
@@ -0,0 +1,30 @@
+from django.conf import settings
+
+from apps.departments import cache as reference_cache
+from .versions import get_version
+
+
+def frontend_assets(request):
+    """Tell ``base.html`` whether to load the vendored front-end assets."""
+    return {'vendored_assets': settings.FRONTEND_ASSETS == 'vendored'}
+
+
+class DataVersions:
+    """Data versions read on first use and kept for the rest of the request.
+    
+    ``data_versions.reference`` is the branch/department version, any other
+    name a counter of ``versions``, e.g. ``data_versions.users``.
+    """
+    
+    def __init__(self):
+        self._versions = {}
+    
+    def __getitem__(self, name):
+        if name not in self._versions:
+            self._versions[name] = reference_cache.get_version() if name == 'reference' else get_version(name)
+        return self._versions[name]
+
+
+def data_versions(request):
+    """Let ``{% fragment %}`` vary on data its objects only point to."""
+    return {'data_versions': DataVersions()}
@@ -0,0 +1,452 @@
+"""Synthetic datasets at production volume for benchmarks.
+
+``DatasetGenerator(order_items, seed).run()`` fills an empty database with branches, departments,
+users for every role, a catalog, orders in every workflow status with their
+items and transitions, and storage items with their history and movements.
+Rows are generated chunk by chunk and written with ``bulk_create`` inside a
+single transaction, with foreign key checks deferred to the end the same way
+``loaddata`` does. The same ``seed`` always produces the same data (dates are
+relative to the time of the run).
+"""
+
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.departments.cache import clear_options
+from apps.departments.models import Branch, Department
+from apps.orders.models import Item, Order, OrderItem, OrderTransition
+from apps.reports.models import SpendRollup
+from apps.storage.models import StorageItem, StorageItemHistory, StockMovement
+
+from .versions import bump_version
+
+
+# Presets by number of order items; everything else is derived from it.
+SIZES = {
+    'small': 10_000,
+    'medium': 100_000,
+    'large': 1_000_000,
+}
+
+BATCH_SIZE = 1000
+ORDER_CHUNK = 2000
+USERS_PER_DEPARTMENT = 2
+DEFAULT_PASSWORD = 'demo123456'
+HISTORY_DAYS = 365
+
+# Share of orders per workflow status.
+STATUS_WEIGHTS = {
+    Order.Status.DRAFT: 5,
+    Order.Status.PENDING_PRICING: 10,
+    Order.Status.PENDING_APPROVAL: 10,
+    Order.Status.APPROVED: 30,
+    Order.Status.PARTIALLY_APPROVED: 10,
+    Order.Status.DECLINED: 10,
+    Order.Status.ACKNOWLEDGED: 25,
+}
+
+# The decision behind acknowledged orders.
+ACKNOWLEDGED_DECISIONS = {
+    Order.Status.APPROVED: 65,
+    Order.Status.PARTIALLY_APPROVED: 20,
+    Order.Status.DECLINED: 15,
+}
+
+# Days reserved after ``created_at`` for the steps an order has been through,
+# so that no step of a recent order lands in the future.
+PIPELINE_DAYS = {
+    Order.Status.DRAFT: 0,
+    Order.Status.PENDING_PRICING: 3,
+    Order.Status.PENDING_APPROVAL: 10,
+    Order.Status.APPROVED: 15,
+    Order.Status.PARTIALLY_APPROVED: 15,
+    Order.Status.DECLINED: 15,
+    Order.Status.ACKNOWLEDGED: 18,
+}
+
+PRICED_STATUSES = {
+    Order.Status.PENDING_APPROVAL, Order.Status.APPROVED, Order.Status.PARTIALLY_APPROVED,
+    Order.Status.DECLINED, Order.Status.ACKNOWLEDGED,
+}
+
+BRANCH_NAMES = [
+    'بغداد', 'البصرة', 'نينوى', 'أربيل', 'النجف', 'كربلاء', 'بابل', 'ديالى',
+    'الأنبار', 'واسط', 'ذي قار', 'ميسان', 'المثنى', 'القادسية', 'صلاح الدين', 'كركوك',
+]
+
+DEPARTMENT_NAMES = [
+    'شعبة تقنية المعلومات', 'شعبة الموارد البشرية', 'شعبة المحاسبة', 'شعبة الإدارة',
+    'شعبة الخدمات', 'شعبة الصيانة', 'شعبة المخازن', 'شعبة القانونية',
+]
+
+FIRST_NAMES = [
+    'أحمد', 'محمد', 'علي', 'حسين', 'حسن', 'عمر', 'مصطفى', 'زينب', 'فاطمة', 'مريم',
+    'نور', 'سارة', 'يوسف', 'إبراهيم', 'كرار', 'مرتضى', 'هدى', 'رقية', 'عباس', 'سجاد',
+]
+
+LAST_NAMES = [
+    'الموسوي', 'الحسيني', 'العبيدي', 'الجبوري', 'الدليمي', 'التميمي', 'الربيعي',
+    'الخفاجي', 'الزبيدي', 'الساعدي', 'الشمري', 'الكعبي', 'العزاوي', 'البياتي',
+]
+
+ITEM_NAMES = [
+    'ورق طباعة', 'حبر طابعة', 'قلم جاف', 'دفتر ملاحظات', 'ملف بلاستيكي', 'دباسة',
+    'مقص', 'شريط لاصق', 'حاسبة', 'لوحة مفاتيح', 'فأرة', 'شاشة', 'حاسوب محمول',
+    'طابعة', 'ماسح ضوئي', 'كرسي مكتب', 'مكتب', 'خزانة ملفات', 'مكيف هواء',
+    'مروحة', 'مصباح', 'كابل شبكة', 'موزع شبكة', 'ذاكرة خارجية', 'قرص صلب',
+    'بطارية', 'منظف أرضيات', 'مناديل ورقية', 'أكياس نفايات', 'قفازات',
+]
+
+ITEM_VARIANTS = [
+    'صغير', 'كبير', 'متوسط', 'أسود', 'أزرق', 'أحمر', 'أبيض', 'A4', 'A3',
+    'اقتصادي', 'ممتاز', 'عبوة 10', 'عبوة 50', 'نوع أول', 'نوع ثاني',
+]
+
+ADMIN_NOTES = ['', '', '', 'يرجى الالتزام بالكميات الموافق عليها', 'تمت الموافقة حسب الميزانية المتاحة']
+
+
+def plan(order_items):
+    """Return the row counts generated for ``order_items`` order items."""
+    branches = min(len(BRANCH_NAMES), max(4, order_items // 50_000))
+    departments = branches * len(DEPARTMENT_NAMES)
+    return {
+        'branches': branches,
+        'departments': departments,
+        'department_users': departments * USERS_PER_DEPARTMENT,
+        'committee_users': max(5, branches // 2),
+        'administrators': max(2, branches // 4),
+        'storage_users': branches,
+        'catalog_items': min(len(ITEM_NAMES) * len(ITEM_VARIANTS), max(100, order_items // 100)),
+        'orders': order_items // 5,
+        'order_items': order_items,
+        'storage_items': order_items // 10,
+    }
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let ``bulk_create`` keep the given ``auto_now``/``auto_now_add`` values."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def is_empty():
+    return not (Branch.objects.exists() or Order.objects.exists() or StorageItem.objects.exists())
+
+
+class DatasetGenerator:
+    """Generate one dataset; ``run()`` returns the number of rows per model."""
+    
+    def __init__(self, order_items, seed=1, password=DEFAULT_PASSWORD, log=None):
+        self.counts = plan(order_items)
+        self.rng = random.Random(seed)
+        self.password = make_password(password)
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.written = {}
+    
+    def run(self):
+        tables = [model._meta.db_table for model in (
+            Branch, Department, User, Item, Order, OrderItem, OrderTransition,
+            StorageItem, StorageItemHistory, StockMovement,
+        )]
+        with connection.constraint_checks_disabled():
+            with transaction.atomic(), explicit_timestamps(
+                Branch, Department, Item, Order, StorageItem, StorageItemHistory
+            ):
+                self.create_branches()
+                self.create_users()
+                self.create_catalog()
+                self.create_orders()
+                self.create_storage()
+                connection.check_constraints(table_names=tables)
+                bump_version('orders', 'storage')
+                transaction.on_commit(clear_options)
+        
+        self.log('Rebuilding spend rollups')
+        self.written[SpendRollup] = SpendRollup.rebuild()
+        # Without statistics SQLite may prefer a status index and sort, see
+        # the orders query_plans.
+        self.log('Analyzing tables')
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return {model._meta.label: count for model, count in self.written.items()}
+    
+    def bulk_create(self, model, objs):
+        created = model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+        self.written[model] = self.written.get(model, 0) + len(created)
+        return created
+    
+    def past(self, days=HISTORY_DAYS):
+        return self.now - timedelta(seconds=self.rng.randrange(days * 86400))
+    
+    def after(self, moment, max_days):
+        return min(moment + timedelta(seconds=self.rng.randrange(1, max_days * 86400)), self.now)
+    
+    def create_branches(self):
+        started = self.now - timedelta(days=HISTORY_DAYS + 30)
+        self.branches = self.bulk_create(Branch, [
+            Branch(name=f'فرع {name}', created_at=started)
+            for name in BRANCH_NAMES[:self.counts['branches']]
+        ])
+        self.departments = self.bulk_create(Department, [
+            Department(name=name, branch=branch, created_at=started)
+            for branch in self.branches for name in DEPARTMENT_NAMES
+        ])
+        self.log(f'{len(self.branches)} branches, {len(self.departments)} departments')
+    
+    def new_user(self, username, role, department=None, branch=None, is_staff=False):
+        return User(
+            username=username,
+            password=self.password,
+            first_name=self.rng.choice(FIRST_NAMES),
+            last_name=self.rng.choice(LAST_NAMES),
+            role=role,
+            department=department,
+            branch=branch,
+            is_staff=is_staff,
+        )
+    
+    def create_users(self):
+        users = [
+            self.new_user(f'department_{i}', User.Role.DEPARTMENT_USER, department, department.branch)
+            for i, department in enumerate(
+                (department for department in self.departments for _ in range(USERS_PER_DEPARTMENT)), 1
+            )
+        ]
+        users += [
+            self.new_user(f'committee_{i}', User.Role.PROCUREMENT_COMMITTEE)
+            for i in range(1, self.counts['committee_users'] + 1)
+        ]
+        users += [
+            self.new_user(f'administrator_{i}', User.Role.ADMINISTRATOR, is_staff=True)
+            for i in range(1, self.counts['administrators'] + 1)
+        ]
+        users += [
+            self.new_user(f'storage_{i}', User.Role.STORAGE_USER, branch=branch)
+            for i, branch in enumerate(self.branches, 1)
+        ]
+        users = self.bulk_create(User, users)
+        
+        self.users = {role: [user for user in users if user.role == role] for role in User.Role.values}
+        self.department_users = {}
+        for user in self.users[User.Role.DEPARTMENT_USER]:
+            self.department_users.setdefault(user.department_id, []).append(user)
+        self.storage_users = {user.branch_id: user for user in self.users[User.Role.STORAGE_USER]}
+        self.log(f'{len(users)} users')
+    
+    def create_catalog(self):
+        names = [f'{name} {variant}' for name in ITEM_NAMES for variant in ITEM_VARIANTS]
+        self.rng.shuffle(names)
+        creators = self.users[User.Role.DEPARTMENT_USER]
+        self.catalog = self.bulk_create(Item, [
+            Item(name=name, created_by=self.rng.choice(creators), created_at=self.past())
+            for name in names[:self.counts['catalog_items']]
+        ])
+        # Unit prices in IQD, log-uniform between 250 and 2,500,000.
+        self.prices = {
+            item.pk: round(10 ** self.rng.uniform(2.4, 6.4) / 250) * 250 or 250
+            for item in self.catalog
+        }
+        self.log(f'{len(self.catalog)} catalog items')
+    
+    def order_sizes(self):
+        """Return the item count of every order, 1 to 9, adding up exactly."""
+        sizes = [self.rng.randint(1, 9) for _ in range(self.counts['orders'])]
+        difference = self.counts['order_items'] - sum(sizes)
+        step = 1 if difference > 0 else -1
+        while difference:
+            index = self.rng.randrange(len(sizes))
+            if 1 <= sizes[index] + step <= 9:
+                sizes[index] += step
+                difference -= step
+        return sizes
+    
+    def create_orders(self):
+        statuses = list(STATUS_WEIGHTS)
+        weights = list(STATUS_WEIGHTS.values())
+        sizes = self.order_sizes()
+        total = len(sizes)
+        
+        for start in range(0, total, ORDER_CHUNK):
+            specs = [
+                (self.rng.choices(statuses, weights)[0], size)
+                for size in sizes[start:start + ORDER_CHUNK]
+            ]
+            self.create_order_chunk(specs)
+            self.log(f'{start + len(specs)}/{total} orders')
+    
+    def create_order_chunk(self, specs):
+        orders, decisions = [], []
+        for status, _ in specs:
+            department = self.rng.choice(self.departments)
+            order = Order(
+                department=department,
+                created_by=self.rng.choice(self.department_users[department.pk]),
+                status=status,
+                created_at=self.past() - timedelta(days=PIPELINE_DAYS[status]),
+            )
+            decision = None
+            if status != Order.Status.DRAFT:
+                order.submitted_at = self.after(order.created_at, 3)
+            if status in PRICED_STATUSES:
+                order.priced_by = self.rng.choice(self.users[User.Role.PROCUREMENT_COMMITTEE])
+                order.priced_at = self.after(order.submitted_at, 7)
+            if status in PRICED_STATUSES - {Order.Status.PENDING_APPROVAL}:
+                decision = status
+                if status == Order.Status.ACKNOWLEDGED:
+                    decision = self.rng.choices(list(ACKNOWLEDGED_DECISIONS), list(ACKNOWLEDGED_DECISIONS.values()))[0]
+                order.decided_by = self.rng.choice(self.users[User.Role.ADMINISTRATOR])
+                order.decided_at = self.after(order.priced_at, 5)
+                order.admin_notes = self.rng.choice(ADMIN_NOTES)
+            if status == Order.Status.ACKNOWLEDGED:
+                order.acknowledged_at = self.after(order.decided_at, 3)
+            order.updated_at = max(filter(None, [
+                order.created_at, order.submitted_at, order.priced_at, order.decided_at, order.acknowledged_at,
+            ]))
+            orders.append(order)
+            decisions.append(decision)
+        orders = self.bulk_create(Order, orders)
+        
+        items, transitions = [], []
+        for order, decision, (_, size) in zip(orders, decisions, specs):
+            items += self.order_items(order, decision, size)
+            transitions += self.order_transitions(order, decision)
+        self.bulk_create(OrderItem, items)
+        self.bulk_create(OrderTransition, transitions)
+    
+    def order_items(self, order, decision, size):
+        items = []
+        # A partial decision needs at least one item that is not fully approved.
+        changed = self.rng.randrange(size) if decision == Order.Status.PARTIALLY_APPROVED else None
+        for index, catalog_item in enumerate(self.rng.sample(self.catalog, size)):
+            quantity = max(1, int(self.rng.paretovariate(1.5)) * self.rng.choice((1, 1, 2, 5, 10)))
+            item = OrderItem(
+                order=order,
+                item=catalog_item,
+                item_name=catalog_item.name,
+                quantity=quantity,
+            )
+            if order.status in PRICED_STATUSES:
+                item.price = Decimal(round(self.prices[catalog_item.pk] * self.rng.uniform(0.8, 1.2) / 250) * 250 or 250)
+            if decision == Order.Status.APPROVED:
+                item.item_status = OrderItem.ItemStatus.APPROVED
+            elif decision == Order.Status.DECLINED:
+                item.item_status = OrderItem.ItemStatus.DECLINED
+            elif decision == Order.Status.PARTIALLY_APPROVED:
+                self.decide_item(item, force_change=index == changed)
+            items.append(item)
+        return items
+    
+    def decide_item(self, item, force_change=False):
+        """Give an item of a partially approved order an individual decision."""
+        choices = [OrderItem.ItemStatus.DECLINED, OrderItem.ItemStatus.MODIFIED]
+        if not force_change:
+            choices += [OrderItem.ItemStatus.APPROVED] * 3
+        if item.quantity < 2 and OrderItem.ItemStatus.MODIFIED in choices:
+            choices.remove(OrderItem.ItemStatus.MODIFIED)
+        item.item_status = self.rng.choice(choices)
+        if item.item_status == OrderItem.ItemStatus.APPROVED:
+            item.approved_quantity = item.quantity
+        elif item.item_status == OrderItem.ItemStatus.DECLINED:
+            item.approved_quantity = 0
+        else:
+            item.approved_quantity = self.rng.randrange(1, item.quantity)
+    
+    def order_transitions(self, order, decision):
+        steps = [
+            (Order.Status.DRAFT, Order.Status.PENDING_PRICING, order.created_by, order.submitted_at),
+            (Order.Status.PENDING_PRICING, Order.Status.PENDING_APPROVAL, order.priced_by, order.priced_at),
+            (Order.Status.PENDING_APPROVAL, decision, order.decided_by, order.decided_at),
+            (decision, Order.Status.ACKNOWLEDGED, order.priced_by, order.acknowledged_at),
+        ]
+        return [
+            OrderTransition(
+                order=order,
+                from_status=from_status,
+                to_status=to_status,
+                changed_by=user,
+                changed_at=changed_at,
+            )
+            for from_status, to_status, user, changed_at in steps
+            if changed_at is not None
+        ]
+    
+    def create_storage(self):
+        total = self.counts['storage_items']
+        for start in range(0, total, ORDER_CHUNK):
+            chunk = min(ORDER_CHUNK, total - start)
+            items, ledgers = [], []
+            for _ in range(chunk):
+                department = self.rng.choice(self.departments)
+                user = self.storage_users[department.branch_id]
+                created_at = self.past()
+                ledger = self.storage_ledger(created_at)
+                items.append(StorageItem(
+                    name=f'{self.rng.choice(ITEM_NAMES)} {self.rng.choice(ITEM_VARIANTS)}',
+                    quantity=sum(delta for _, delta, _ in ledger),
+                    department=department,
+                    branch_id=department.branch_id,
+                    created_by=user,
+                    created_at=created_at,
+                    updated_at=ledger[-1][2],
+                ))
+                ledgers.append(ledger)
+            items = self.bulk_create(StorageItem, items)
+            
+            history, movements = [], []
+            for item, ledger in zip(items, ledgers):
+                history.append(StorageItemHistory(
+                    storage_item=item,
+                    action=StorageItemHistory.ActionType.CREATED,
+                    changed_by=item.created_by,
+                    changed_at=item.created_at,
+                    new_name=item.name,
+                    new_quantity=ledger[0][1],
+                ))
+                movements += [
+                    StockMovement(
+                        storage_item=item,
+                        movement_type=movement_type,
+                        delta=delta,
+                        created_by=item.created_by,
+                        created_at=created_at,
+                    )
+                    for movement_type, delta, created_at in ledger
+                ]
+            self.bulk_create(StorageItemHistory, history)
+            self.bulk_create(StockMovement, movements)
+            self.log(f'{start + chunk}/{total} storage items')
+    
+    def storage_ledger(self, created_at):
+        """Return ``(type, delta, created_at)`` movements that never go negative."""
+        quantity = self.rng.randint(1, 500)
+        ledger = [(StockMovement.MovementType.RECEIPT, quantity, created_at)]
+        moment = created_at
+        for _ in range(self.rng.randrange(6)):
+            moment = self.after(moment, 30)
+            if quantity and self.rng.random() < 0.7:
+                delta = -self.rng.randint(1, quantity)
+                ledger.append((StockMovement.MovementType.ISSUE, delta, moment))
+            else:
+                delta = self.rng.randint(1, 200)
+                ledger.append((StockMovement.MovementType.RECEIPT, delta, moment))
+            quantity += delta
+        return ledger
@@ -0,0 +1,239 @@
+"""Concurrent load test of the order workflow over HTTP.
+
+Virtual users run in threads, each with its own cookie jar, and script the
+same steps a person would click through:
+
+* department users start orders at random (Poisson) intervals: open the
+  draft, add items, submit;
+* committee members price and forward pending orders, acknowledge decided
+  ones and export their PDF;
+* administrators approve or decline priced orders.
+
+Several people working on the same queue are expected to collide; a 404 on
+a workflow step (the order already moved on) is counted as a conflict, and
+a 500 whose body mentions ``database is locked`` as a lock error (visible
+with ``DEBUG = True``, otherwise it is only a server error). Only the
+standard library is used on the client side.
+"""
+
+import http.cookiejar
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from .benchmark import percentile
+
+
+CSRF = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+SUBMIT = re.compile(r'/orders/submit/(\d+)/')
+PRICE_LINK = re.compile(r'/procurement/price/(\d+)/')
+PRICE_FIELD = re.compile(r'name="price_(\d+)"')
+REVIEW_LINK = re.compile(r'/procurement/admin/review/(\d+)/')
+ACKNOWLEDGE_LINK = re.compile(r'/procurement/acknowledge/(\d+)/')
+
+ITEM_NAMES = ['ورق طباعة A4', 'حبر طابعة أسود', 'قلم جاف أزرق', 'ملف بلاستيكي', 'كابل شبكة', 'مناديل ورقية']
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Stats:
+    """Thread-safe collector of request timings and workflow outcomes."""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.events = Counter()
+    
+    def record(self, step, status, elapsed_ms):
+        with self.lock:
+            self.latencies[step].append(elapsed_ms)
+            self.statuses[step][status] += 1
+    
+    def count(self, event):
+        with self.lock:
+            self.events[event] += 1
+    
+    def summary(self, duration):
+        with self.lock:
+            requests = sum(len(values) for values in self.latencies.values())
+            steps = {
+                step: {
+                    'requests': len(values),
+                    'p50_ms': round(percentile(values, 0.50), 1),
+                    'p95_ms': round(percentile(values, 0.95), 1),
+                    'p99_ms': round(percentile(values, 0.99), 1),
+                    'max_ms': round(max(values), 1),
+                    'statuses': {str(status): count for status, count in sorted(self.statuses[step].items())},
+                }
+                for step, values in sorted(self.latencies.items())
+            }
+            return {
+                'duration_s': round(duration, 1),
+                'requests': requests,
+                'requests_per_s': round(requests / duration, 2),
+                'events': dict(sorted(self.events.items())),
+                'events_per_s': {event: round(count / duration, 3) for event, count in sorted(self.events.items())},
+                'steps': steps,
+            }
+
+
+class Session:
+    """One virtual user: a cookie jar and a request helper that never follows redirects."""
+    
+    def __init__(self, base_url, stats, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.stats = stats
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect)
+        self.csrf_token = ''
+    
+    def request(self, step, path, data=None):
+        """Send a GET (or a POST when ``data`` is given) and return status and body."""
+        body = None
+        if data is not None:
+            body = urllib.parse.urlencode({**data, 'csrfmiddlewaretoken': self.csrf_token}).encode()
+        request = urllib.request.Request(self.base_url + path, data=body)
+        
+        start = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                status, content = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, content = e.code, e.read()
+        except OSError:
+            # Connection refused/reset or client timeout.
+            status, content = 0, b''
+        self.stats.record(step, status, (time.perf_counter() - start) * 1000)
+        
+        text = content.decode('utf-8', 'replace') if content else ''
+        if status >= 500 and 'database is locked' in text:
+            self.stats.count('lock_errors')
+        elif status >= 500 or status == 0:
+            self.stats.count('server_errors')
+        match = CSRF.search(text)
+        if match:
+            self.csrf_token = match.group(1)
+        return status, text
+    
+    def login(self, username, password):
+        self.request('login_form', '/login/')
+        status, _ = self.request('login', '/login/', {'username': username, 'password': password})
+        return status == 302
+    
+    def workflow_step(self, step, path, data=None, done=None):
+        """Request a step that acts on an order; count success or conflict."""
+        status, text = self.request(step, path, data)
+        if status == 404:
+            self.stats.count('conflicts')
+        elif status in (200, 302) and done:
+            self.stats.count(done)
+        return status, text
+
+
+def department_user(session, rng, stop, order_rate):
+    """Start orders at ``order_rate`` per minute: add items, then submit."""
+    while not stop.wait(rng.expovariate(order_rate / 60)):
+        status, text = session.request('create_form', '/orders/create/')
+        if status != 200:
+            continue
+        for _ in range(rng.randint(1, 5)):
+            status, text = session.request('add_item', '/orders/create/', {
+                'item_name': rng.choice(ITEM_NAMES),
+                'quantity': rng.randint(1, 20),
+            })
+        status, text = session.request('create_form', '/orders/create/')
+        match = SUBMIT.search(text)
+        if match:
+            session.workflow_step('submit', f'/orders/submit/{match.group(1)}/', done='submitted')
+
+
+def committee_member(session, rng, stop, poll_interval):
+    """Price and forward pending orders; acknowledge and export decided ones."""
+    while not stop.wait(rng.expovariate(1 / poll_interval)):
+        _, text = session.request('pending_list', '/procurement/pending/')
+        ids = PRICE_LINK.findall(text)
+        if ids:
+            order_id = rng.choice(ids)
+            status, text = session.workflow_step('price_form', f'/procurement/price/{order_id}/')
+            if status == 200:
+                prices = {f'price_{item_id}': rng.randint(1, 400) * 250 for item_id in PRICE_FIELD.findall(text)}
+                session.workflow_step(
+                    'price_forward', f'/procurement/price/{order_id}/', {**prices, 'action': 'forward'}, done='priced'
+                )
+        
+        _, text = session.request('decisions_list', '/procurement/decisions/')
+        ids = ACKNOWLEDGE_LINK.findall(text)
+        if ids:
+            order_id = rng.choice(ids)
+            status, _ = session.workflow_step('acknowledge', f'/procurement/acknowledge/{order_id}/', done='acknowledged')
+            if status == 302:
+                session.workflow_step('export_pdf', f'/procurement/export/{order_id}/pdf/', done='pdfs')
+
+
+def administrator(session, rng, stop, poll_interval):
+    """Approve (or sometimes decline) priced orders."""
+    while not stop.wait(rng.expovariate(1 / poll_interval)):
+        _, text = session.request('admin_pending_list', '/procurement/admin/pending/')
+        ids = REVIEW_LINK.findall(text)
+        if not ids:
+            continue
+        order_id = rng.choice(ids)
+        status, _ = session.workflow_step('review_form', f'/procurement/admin/review/{order_id}/')
+        if status == 200:
+            action = 'approve_all' if rng.random() < 0.8 else 'decline_all'
+            session.workflow_step('review_decide', f'/procurement/admin/review/{order_id}/', {'action': action}, done='decided')
+
+
+def run(base_url, users, password, duration, order_rate, poll_interval, seed=1, login_workers=4):
+    """Run the virtual users for ``duration`` seconds and return the summary.
+    
+    ``users`` maps a flow (``department_user``, ``committee_member`` or
+    ``administrator``) to the usernames that run it. All users log in
+    first; password hashing is deliberately slow, so the logins are not
+    part of the measured window.
+    """
+    flows = {
+        'department_user': lambda session, rng, stop: department_user(session, rng, stop, order_rate),
+        'committee_member': lambda session, rng, stop: committee_member(session, rng, stop, poll_interval),
+        'administrator': lambda session, rng, stop: administrator(session, rng, stop, poll_interval),
+    }
+    login_stats = Stats()
+    master = random.Random(seed)
+    virtual_users = [
+        (flow, username, Session(base_url, login_stats), random.Random(master.random()))
+        for flow, usernames in users.items() for username in usernames
+    ]
+    with ThreadPoolExecutor(login_workers) as executor:
+        logged_in = list(executor.map(lambda user: user[2].login(user[1], password), virtual_users))
+    
+    stats = Stats()
+    stop = threading.Event()
+    threads = []
+    for (flow, _, session, rng), ok in zip(virtual_users, logged_in):
+        if not ok:
+            stats.count('login_failures')
+            continue
+        session.stats = stats
+        threads.append(threading.Thread(target=flows[flow], args=(session, rng, stop), daemon=True))
+    
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    summary = stats.summary(time.monotonic() - start)
+    summary['logins'] = login_stats.summary(1)['steps'].get('login')
+    return summary
@@ -0,0 +1,89 @@
+import json
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core import benchmark
+from apps.core.dataset import SIZES, DatasetGenerator
+from apps.core.sandbox import scratch_database
+
+
+def dataset_size(value):
+    if value in SIZES:
+        return SIZES[value]
+    try:
+        return int(value)
+    except ValueError:
+        raise CommandError(f'Unknown dataset size: {value}')
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the hot endpoints on generated datasets in a throwaway '
+        'database and report p50/p95 latency, queries and peak memory as JSON.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', action='append',
+            help='Dataset size as a preset name or a number of order items (repeatable, default: small and medium).'
+        )
+        parser.add_argument('--endpoint', action='append', help='Only benchmark this endpoint (repeatable).')
+        parser.add_argument('--runs', type=int, default=30, help='Measured requests per endpoint.')
+        parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per endpoint.')
+        parser.add_argument('--seed', type=int, default=1, help='Dataset seed.')
+        parser.add_argument('--output', help='Write the results to this JSON file instead of stdout.')
+        parser.add_argument('--baseline', help='Fail when results regress against this JSON file.')
+        parser.add_argument(
+            '--tolerance', type=float, default=benchmark.DEFAULT_TOLERANCE,
+            help='Allowed relative slowdown against the baseline (default: %(default)s).'
+        )
+        parser.add_argument('--update-baseline', action='store_true', help='Write the results to --baseline.')
+    
+    def handle(self, *args, **options):
+        known = {endpoint.name for endpoint in benchmark.ENDPOINTS}
+        unknown = set(options['endpoint'] or []) - known
+        if unknown:
+            raise CommandError(f'Unknown endpoint(s): {", ".join(sorted(unknown))}. Known: {", ".join(sorted(known))}.')
+        if options['runs'] < 1:
+            raise CommandError('--runs must be at least 1.')
+        if options['update_baseline'] and not options['baseline']:
+            raise CommandError('--update-baseline needs --baseline.')
+        sizes = [dataset_size(value) for value in options['size'] or ['small', 'medium']]
+        
+        results = {'environment': benchmark.environment(), 'sizes': {}}
+        with scratch_database(on_disk=True):
+            for size in sizes:
+                call_command('flush', interactive=False, verbosity=0)
+                cache.clear()
+                self.stderr.write(f'Generating {size:,} order items...')
+                DatasetGenerator(size, seed=options['seed']).run()
+                self.stderr.write(f'Benchmarking {size:,}...')
+                results['sizes'][str(size)] = benchmark.run(options['endpoint'], options['runs'], options['warmup'])
+        
+        output = json.dumps(results, indent=2, ensure_ascii=False)
+        if options['output']:
+            Path(options['output']).write_text(output + '\n', encoding='utf-8')
+        else:
+            self.stdout.write(output)
+        
+        if not options['baseline']:
+            return
+        baseline_path = Path(options['baseline'])
+        if options['update_baseline']:
+            baseline_path.write_text(output + '\n', encoding='utf-8')
+            self.stderr.write(self.style.SUCCESS(f'Baseline written to {baseline_path}.'))
+            return
+        try:
+            baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Cannot read baseline: {e}')
+        
+        regressions = benchmark.compare(results, baseline, options['tolerance'])
+        for regression in regressions:
+            self.stderr.write(self.style.ERROR(regression))
+        if regressions:
+            raise CommandError(f'{len(regressions)} regression(s) against {baseline_path}.')
+        self.stderr.write(self.style.SUCCESS(f'No regressions against {baseline_path}.'))
@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.query_budgets import ROLES, SCALES, SKIP, budget_for, iter_url_names, measure_scale
+from apps.core.sandbox import scratch_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every URL as every role on a small and a large dataset in a '
+        'throwaway test database and fail when a view exceeds its query budget '
+        'or its query count grows with the data.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('labels', nargs='*', help='Only check URL names containing one of these.')
+        parser.add_argument('--role', action='append', choices=ROLES, help='Only request as this role (repeatable).')
+        parser.add_argument('--show-sql', action='store_true', help='Print the SQL of passing views too.')
+    
+    def handle(self, *args, **options):
+        names = [
+            name for name in iter_url_names()
+            if name not in SKIP and (not options['labels'] or any(part in name for part in options['labels']))
+        ]
+        roles = options['role'] or ROLES
+        
+        results = {}
+        with scratch_database():
+            for scale in SCALES:
+                call_command('flush', interactive=False, verbosity=0)
+                cache.clear()
+                results[scale] = measure_scale(scale, names, roles)
+        
+        failures = 0
+        for name in names:
+            budget = budget_for(name)
+            for role in roles:
+                status, small = results['small'][name, role]
+                _, large = results['large'][name, role]
+                problems = []
+                if len(large) > budget:
+                    problems.append(f'over budget of {budget}')
+                if len(large) > len(small):
+                    problems.append('grows with the data')
+                
+                line = f'{name:<32} {role:<22} {status}  {len(small):>3} -> {len(large):>3}  (budget {budget})'
+                if problems:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(f'FAIL  {line}  {", ".join(problems)}'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'ok    {line}'))
+                
+                if problems or options['show_sql']:
+                    for number, sql in enumerate(large, 1):
+                        self.stdout.write(f'      {number:>3}. {sql}')
+        
+        for name, reason in SKIP.items():
+            self.stdout.write(f'skip  {name}: {reason}')
+        
+        if failures:
+            raise CommandError(f'{failures} view/role combination(s) exceeded their query budget.')
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.dataset import SIZES, DatasetGenerator
+from apps.core.query_plans import HOT_QUERIES, autodiscover, explain, plan_problems
+from apps.core.sandbox import scratch_database
+
+
+class Command(BaseCommand):
+    help = (
+        'Run EXPLAIN QUERY PLAN on the registered hot queries against a generated, '
+        'analyzed dataset in a throwaway test database and fail on full scans or temp sorts.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('labels', nargs='*', help='Only check queries whose label contains one of these.')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not only failures.')
+        parser.add_argument(
+            '--order-items', type=int, default=SIZES['small'],
+            help='Size of the generated dataset in order items (default: %(default)s).',
+        )
+        parser.add_argument('--seed', type=int, default=1, help='Dataset seed.')
+    
+    def handle(self, *args, **options):
+        autodiscover()
+        labels = [
+            label for label in sorted(HOT_QUERIES)
+            if not options['labels'] or any(part in label for part in options['labels'])
+        ]
+        
+        # Plans depend on the data and its statistics, so they are checked on
+        # the same generated data every time (DatasetGenerator runs ANALYZE).
+        with scratch_database():
+            DatasetGenerator(options['order_items'], seed=options['seed']).run()
+            plans = {label: explain(HOT_QUERIES[label]()) for label in labels}
+        
+        failures = 0
+        for label, plan in plans.items():
+            problems = plan_problems(plan)
+            if problems:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f'FAIL  {label}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'ok    {label}'))
+            
+            if problems or options['verbose_plans']:
+                for line in plan:
+                    self.stdout.write(f'        {line}')
+        
+        if failures:
+            raise CommandError(f'{failures} hot queries do not use an index.')
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.dataset import DEFAULT_PASSWORD, SIZES, DatasetGenerator, is_empty, plan
+
+
+class Command(BaseCommand):
+    help = 'Fill an empty database with a synthetic dataset of production volume.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--size', choices=SIZES, default='small',
+            help='Preset by number of order items: ' + ', '.join(f'{name}={count:,}' for name, count in SIZES.items()) + '.'
+        )
+        parser.add_argument('--order-items', type=int, help='Number of order items, overrides --size.')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; the same seed gives the same data.')
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Password of every generated user.')
+        parser.add_argument('--dry-run', action='store_true', help='Only print the planned row counts.')
+    
+    def handle(self, *args, **options):
+        order_items = options['order_items'] or SIZES[options['size']]
+        if order_items < 10:
+            raise CommandError('At least 10 order items are needed.')
+        
+        for name, count in plan(order_items).items():
+            self.stdout.write(f'{name}: {count:,}')
+        if options['dry_run']:
+            return
+        if not is_empty():
+            raise CommandError('The database already has data; run "manage.py flush" first.')
+        
+        start = time.monotonic()
+        generator = DatasetGenerator(
+            order_items,
+            seed=options['seed'],
+            password=options['password'],
+            log=lambda message: self.stdout.write(message) if options['verbosity'] > 1 else None,
+        )
+        written = generator.run()
+        
+        for label, count in written.items():
+            self.stdout.write(f'{label}: {count:,}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {sum(written.values()):,} rows in {time.monotonic() - start:.1f}s.'
+        ))
@@ -0,0 +1,122 @@
+import json
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.models import User
+from apps.core import loadtest
+from apps.core.dataset import DEFAULT_PASSWORD
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            urllib.request.urlopen(url + '/login/', timeout=2).close()
+            return True
+        except urllib.error.HTTPError:
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+class Command(BaseCommand):
+    help = (
+        'Run concurrent department, committee and administrator flows against a '
+        'local server and report throughput, latency percentiles, lock errors '
+        'and workflow conflicts. Writes to the configured database; run it on '
+        'a generated dataset (manage.py generate_dataset).'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Test an already running server instead of starting runserver.')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds to run (default: %(default)s).')
+        parser.add_argument('--department-users', type=int, default=50)
+        parser.add_argument('--committee', type=int, default=5)
+        parser.add_argument('--administrators', type=int, default=2)
+        parser.add_argument(
+            '--order-rate', type=float, default=2,
+            help='New orders per department user per minute (default: %(default)s).'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=2,
+            help='Mean seconds between queue checks of committee members and administrators (default: %(default)s).'
+        )
+        parser.add_argument('--password', default=DEFAULT_PASSWORD, help='Password of the generated users.')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Also write the JSON summary to this file.')
+    
+    def handle(self, *args, **options):
+        users = {
+            'department_user': self.usernames(User.Role.DEPARTMENT_USER, options['department_users']),
+            'committee_member': self.usernames(User.Role.PROCUREMENT_COMMITTEE, options['committee']),
+            'administrator': self.usernames(User.Role.ADMINISTRATOR, options['administrators']),
+        }
+        
+        server = None
+        url = options['url']
+        if url is None:
+            port = free_port()
+            url = f'http://127.0.0.1:{port}'
+            log = tempfile.NamedTemporaryFile(prefix='load-test-server-', suffix='.log', delete=False)
+            server = subprocess.Popen(
+                [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), 'runserver', '--noreload', f'127.0.0.1:{port}'],
+                stdout=log, stderr=subprocess.STDOUT,
+            )
+            if not wait_until_ready(url, server):
+                server.terminate()
+                raise CommandError(f'The server did not start; see {log.name}.')
+            self.stderr.write(f'Server started on {url} (log: {log.name}).')
+        
+        try:
+            self.stderr.write(
+                f'Running {sum(len(names) for names in users.values())} virtual users for {options["duration"]:g}s...'
+            )
+            summary = loadtest.run(
+                url, users, options['password'], options['duration'],
+                options['order_rate'], options['poll_interval'], options['seed'],
+            )
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+        
+        output = json.dumps(summary, indent=2, ensure_ascii=False)
+        self.stdout.write(output)
+        if options['output']:
+            Path(options['output']).write_text(output + '\n', encoding='utf-8')
+        
+        events = summary['events']
+        self.stderr.write(
+            f'{summary["requests_per_s"]} requests/s, '
+            f'{events.get("submitted", 0)} submitted, {events.get("priced", 0)} priced, '
+            f'{events.get("decided", 0)} decided, {events.get("acknowledged", 0)} acknowledged, '
+            f'{events.get("lock_errors", 0)} lock errors, {events.get("conflicts", 0)} conflicts.'
+        )
+    
+    def usernames(self, role, count):
+        names = list(
+            User.objects.filter(role=role, is_active=True).order_by('pk').values_list('username', flat=True)[:count]
+        )
+        if len(names) < count:
+            raise CommandError(
+                f'Only {len(names)} active {role} users, {count} needed; run "manage.py generate_dataset" first.'
+            )
+        return names
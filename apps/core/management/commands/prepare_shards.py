@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.shards import sync_mirrors
+
+
+class Command(BaseCommand):
+    help = 'Migrate the branch shards and copy the users, branches, departments and catalog into them.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--skip-migrate', action='store_true', help='Only copy the reference data.')
+    
+    def handle(self, *args, **options):
+        if not settings.BRANCH_SHARDS:
+            raise CommandError('No branch shards configured; set DJANGO_BRANCH_SHARDS.')
+        
+        for branch_id, alias in sorted(settings.BRANCH_SHARDS.items()):
+            if not options['skip_migrate']:
+                # post_migrate moves the shard's id sequences to its range.
+                call_command('migrate', database=alias, verbosity=max(0, options['verbosity'] - 1))
+            copied = sync_mirrors(alias)
+            summary = ', '.join(f'{count} {label}' for label, count in copied.items())
+            self.stdout.write(self.style.SUCCESS(f'{alias} (branch {branch_id}): {summary}'))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.core.replica import REPLICA, has_replica, refresh
+
+
+class Command(BaseCommand):
+    help = 'Copy the database into the read replica with the SQLite online backup API.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Refresh every this many seconds until interrupted (default: once). '
+                 'Keep it below REPLICA_STICKY_SECONDS.',
+        )
+    
+    def handle(self, *args, **options):
+        if not has_replica():
+            raise CommandError('No replica database configured; set DJANGO_DB_REPLICA.')
+        
+        interval = options['interval']
+        while True:
+            start = time.perf_counter()
+            try:
+                pages = refresh(DEFAULT_DB_ALIAS, REPLICA)
+            except ValueError as e:
+                raise CommandError(e)
+            self.stdout.write(f'Copied {pages} pages in {(time.perf_counter() - start) * 1000:.0f} ms')
+            if not interval:
+                return
+            try:
+                time.sleep(interval)
+            except KeyboardInterrupt:
+                return
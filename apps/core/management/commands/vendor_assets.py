@@ -0,0 +1,119 @@
+import os
+import platform
+import re
+import shutil
+import stat
+import subprocess
+import tempfile
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Pinned versions of the assets base.html loads from the CDNs.
+SCRIPTS = {
+    'htmx.min.js': 'https://unpkg.com/htmx.org@1.9.10/dist/htmx.min.js',
+    'alpine.min.js': 'https://unpkg.com/alpinejs@3.14.9/dist/cdn.min.js',
+}
+FONT_CSS = 'https://fonts.googleapis.com/css2?family=Tajawal:wght@300;400;500;700;800&display=swap'
+FONT_URL = re.compile(r'url\((https://fonts\.gstatic\.com/[^)]+)\)')
+# Google Fonts serves woff2 to current browsers only.
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+# The Play CDN (cdn.tailwindcss.com) runs Tailwind 3.
+TAILWIND_VERSION = 'v3.4.17'
+TAILWIND_CLI = 'https://github.com/tailwindlabs/tailwindcss/releases/download/{version}/tailwindcss-{target}'
+TAILWIND_TARGETS = {
+    ('Linux', 'x86_64'): 'linux-x64',
+    ('Linux', 'aarch64'): 'linux-arm64',
+    ('Darwin', 'x86_64'): 'macos-x64',
+    ('Darwin', 'arm64'): 'macos-arm64',
+    ('Windows', 'AMD64'): 'windows-x64.exe',
+}
+TAILWIND_INPUT = '@tailwind base;\n@tailwind components;\n@tailwind utilities;\n'
+
+
+def download(url):
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return response.read()
+
+
+class Command(BaseCommand):
+    help = (
+        'Download htmx, Alpine.js and the Tajawal font and build the Tailwind CSS into static/vendor, '
+        'so pages load no third-party assets. Rerun with --css-only after adding Tailwind classes.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--css-only', action='store_true', help='Only rebuild static/vendor/tailwind.css.')
+        parser.add_argument('--tailwind', help='Path of an installed Tailwind 3 CLI (default: download it).')
+    
+    def handle(self, *args, **options):
+        vendor = Path(settings.BASE_DIR) / 'static' / 'vendor'
+        with tempfile.TemporaryDirectory() as scratch:
+            scratch = Path(scratch)
+            cli = Path(options['tailwind']) if options['tailwind'] else self.download_tailwind(scratch)
+            if options['css_only']:
+                vendor.mkdir(parents=True, exist_ok=True)
+                self.build_css(cli, scratch, vendor / 'tailwind.css')
+                return
+            
+            # Assemble everything before replacing static/vendor, so a failed
+            # download leaves the committed copy intact.
+            staged = scratch / 'vendor'
+            (staged / 'fonts').mkdir(parents=True)
+            for name, url in SCRIPTS.items():
+                self.fetch(url, staged / name)
+            self.vendor_fonts(staged)
+            self.build_css(cli, scratch, staged / 'tailwind.css')
+            
+            if vendor.exists():
+                shutil.rmtree(vendor)
+            shutil.copytree(staged, vendor)
+        self.stdout.write(self.style.SUCCESS(f'Vendored assets into {vendor}; commit it and run collectstatic to publish them.'))
+    
+    def fetch(self, url, path):
+        try:
+            data = download(url)
+        except OSError as e:
+            raise CommandError(f'Could not download {url}: {e}')
+        path.write_bytes(data)
+        self.stdout.write(f'{path.name:<40} {len(data):>9} bytes')
+        return data
+    
+    def vendor_fonts(self, staged):
+        """Save the font CSS with its font files, pointing at the local copies."""
+        css = self.fetch(FONT_CSS, staged / 'tajawal.css').decode()
+        
+        def localize(match):
+            url = match.group(1)
+            name = url.rsplit('/', 1)[-1]
+            self.fetch(url, staged / 'fonts' / name)
+            return f'url(fonts/{name})'
+        
+        (staged / 'tajawal.css').write_text(FONT_URL.sub(localize, css))
+    
+    def download_tailwind(self, scratch):
+        target = TAILWIND_TARGETS.get((platform.system(), platform.machine()))
+        if target is None:
+            raise CommandError(f'No Tailwind CLI build for {platform.system()} {platform.machine()}; pass --tailwind.')
+        cli = scratch / f'tailwindcss-{target}'
+        self.fetch(TAILWIND_CLI.format(version=TAILWIND_VERSION, target=target), cli)
+        cli.chmod(cli.stat().st_mode | stat.S_IXUSR)
+        return cli
+    
+    def build_css(self, cli, scratch, output):
+        source = scratch / 'tailwind.input.css'
+        source.write_text(TAILWIND_INPUT)
+        config = Path(settings.BASE_DIR) / 'tailwind.config.js'
+        try:
+            subprocess.run(
+                [os.fspath(cli), '-c', os.fspath(config), '-i', os.fspath(source), '-o', os.fspath(output), '--minify'],
+                cwd=settings.BASE_DIR, check=True, capture_output=True, text=True,
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise CommandError(f'Tailwind build failed: {getattr(e, "stderr", None) or e}')
+        self.stdout.write(f'{output.name:<40} {output.stat().st_size:>9} bytes')
@@ -0,0 +1,68 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.warmup import warm_up
+
+
+PROBE = 'import sys; from apps.core.warmup import probe; probe(sys.argv[1], sys.argv[2] or None)'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compile the templates, build the URL resolvers and load the PDF libraries and fonts, '
+        'reporting the time of each step; with --measure, compare fresh processes with and without warm-up.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--measure', action='store_true',
+            help='Time startup and the first two requests in fresh processes, cold and warmed up.',
+        )
+        parser.add_argument('--path', default=settings.LOGIN_URL, help='URL or URL name requested by --measure (default: %(default)s).')
+        parser.add_argument('--user', default='', help='Username to log in as for --measure.')
+        parser.add_argument('--repeat', type=int, default=3, help='Fresh processes per mode for --measure (median).')
+    
+    def handle(self, *args, **options):
+        if options['measure']:
+            return self.measure(options)
+        
+        results = warm_up()
+        total = sum(seconds for _, seconds in results.values())
+        self.stdout.write(self.style.SUCCESS(f'Warmed up in {total * 1000:.0f} ms'))
+        for name, (result, seconds) in results.items():
+            if isinstance(result, list):
+                result = len(result)
+            self.stdout.write(f'  {name:<15} {result!s:<12} {seconds * 1000:>7.1f} ms')
+    
+    def run_probe(self, options, warm):
+        env = {**os.environ, 'DJANGO_WARMUP': str(warm)}
+        completed = subprocess.run(
+            [sys.executable, '-c', PROBE, options['path'], options['user']],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if completed.returncode:
+            raise CommandError(f'Probe failed:\n{completed.stderr}')
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+    
+    def measure(self, options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1.')
+        
+        self.stdout.write(f'{options["path"]} (median of {options["repeat"]} fresh processes)')
+        self.stdout.write(f'{"":<6} {"startup":>10} {"1st request":>12} {"2nd request":>12}')
+        for warm in (False, True):
+            runs = [self.run_probe(options, warm) for _ in range(options['repeat'])]
+            statuses = {run['status'] for run in runs}
+            if statuses != {200}:
+                self.stderr.write(self.style.WARNING(f'Status {", ".join(map(str, sorted(statuses)))}'))
+            row = [
+                statistics.median(run[metric] for run in runs)
+                for metric in ('startup_ms', 'first_request_ms', 'second_request_ms')
+            ]
+            self.stdout.write(f'{"warm" if warm else "cold":<6} {row[0]:>7.1f} ms {row[1]:>9.1f} ms {row[2]:>9.1f} ms')
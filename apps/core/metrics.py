@@ -0,0 +1,182 @@
+"""Prometheus-style metrics shared by all worker processes.
+
+Each process accumulates counter and histogram increments in memory and
+periodically adds them to a small SQLite file (``METRICS_DB``, separate from
+the application database) with ``INSERT ... ON CONFLICT DO UPDATE``. Because
+only increments are written, any number of processes can share the file;
+``/core/metrics/`` flushes the local increments and renders the totals in
+the Prometheus text format::
+    
+    SEARCHES.inc(source='item_suggestions')
+    REQUEST_LATENCY.observe(0.123, view='orders:search_items')
+"""
+
+import atexit
+import math
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_pending = {}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+REGISTRY = {}
+
+
+def _label_text(labels):
+    return ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+        for key, value in sorted(labels.items())
+    )
+
+
+def _add(name, labels, le, value):
+    key = (name, _label_text(labels), le)
+    with _lock:
+        _pending[key] = _pending.get(key, 0) + value
+
+
+class Counter:
+    """Monotonic counter with labels."""
+    
+    kind = 'counter'
+    
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        REGISTRY[name] = self
+    
+    def inc(self, amount=1, **labels):
+        _add(self.name, labels, '', amount)
+
+
+class Histogram:
+    """Cumulative histogram with labels, in seconds."""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets) + (math.inf,)
+        REGISTRY[name] = self
+    
+    def observe(self, value, **labels):
+        # Every bucket is written, even with zero, so each series is complete.
+        for bound in self.buckets:
+            _add(f'{self.name}_bucket', labels, _format_le(bound), 1 if value <= bound else 0)
+        _add(f'{self.name}_sum', labels, '', value)
+        _add(f'{self.name}_count', labels, '', 1)
+
+
+def _format_le(bound):
+    return '+Inf' if bound == math.inf else repr(float(bound))
+
+
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Request wall time per view.')
+REQUEST_DB_TIME = Histogram('http_request_db_seconds', 'Database time per request per view.')
+TRANSITIONS = Counter('order_transitions_total', 'Order workflow status changes.')
+PDF_RENDERS = Counter('pdf_renders_total', 'Generated PDF documents.')
+SEARCHES = Counter('search_queries_total', 'Search queries by source.')
+WRITE_RETRIES = Counter('write_unit_retries_total', 'Write units rolled back and retried because the database was locked.')
+WRITE_FAILURES = Counter('write_unit_failures_total', 'Write units that were still locked at their deadline.')
+WRITE_WAIT = Histogram('write_unit_wait_seconds', 'Time a write unit lost to failed attempts and backoff.')
+
+
+def observe_request(record):
+    """Add a finished request (see ``perf.finish_request``) to the histograms."""
+    REQUEST_LATENCY.observe(record['wall_ms'] / 1000, view=record['view'])
+    REQUEST_DB_TIME.observe(record['db_ms'] / 1000, view=record['view'])
+    if time.monotonic() - _last_flush >= settings.METRICS_FLUSH_SECONDS:
+        flush()
+
+
+def _connect():
+    path = settings.METRICS_DB
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path, timeout=5)
+    db.execute(
+        'CREATE TABLE IF NOT EXISTS metric ('
+        'name TEXT NOT NULL, labels TEXT NOT NULL, le TEXT NOT NULL, value REAL NOT NULL, '
+        'PRIMARY KEY (name, labels, le))'
+    )
+    return db
+
+
+def flush():
+    """Add this process's pending increments to the shared store."""
+    global _pending, _last_flush
+    
+    with _lock:
+        pending, _pending = _pending, {}
+        _last_flush = time.monotonic()
+    if not pending:
+        return
+    
+    try:
+        db = _connect()
+        try:
+            with db:
+                db.executemany(
+                    'INSERT INTO metric (name, labels, le, value) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (name, labels, le) DO UPDATE SET value = value + excluded.value',
+                    [(name, labels, le, value) for (name, labels, le), value in pending.items()]
+                )
+        finally:
+            db.close()
+    except sqlite3.Error:
+        # Keep the increments for the next flush rather than losing them.
+        with _lock:
+            for key, value in pending.items():
+                _pending[key] = _pending.get(key, 0) + value
+
+
+atexit.register(flush)
+
+
+def discard():
+    """Drop the increments not yet flushed (e.g. made against a test database)."""
+    with _lock:
+        _pending.clear()
+
+
+def _sort_key(row):
+    name, labels, le, _ = row
+    return name, labels, math.inf if le == '+Inf' else float(le or 0)
+
+
+def render():
+    """Return all metrics in the Prometheus text exposition format."""
+    flush()
+    db = _connect()
+    try:
+        rows = sorted(db.execute('SELECT name, labels, le, value FROM metric'), key=_sort_key)
+    finally:
+        db.close()
+    
+    families = {}
+    for row in rows:
+        family = row[0]
+        for suffix in ('_bucket', '_sum', '_count'):
+            if family.endswith(suffix) and family[:-len(suffix)] in REGISTRY:
+                family = family[:-len(suffix)]
+        families.setdefault(family, []).append(row)
+    
+    lines = []
+    for family in sorted(families):
+        metric = REGISTRY.get(family)
+        if metric is not None:
+            lines.append(f'# HELP {family} {metric.help_text}')
+            lines.append(f'# TYPE {family} {metric.kind}')
+        for name, labels, le, value in families[family]:
+            if le:
+                labels = f'{labels},le="{le}"' if labels else f'le="{le}"'
+            value = int(value) if value == int(value) else value
+            lines.append(f'{name}{{{labels}}} {value}' if labels else f'{name} {value}')
+    return '\n'.join(lines) + '\n'
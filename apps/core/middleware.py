@@ -0,0 +1,183 @@
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from apps.departments import cache as reference_cache
+from . import assets, metrics, perf, profiling, replica, shards
+
+
+class StaticFilesMiddleware:
+    """Serve ``STATIC_ROOT`` precompressed and with far-future caching.
+    
+    See ``assets``. Place it right after ``SecurityMiddleware`` so static
+    requests skip sessions, authentication and the performance log. Disabled
+    with ``STATIC_SERVE = False``, e.g. when a web server in front serves
+    ``STATIC_ROOT``; ``runserver`` serves static files itself under DEBUG.
+    """
+    
+    def __init__(self, get_response):
+        if not settings.STATIC_SERVE or not settings.STATIC_URL.startswith('/'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+    
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path.startswith(self.prefix):
+            response = assets.serve(request, request.path[len(self.prefix):], settings.STATIC_ROOT)
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+
+class PerformanceMiddleware:
+    """Measure wall time, queries, DB and template time of every request.
+    
+    Place it near the top of ``MIDDLEWARE`` so session and authentication
+    queries are included. Each request also feeds the latency and DB time
+    histograms in ``metrics``. A streamed response (CSV exports, files) is
+    measured until its body has been sent, including the queries run while
+    it streams. Disabled with ``PERF_MONITORING = False``.
+    """
+    
+    def __init__(self, get_response):
+        if not settings.PERF_MONITORING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    @staticmethod
+    @contextmanager
+    def measuring(timings):
+        token = perf.current_timings.set(timings)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                yield
+        finally:
+            perf.current_timings.reset(token)
+    
+    def __call__(self, request):
+        timings = perf.RequestTimings()
+        start = time.perf_counter()
+        with self.measuring(timings):
+            response = self.get_response(request)
+        
+        if response.streaming and not response.is_async:
+            content = response.streaming_content
+            response.streaming_content = self.stream(request, response, content, timings, start)
+            return response
+        self.finish(request, response, timings, start)
+        return response
+    
+    def stream(self, request, response, content, timings, start):
+        # The chunks are produced (and their queries run) as the server sends
+        # them, after __call__ has returned.
+        content = iter(content)
+        size = 0
+        try:
+            while True:
+                with self.measuring(timings):
+                    chunk = next(content, None)
+                if chunk is None:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.finish(request, response, timings, start, size)
+    
+    def finish(self, request, response, timings, start, size=None):
+        record = perf.finish_request(request, response, timings, time.perf_counter() - start, size)
+        metrics.observe_request(record)
+
+
+class ReferenceDataMiddleware:
+    """Read the branch/department data version once per request.
+    
+    ``str(department)``, the cached user key and the reference-data ETags
+    all check that version; within a request they reuse the first read (see
+    ``departments.cache.pinned``). Place it above ``AuthenticationMiddleware``.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        with reference_cache.pinned():
+            return self.get_response(request)
+
+
+class ReplicaStickinessMiddleware:
+    """Keep a client's reads on ``default`` for a while after it wrote.
+    
+    See ``replica``. Place it above ``SessionMiddleware`` so session writes
+    (e.g. logging in) count as writes.
+    """
+    
+    def __init__(self, get_response):
+        if not replica.has_replica():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        state = replica.RoutingState(sticky=replica.STICKY_COOKIE in request.COOKIES)
+        token = replica.current_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            replica.current_state.reset(token)
+        
+        if state.wrote:
+            response.set_cookie(
+                replica.STICKY_COOKIE, '1', max_age=settings.REPLICA_STICKY_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class BranchShardMiddleware:
+    """Route the request's orders and storage queries to a branch shard.
+    
+    See ``shards``. A sharded id in the URL (an order or storage item)
+    names its shard; otherwise the user's branch does. Must come after
+    ``AuthenticationMiddleware``.
+    """
+    
+    def __init__(self, get_response):
+        if not settings.BRANCH_SHARDS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        token = shards.current_alias.set(None)
+        try:
+            return self.get_response(request)
+        finally:
+            shards.current_alias.reset(token)
+    
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        alias = shards.alias_for_kwargs(view_kwargs)
+        if alias is None and request.user.is_authenticated:
+            alias = shards.alias_for_user(request.user)
+        shards.current_alias.set(alias)
+
+
+class ProfilingMiddleware:
+    """Profile a request on demand for staff users (see ``profiling``).
+    
+    Must come after ``AuthenticationMiddleware``. The report name is returned
+    in the ``X-Profile-Report`` response header.
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        mode = profiling.requested_mode(request)
+        if mode is None or not request.user.is_staff:
+            return self.get_response(request)
+        
+        response, name = profiling.run(request, self.get_response, mode)
+        response['X-Profile-Report'] = name or 'busy'
+        return response
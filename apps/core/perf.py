@@ -0,0 +1,222 @@
+"""Per-request performance measurements.
+
+``PerformanceMiddleware`` creates a ``RequestTimings`` for each request and
+installs it as an ``execute_wrapper`` on every database connection; the
+template backend adds its render time to the same object. When the request
+finishes the record is added to the in-process endpoint statistics and, above
+``PERF_SLOW_REQUEST_MS``, appended to the slow-request log together with the
+slowest statements and their ``EXPLAIN`` output. The statements are logged
+with the number and types of their parameters only; the values are used for
+the ``EXPLAIN`` in process and never written out.
+
+The endpoint statistics are kept in memory by each worker process and cover
+only the requests that process served; the latency and DB time histograms
+in ``metrics`` add up all workers.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+
+logger = logging.getLogger(__name__)
+
+current_timings = ContextVar('current_timings', default=None)
+
+SAMPLE_SIZE = 200
+SLOW_QUERY_COUNT = 5
+REPEATED_QUERY_COUNT = 3
+
+
+class RequestTimings:
+    """Database and template timings collected during one request."""
+    
+    def __init__(self):
+        self.queries = []
+        self.query_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+    
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.query_count += 1
+            self.db_time += duration
+            self.queries.append((duration, sql, params, many, context['connection'].alias))
+    
+    def add_template_time(self, duration):
+        self.template_time += duration
+
+
+class EndpointStats:
+    """Running totals and recent latency samples for one URL name."""
+    
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.queries = 0
+        self.size = 0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+    
+    def add(self, record):
+        self.count += 1
+        self.total_ms += record['wall_ms']
+        self.max_ms = max(self.max_ms, record['wall_ms'])
+        self.db_ms += record['db_ms']
+        self.template_ms += record['template_ms']
+        self.queries += record['queries']
+        self.size += record['size'] or 0
+        self.samples.append(record['wall_ms'])
+    
+    def as_row(self, name):
+        samples = sorted(self.samples)
+        return {
+            'view': name,
+            'count': self.count,
+            'total_ms': self.total_ms,
+            'avg_ms': self.total_ms / self.count,
+            'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            'max_ms': self.max_ms,
+            'avg_db_ms': self.db_ms / self.count,
+            'avg_template_ms': self.template_ms / self.count,
+            'avg_queries': self.queries / self.count,
+            'avg_size': self.size / self.count,
+        }
+
+
+_stats = {}
+_lock = threading.Lock()
+
+
+def endpoint_summary():
+    """Return one row per endpoint seen by this process, worst total time first."""
+    with _lock:
+        rows = [stats.as_row(name) for name, stats in _stats.items()]
+    return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+
+def _explain(alias, sql, params):
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            return [' '.join(str(col) for col in row) for row in cursor.fetchall()]
+    except DatabaseError as exc:
+        return [f'EXPLAIN failed: {exc}']
+
+
+def _describe_params(params):
+    # Parameters can be session keys, password hashes or personal data, so
+    # the log only keeps their number and types.
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        params = list(params.values())
+    return f"{len(params)} params ({', '.join(type(value).__name__ for value in params)})"
+
+
+def _slow_queries(timings):
+    slowest = sorted(timings.queries, key=lambda q: q[0], reverse=True)[:SLOW_QUERY_COUNT]
+    queries = []
+    for duration, sql, params, many, alias in slowest:
+        explain = None
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            explain = _explain(alias, sql, params)
+        queries.append({
+            'ms': round(duration * 1000, 2),
+            'sql': sql,
+            'params': _describe_params(params),
+            'explain': explain,
+        })
+    return queries
+
+
+def _repeated_queries(timings):
+    counts = Counter(sql for _, sql, _, _, _ in timings.queries)
+    return [
+        {'count': count, 'sql': sql}
+        for sql, count in counts.most_common(REPEATED_QUERY_COUNT) if count > 1
+    ]
+
+
+def _write_slow_log(record):
+    path = settings.PERF_SLOW_LOG
+    line = json.dumps(record, ensure_ascii=False, default=str)
+    with _lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as log:
+            log.write(line + '\n')
+
+
+def recent_slow_requests(limit=20):
+    """Return the last ``limit`` slow-request records, newest first."""
+    path = settings.PERF_SLOW_LOG
+    if not path.exists():
+        return []
+    
+    with open(path, 'rb') as log:
+        log.seek(0, 2)
+        log.seek(max(0, log.tell() - 512 * 1024))
+        lines = log.read().decode('utf-8', errors='ignore').splitlines()
+    
+    records = []
+    for line in reversed(lines):
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+        if len(records) == limit:
+            break
+    return records
+
+
+def finish_request(request, response, timings, wall_time, size=None):
+    """Record a finished request and return its measurements.
+    
+    ``size`` is the number of bytes streamed, for streaming responses.
+    """
+    match = getattr(request, 'resolver_match', None)
+    user = getattr(request, 'user', None)
+    
+    record = {
+        'view': match.view_name if match else '<unresolved>',
+        'role': user.role if user is not None and user.is_authenticated else 'anonymous',
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'wall_ms': round(wall_time * 1000, 2),
+        'db_ms': round(timings.db_time * 1000, 2),
+        'queries': timings.query_count,
+        'template_ms': round(timings.template_time * 1000, 2),
+        'size': size if response.streaming else len(response.content),
+    }
+    
+    with _lock:
+        _stats.setdefault(record['view'], EndpointStats()).add(record)
+    
+    if record['wall_ms'] >= settings.PERF_SLOW_REQUEST_MS:
+        logger.warning(
+            'Slow request %s %s (%s): %.0f ms, %d queries',
+            request.method, request.path, record['view'], record['wall_ms'], record['queries'],
+        )
+        _write_slow_log({
+            'time': timezone.now().isoformat(),
+            **record,
+            'slow_queries': _slow_queries(timings),
+            'repeated_queries': _repeated_queries(timings),
+        })
+    
+    return record
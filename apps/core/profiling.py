@@ -0,0 +1,123 @@
+"""On-demand profiling of single requests for staff users.
+
+A staff user adds ``?_profile=1`` (or the ``X-Profile: 1`` header) to any URL
+to run that request under ``cProfile``; ``?_profile=memory`` also traces
+allocations with ``tracemalloc``. Reports are written to ``PROFILE_DIR`` as
+``<name>.prof`` plus ``<name>.mem.txt`` and are listed on ``/core/profiles/``.
+The CPU profile covers the request's own thread only; the allocation trace
+includes every thread of the process.
+"""
+
+import cProfile
+import io
+import pstats
+import re
+import threading
+import tracemalloc
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.text import slugify
+
+
+PARAMETER = '_profile'
+HEADER = 'HTTP_X_PROFILE'
+TOP_ALLOCATIONS = 30
+
+_NAME = re.compile(r'^[\w.-]+$')
+
+# cProfile only sees the thread that runs the request, so work of other
+# threads (concurrent requests) is not in the report. tracemalloc is
+# process-wide, and from Python 3.12 so is cProfile's monitoring tool id,
+# which allows one active profiler at a time: profile one request at a time.
+_busy = threading.Lock()
+
+
+def requested_mode(request):
+    """Return ``None``, ``'cpu'`` or ``'memory'`` for the request."""
+    value = request.GET.get(PARAMETER) or request.META.get(HEADER)
+    if not value:
+        return None
+    return 'memory' if value == 'memory' else 'cpu'
+
+
+def run(request, get_response, mode):
+    """Run ``get_response`` under the profiler and save the reports.
+    
+    Returns the response and the report name, or ``None`` as the name when
+    another request is already being profiled.
+    """
+    if not _busy.acquire(blocking=False):
+        return get_response(request), None
+    
+    try:
+        if mode == 'memory':
+            tracemalloc.start()
+        profiler = cProfile.Profile()
+        try:
+            response = profiler.runcall(get_response, request)
+            snapshot = tracemalloc.take_snapshot() if mode == 'memory' else None
+        finally:
+            if mode == 'memory':
+                tracemalloc.stop()
+        
+        name = _report_name(request)
+        directory = settings.PROFILE_DIR
+        directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(directory / f'{name}.prof')
+        if snapshot is not None:
+            (directory / f'{name}.mem.txt').write_text(_allocation_report(snapshot), encoding='utf-8')
+        return response, name
+    finally:
+        _busy.release()
+
+
+def _report_name(request):
+    match = getattr(request, 'resolver_match', None)
+    label = match.view_name if match else request.path
+    return '{}-{}'.format(
+        timezone.localtime().strftime('%Y%m%d-%H%M%S-%f'),
+        slugify(label.replace(':', '-').replace('/', '-')) or 'root',
+    )
+
+
+def _allocation_report(snapshot):
+    lines = [f'Top {TOP_ALLOCATIONS} allocation sites by size', '']
+    for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+        lines.append(str(stat))
+    return '\n'.join(lines) + '\n'
+
+
+def list_reports():
+    """Return the saved reports, newest first."""
+    directory = settings.PROFILE_DIR
+    if not directory.exists():
+        return []
+    
+    reports = []
+    for path in directory.glob('*.prof'):
+        stat = path.stat()
+        reports.append({
+            'name': path.stem,
+            'size': stat.st_size,
+            'created_at': datetime.fromtimestamp(stat.st_mtime, tz=timezone.get_current_timezone()),
+            'has_memory': (directory / f'{path.stem}.mem.txt').exists(),
+        })
+    return sorted(reports, key=lambda report: report['name'], reverse=True)
+
+
+def report_path(name, suffix='.prof'):
+    """Return the path of a saved report, or ``None`` for unknown names."""
+    if not _NAME.match(name):
+        return None
+    path = settings.PROFILE_DIR / f'{name}{suffix}'
+    return path if path.is_file() else None
+
+
+def summarize(path, limit=40):
+    """Return the ``pstats`` listing of a report sorted by cumulative time."""
+    out = io.StringIO()
+    stats = pstats.Stats(str(path), stream=out)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
@@ -0,0 +1,223 @@
+"""Query budgets for every URL, checked by ``manage.py check_query_budgets``.
+
+Each named URL in ``config/urls.py`` is requested as every role against two
+seeded datasets, a small and a large one (more orders per page, more items
+per order, more storage rows). A view passes when its query count stays
+within ``QUERY_BUDGETS`` (or ``DEFAULT_BUDGET``) and does not grow with the
+dataset, so an N+1 loop added to a template fails even when the absolute
+count is still small.
+
+Requests run inside a rolled-back transaction, so views that change data on
+GET (submit, acknowledge, remove item, ...) see the same seed every time.
+"""
+
+import random
+import re
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from apps.accounts.models import User
+from apps.departments.models import Branch, Department
+from apps.orders.models import Item, Order, OrderItem
+from apps.reports.models import SpendRollup
+from apps.storage.models import StorageItem, StockMovement
+
+
+DEFAULT_BUDGET = 5
+
+# Views that legitimately need more than the default, by URL name.
+QUERY_BUDGETS = {
+    'orders:create': 7,
+    'orders:detail': 9,
+    'procurement:admin_review': 6,
+}
+
+# URLs that cannot be requested meaningfully in a loop.
+SKIP = {
+    'accounts:logout': 'ends the session used by the following requests',
+    'core:profile_detail': 'needs a saved profile report',
+    'core:profile_download': 'needs a saved profile report',
+}
+
+SCALES = {
+    'small': {'orders_per_status': 1, 'items_per_order': 2, 'storage_items': 5},
+    'large': {'orders_per_status': 12, 'items_per_order': 8, 'storage_items': 40},
+}
+
+ROLES = [choice for choice, _ in User.Role.choices]
+
+_SAVEPOINT = re.compile(r'^(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT) ')
+
+
+def iter_url_names(patterns=None, namespace=''):
+    """Yield the namespaced names of all URL patterns except the admin site."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == 'admin':
+                continue
+            prefix = f'{namespace}{pattern.namespace}:' if pattern.namespace else namespace
+            yield from iter_url_names(pattern.url_patterns, prefix)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield f'{namespace}{pattern.name}'
+
+
+def seed(scale):
+    """Create a dataset of the given scale and return sample objects by name."""
+    size = SCALES[scale]
+    rng = random.Random(scale)
+    
+    branches = [Branch.objects.create(name=f'فرع {i}') for i in range(1, 4)]
+    departments = [
+        Department.objects.create(name=f'شعبة {i}', branch=branch)
+        for branch in branches for i in range(1, 3)
+    ]
+    
+    users = {}
+    for role in ROLES:
+        users[role] = User.objects.create(
+            username=f'budget_{role}',
+            role=role,
+            department=departments[0],
+            branch=branches[0],
+            is_staff=role == User.Role.ADMINISTRATOR,
+        )
+    department_user = users[User.Role.DEPARTMENT_USER]
+    committee = users[User.Role.PROCUREMENT_COMMITTEE]
+    administrator = users[User.Role.ADMINISTRATOR]
+    
+    catalog = [
+        Item.objects.create(name=f'مادة {i}', created_by=department_user)
+        for i in range(size['items_per_order'] * 2)
+    ]
+    
+    priced = {
+        Order.Status.PENDING_APPROVAL, Order.Status.APPROVED, Order.Status.PARTIALLY_APPROVED,
+        Order.Status.DECLINED, Order.Status.ACKNOWLEDGED,
+    }
+    decided = priced - {Order.Status.PENDING_APPROVAL}
+    samples = {}
+    for status in Order.Status.values:
+        for _ in range(size['orders_per_status']):
+            order = Order.objects.create(
+                department=department_user.department,
+                created_by=department_user,
+                status=status,
+            )
+            if status != Order.Status.DRAFT:
+                order.submitted_at = order.created_at
+                order.record_transition(Order.Status.DRAFT, department_user, order.created_at)
+            if status in priced:
+                order.priced_by = committee
+                order.priced_at = order.created_at
+            if status in decided:
+                order.decided_by = administrator
+                order.decided_at = order.created_at
+            order.save()
+            
+            for item in rng.sample(catalog, size['items_per_order']):
+                OrderItem.objects.create(
+                    order=order,
+                    item=item,
+                    item_name=item.name,
+                    quantity=rng.randint(1, 20),
+                    price=Decimal(rng.randint(1, 500) * 250) if status in priced else None,
+                    item_status=(
+                        OrderItem.ItemStatus.DECLINED if status == Order.Status.DECLINED
+                        else OrderItem.ItemStatus.APPROVED if status in decided
+                        else OrderItem.ItemStatus.PENDING
+                    ),
+                )
+            samples.setdefault(status, order)
+    SpendRollup.rebuild()
+    
+    for i in range(size['storage_items']):
+        department = departments[i % len(departments)]
+        item = StorageItem.objects.create(
+            name=f'مادة مخزنية {i}',
+            quantity=0,
+            branch=department.branch,
+            department=department,
+            created_by=users[User.Role.STORAGE_USER],
+        )
+        StockMovement.record(item, StockMovement.MovementType.RECEIPT, rng.randint(1, 100), users[User.Role.STORAGE_USER])
+    samples['storage_item'] = item
+    
+    samples['users'] = users
+    samples['catalog_item'] = catalog[0]
+    samples['order_item'] = samples[Order.Status.DRAFT].items.first()
+    return samples
+
+
+# Keyword arguments for URLs with parameters, built from the seeded samples.
+URL_KWARGS = {
+    'orders:submit': lambda s: {'order_id': s[Order.Status.DRAFT].pk},
+    'orders:detail': lambda s: {'order_id': s[Order.Status.APPROVED].pk},
+    'orders:remove_item': lambda s: {'item_id': s['order_item'].pk},
+    'orders:quick_add': lambda s: {'item_id': s['catalog_item'].pk},
+    'procurement:price_order': lambda s: {'order_id': s[Order.Status.PENDING_PRICING].pk},
+    'procurement:acknowledge': lambda s: {'order_id': s[Order.Status.APPROVED].pk},
+    'procurement:export_pdf': lambda s: {'order_id': s[Order.Status.APPROVED].pk},
+    'procurement:admin_review': lambda s: {'order_id': s[Order.Status.PENDING_APPROVAL].pk},
+    'storage:edit': lambda s: {'item_id': s['storage_item'].pk},
+    'storage:movements': lambda s: {'item_id': s['storage_item'].pk},
+    'storage:delete': lambda s: {'item_id': s['storage_item'].pk},
+    'reports:export': lambda s: {'dataset': 'orders', 'fmt': 'csv'},
+}
+
+# Query strings that exercise the searching/filtering branch of a view.
+URL_QUERIES = {
+    'orders:search_items': lambda s: 'item_name=مادة',
+    'storage:list': lambda s: 'search=مادة',
+    'storage:get_departments': lambda s: f'branch_id={s["storage_item"].branch_id}',
+}
+
+
+def build_url(name, samples):
+    kwargs = URL_KWARGS.get(name, lambda s: {})(samples)
+    url = reverse(name, kwargs=kwargs)
+    if name in URL_QUERIES:
+        url = f'{url}?{URL_QUERIES[name](samples)}'
+    return url
+
+
+def data_queries(captured):
+    """Return the SQL of captured queries without savepoint statements.
+    
+    Requests run inside an outer transaction here, so the views' own atomic
+    blocks show up as savepoints that a real request would not issue.
+    """
+    return [query['sql'] for query in captured if not _SAVEPOINT.match(query['sql'])]
+
+
+def measure(client, url):
+    """Request ``url`` in a rolled-back transaction and return status and SQL."""
+    with transaction.atomic():
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+        transaction.set_rollback(True)
+    return response.status_code, data_queries(queries.captured_queries)
+
+
+def budget_for(name):
+    return QUERY_BUDGETS.get(name, DEFAULT_BUDGET)
+
+
+def measure_scale(scale, names, roles):
+    """Seed ``scale`` and return ``{(name, role): (status, queries)}``."""
+    samples = seed(scale)
+    results = {}
+    for role in roles:
+        client = Client()
+        client.force_login(samples['users'][role])
+        for name in names:
+            results[name, role] = measure(client, build_url(name, samples))
+    return results
@@ -0,0 +1,57 @@
+"""Registry of hot querysets whose SQLite query plans must use indexes.
+
+Apps register querysets in a ``query_plans`` module::
+    
+    @hot_query('storage list by branch')
+    def storage_by_branch():
+        return StorageItem.objects.filter(branch_id=1)[:15]
+
+``manage.py check_query_plans`` generates an analyzed dataset in a
+throwaway database (see ``sandbox``), runs ``EXPLAIN QUERY PLAN`` on each
+one and fails on a full table scan or a temporary B-tree sort.
+"""
+
+import re
+
+from django.utils.module_loading import autodiscover_modules
+
+
+HOT_QUERIES = {}
+
+# "SCAN storage_storageitem" without "USING ... INDEX" reads the whole table.
+# A scan in index order is accepted: it serves ORDER BY ... LIMIT pages.
+_FULL_SCAN = re.compile(r'\bSCAN (?!.*\bUSING\b.*\bINDEX\b)(\S+)')
+_TEMP_SORT = re.compile(r'USE TEMP B-TREE')
+
+
+def hot_query(label):
+    """Register a function returning a queryset to check."""
+    def decorator(func):
+        HOT_QUERIES[label] = func
+        return func
+    return decorator
+
+
+def autodiscover():
+    autodiscover_modules('query_plans')
+
+
+def explain(queryset):
+    """Return the query plan lines of a queryset."""
+    return [line for line in queryset.explain().splitlines() if line.strip()]
+
+
+def plan_problems(plan_lines, allowed_scans=()):
+    """Return the plan lines that indicate a full scan or a temp sort.
+    
+    ``allowed_scans`` lists small tables (e.g. branches) that may be
+    scanned without counting as a problem.
+    """
+    problems = []
+    for line in plan_lines:
+        scan = _FULL_SCAN.search(line)
+        if scan and scan.group(1) not in allowed_scans:
+            problems.append(line.strip())
+        elif _TEMP_SORT.search(line):
+            problems.append(line.strip())
+    return problems
@@ -0,0 +1,135 @@
+"""Read-only views served from a SQLite read replica.
+
+With a ``replica`` database configured (``DJANGO_DB_REPLICA``), the queries
+of views decorated with ``replica_reads`` go to it; every other read and
+every write goes to ``default``::
+    
+    @login_required
+    @administrator_required
+    @replica_reads
+    def admin_history_view(request):
+        ...
+
+Only pages that tolerate slightly old data are decorated: history, exports,
+reports, storage browsing and search. The replica is a copy made by
+``manage.py refresh_replica`` and lags behind by up to one refresh, so
+reads stick to ``default``:
+
+* for the rest of a request once it has written anything, and
+* for ``REPLICA_STICKY_SECONDS`` after a request that wrote, through the
+  cookie set by ``ReplicaStickinessMiddleware``, so the page a POST
+  redirects to shows the change it just made.
+"""
+
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+REPLICA = 'replica'
+STICKY_COOKIE = 'replica_sticky'
+
+
+@dataclass
+class RoutingState:
+    """Routing decisions of the current request."""
+    
+    replica: bool = False
+    sticky: bool = False
+    wrote: bool = False
+
+
+current_state = ContextVar('replica_routing_state', default=None)
+
+
+def has_replica():
+    return REPLICA in settings.DATABASES
+
+
+class ReplicaRouter:
+    """Send the reads of ``replica_reads`` views to the replica."""
+    
+    def db_for_read(self, model, **hints):
+        state = current_state.get()
+        if state is not None and state.replica and not (state.sticky or state.wrote) and has_replica():
+            return REPLICA
+        return DEFAULT_DB_ALIAS
+    
+    def db_for_write(self, model, **hints):
+        state = current_state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+    
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as default.
+        return True
+    
+    def allow_migrate(self, db, app_label, **hints):
+        return db != REPLICA
+
+
+def _stream_on_replica(content):
+    """Iterate streamed content with replica reads, after the view returned."""
+    iterator = iter(content)
+    while True:
+        token = current_state.set(RoutingState(replica=True))
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            current_state.reset(token)
+        yield chunk
+
+
+def replica_reads(view):
+    """Run the queries of a read-only view against the replica.
+    
+    Put it below the login and role decorators, so the user is loaded from
+    ``default``.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = current_state.get()
+        token = None
+        if state is None:
+            state = RoutingState()
+            token = current_state.set(state)
+        previous, state.replica = state.replica, True
+        try:
+            response = view(request, *args, **kwargs)
+        finally:
+            state.replica = previous
+            if token is not None:
+                current_state.reset(token)
+        if getattr(response, 'streaming', False) and not (state.sticky or state.wrote):
+            response.streaming_content = _stream_on_replica(response.streaming_content)
+        return response
+    
+    return wrapper
+
+
+def refresh(source=DEFAULT_DB_ALIAS, target=REPLICA):
+    """Copy ``source`` into ``target`` with the SQLite online backup API.
+    
+    Writers to ``source`` carry on during the copy (WAL mode), and readers of
+    ``target`` see either the old or the new copy. Returns the page count.
+    """
+    source_connection, target_connection = connections[source], connections[target]
+    if source_connection.vendor != 'sqlite' or target_connection.vendor != 'sqlite':
+        raise ValueError('refresh() copies SQLite databases only.')
+    
+    pages = 0
+    
+    def progress(status, remaining, total):
+        nonlocal pages
+        pages = total
+    
+    source_connection.ensure_connection()
+    target_connection.ensure_connection()
+    source_connection.connection.backup(target_connection.connection, progress=progress)
+    return pages
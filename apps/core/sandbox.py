@@ -0,0 +1,46 @@
+"""Throwaway database and settings for measurement commands.
+
+``check_query_budgets`` and ``benchmark`` seed their own data, so they run
+against a freshly created test database with a private cache, metrics store
+and profile directory, leaving the real ones untouched.
+"""
+
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from . import metrics
+
+
+@contextmanager
+def scratch_database(on_disk=False):
+    """Run the block against a new test database with private side stores.
+    
+    SQLite test databases live in memory by default; ``on_disk=True`` puts
+    it in a temporary file instead so timings include real file I/O.
+    """
+    with tempfile.TemporaryDirectory() as scratch:
+        scratch = Path(scratch)
+        test_settings = connection.settings_dict['TEST']
+        old_test_name = test_settings.get('NAME')
+        if on_disk and connection.vendor == 'sqlite':
+            test_settings['NAME'] = str(scratch / 'db.sqlite3')
+        
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(
+                CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'scratch'}},
+                PERF_MONITORING=False,
+                METRICS_DB=scratch / 'metrics.sqlite3',
+                PROFILE_DIR=scratch / 'profiles',
+            ):
+                yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            test_settings['NAME'] = old_test_name
+            metrics.discard()
@@ -0,0 +1,347 @@
+"""Branch-partitioned databases for multi-branch deployments.
+
+With ``DJANGO_BRANCH_SHARDS`` set, the orders and storage data of each
+listed branch live in a database of their own (alias ``branch_<id>``), so a
+busy branch only slows down itself. Everything else, users, branches,
+departments and the item catalog, stays in ``default`` and is copied into
+every shard (see ``MIRRORED_MODELS``), so foreign keys and joins to it keep
+working. ``BranchShardRouter`` picks the shard:
+
+* for an object, from the object it belongs to (an order's items live with
+  the order, a new order with its department's branch);
+* for an id, from the id itself: shard ids start at ``branch id * ID_SPAN``;
+* otherwise from the branch of the current user, set per request by
+  ``BranchShardMiddleware``.
+
+Data of branches without a shard (and data written before sharding) stays
+in ``default``. Views of the committee and administrators that list every
+branch read through ``across_shards``::
+    
+    orders = across_shards(Order.objects.filter(status=...).order_by('-created_at'))
+    page_obj = Paginator(orders, 10).get_page(page_number)
+
+Without shards configured ``across_shards`` returns the queryset itself.
+``manage.py prepare_shards`` migrates the shards and copies the reference
+data into them.
+"""
+
+import copy
+import functools
+import itertools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+SHARDED_MODELS = {
+    'orders.order', 'orders.orderitem', 'orders.ordertransition',
+    'storage.storageitem', 'storage.storageitemhistory', 'storage.stockmovement', 'storage.stocksnapshot',
+    'reports.spendrollup',
+}
+# Copied from default into every shard, in foreign key order.
+MIRRORED_MODELS = ['departments.Branch', 'departments.Department', 'accounts.User', 'orders.Item']
+
+# Ids in the shard of branch N start at N * ID_SPAN.
+ID_SPAN = 10 ** 12
+
+MIRROR_BATCH_SIZE = 500
+
+current_alias = ContextVar('branch_shard_alias', default=None)
+
+
+def is_sharded(model):
+    # Models or instances (also lazy ones, such as request.user)
+    return model._meta.label_lower in SHARDED_MODELS
+
+
+def is_mirrored(model):
+    return model._meta.label in MIRRORED_MODELS
+
+
+def shard_aliases():
+    """Return every database holding branch data, ``default`` first.
+    
+    Without shards this is ``[None]``: ``using(None)`` leaves the choice to
+    the routers (e.g. the read replica).
+    """
+    if not settings.BRANCH_SHARDS:
+        return [None]
+    return [DEFAULT_DB_ALIAS, *settings.BRANCH_SHARDS.values()]
+
+
+def alias_for_branch(branch_id):
+    return settings.BRANCH_SHARDS.get(branch_id, DEFAULT_DB_ALIAS)
+
+
+def alias_for_pk(pk):
+    return settings.BRANCH_SHARDS.get(int(pk) // ID_SPAN, DEFAULT_DB_ALIAS)
+
+
+def branch_of_department(department_id):
+    from apps.departments.cache import get_tree
+    
+    for department in get_tree()['departments']:
+        if department['id'] == department_id:
+            return department['branch_id']
+    return None
+
+
+def alias_for_user(user):
+    """Return the shard of the user's department branch (or own branch)."""
+    branch_id = branch_of_department(user.department_id) if user.department_id else user.branch_id
+    return alias_for_branch(branch_id)
+
+
+def alias_for_kwargs(kwargs):
+    """Return the shard named by a sharded id in URL kwargs, or ``None``."""
+    for name, value in kwargs.items():
+        if name.endswith('_id') and isinstance(value, int) and value >= ID_SPAN:
+            return alias_for_pk(value)
+    return None
+
+
+@contextmanager
+def use(alias):
+    """Route the sharded queries of the block to ``alias``."""
+    token = current_alias.set(alias)
+    try:
+        yield
+    finally:
+        current_alias.reset(token)
+
+
+def _alias_for_new(instance):
+    for field in instance._meta.concrete_fields:
+        if field.is_relation and is_sharded(field.related_model):
+            value = getattr(instance, field.attname)
+            if value is not None:
+                return alias_for_pk(value)
+    branch_id = getattr(instance, 'branch_id', None)
+    if branch_id is None and getattr(instance, 'department_id', None):
+        branch_id = branch_of_department(instance.department_id)
+    if branch_id is not None:
+        return alias_for_branch(branch_id)
+    return current_alias.get()
+
+
+def _alias_for_central(instance):
+    label = instance._meta.label
+    if label == settings.AUTH_USER_MODEL:
+        return alias_for_user(instance)
+    if label == 'departments.Department':
+        return alias_for_branch(instance.branch_id)
+    if label == 'departments.Branch':
+        return alias_for_branch(instance.pk)
+    return current_alias.get()
+
+
+class BranchShardRouter:
+    """Route orders and storage data to the shard of their branch.
+    
+    Returns ``None`` for ``default`` so the routers after it (the read
+    replica) still apply there.
+    """
+    
+    def _alias(self, model, hints):
+        if not settings.BRANCH_SHARDS or not is_sharded(model):
+            return None
+        instance = hints.get('instance')
+        if instance is None:
+            alias = current_alias.get()
+        elif not is_sharded(instance):
+            # A related manager of a central object, e.g. user.order_set
+            alias = _alias_for_central(instance)
+        elif instance._state.db is not None:
+            alias = instance._state.db
+        else:
+            alias = _alias_for_new(instance)
+        return alias if alias in settings.BRANCH_SHARDS.values() else None
+    
+    def db_for_read(self, model, **hints):
+        return self._alias(model, hints)
+    
+    def db_for_write(self, model, **hints):
+        return self._alias(model, hints)
+    
+    def allow_relation(self, obj1, obj2, **hints):
+        # Central rows exist in every shard.
+        if settings.BRANCH_SHARDS and (is_mirrored(obj1) or is_mirrored(obj2)):
+            return True
+        return None
+
+
+def seed_ids(alias):
+    """Start the ids of a shard's tables at its ``ID_SPAN`` offset."""
+    branch_ids = [branch_id for branch_id, shard in settings.BRANCH_SHARDS.items() if shard == alias]
+    connection = connections[alias]
+    if not branch_ids or connection.vendor != 'sqlite':
+        return
+    
+    start = branch_ids[0] * ID_SPAN
+    tables = set(connection.introspection.table_names())
+    with connection.cursor() as cursor:
+        for model in apps.get_models():
+            table = model._meta.db_table
+            if not is_sharded(model) or table not in tables:
+                continue
+            cursor.execute(
+                'INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s '
+                'WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)',
+                [table, start, table],
+            )
+            cursor.execute('UPDATE sqlite_sequence SET seq = %s WHERE name = %s AND seq < %s', [start, table, start])
+
+
+def _copies(objs):
+    # bulk_create() rebinds the objects to the shard, so copy them first.
+    for obj in objs:
+        clone = copy.copy(obj)
+        clone._state = copy.copy(obj._state)
+        yield clone
+
+
+def mirror(model, objs, aliases=None):
+    """Insert or update central rows in the shards."""
+    fields = [field.name for field in model._meta.concrete_fields if not field.primary_key]
+    for alias in aliases or settings.BRANCH_SHARDS.values():
+        model._base_manager.using(alias).bulk_create(
+            list(_copies(objs)), batch_size=MIRROR_BATCH_SIZE,
+            update_conflicts=True, unique_fields=[model._meta.pk.name], update_fields=fields,
+        )
+
+
+def unmirror(model, pks, aliases=None):
+    for alias in aliases or settings.BRANCH_SHARDS.values():
+        model._base_manager.using(alias).filter(pk__in=pks).delete()
+
+
+def sync_mirrors(alias):
+    """Copy all reference data into a shard; return rows copied per model."""
+    copied = {}
+    for label in MIRRORED_MODELS:
+        model = apps.get_model(label)
+        central = model._base_manager.using(DEFAULT_DB_ALIAS).order_by('pk')
+        rows = central.iterator(chunk_size=MIRROR_BATCH_SIZE)
+        count = 0
+        while batch := list(itertools.islice(rows, MIRROR_BATCH_SIZE)):
+            mirror(model, batch, [alias])
+            count += len(batch)
+        stale = set(model._base_manager.using(alias).values_list('pk', flat=True)) - set(central.values_list('pk', flat=True))
+        if stale:
+            unmirror(model, list(stale), [alias])
+        copied[label] = count
+    return copied
+
+
+def _value(row, field):
+    if isinstance(row, dict):
+        return row[field]
+    for part in field.split('__'):
+        row = getattr(row, part) if row is not None else None
+    return row
+
+
+def _ordering(queryset):
+    ordering = queryset.query.order_by or (queryset.query.default_ordering and queryset.model._meta.ordering) or []
+    fields = []
+    for field in ordering:
+        if not isinstance(field, str):
+            raise ValueError('across_shards() orders by field names only.')
+        fields.append((field.lstrip('-'), field.startswith('-')))
+    return fields
+
+
+class CrossShardQuery:
+    """Lazy, read-only union of one queryset over every shard.
+    
+    Supports what templates and ``Paginator`` use: ``count()``, slicing,
+    iteration and ``len()``. A slice ``[low:high]`` reads the first
+    ``high`` rows of each shard and merges them in the queryset's ordering,
+    with NULLs first as in SQLite.
+    """
+    
+    ordered = True
+    
+    def __init__(self, queryset, aliases, low=0, high=None):
+        self.queryset = queryset
+        self.aliases = aliases
+        self.low = low
+        self.high = high
+        self.ordering = _ordering(queryset)
+        self._cache = None
+    
+    def count(self):
+        total = sum(self.queryset.using(alias).count() for alias in self.aliases)
+        total = max(0, total - self.low)
+        return total if self.high is None else min(total, self.high - self.low)
+    
+    def _compare(self, a, b):
+        for field, descending in self.ordering:
+            x, y = _value(a, field), _value(b, field)
+            if x == y:
+                continue
+            if x is None:
+                result = -1
+            elif y is None:
+                result = 1
+            else:
+                result = -1 if x < y else 1
+            return -result if descending else result
+        return 0
+    
+    def _results(self):
+        if self._cache is None:
+            rows = []
+            for alias in self.aliases:
+                queryset = self.queryset.using(alias)
+                rows.extend(queryset if self.high is None else queryset[:self.high])
+            rows.sort(key=functools.cmp_to_key(self._compare))
+            self._cache = rows[self.low:self.high]
+        return self._cache
+    
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self._results()[key]
+        if key.step is not None or (key.start or 0) < 0 or (key.stop is not None and key.stop < 0):
+            raise ValueError('CrossShardQuery supports non-negative slices without a step.')
+        low = self.low + (key.start or 0)
+        high = self.low + key.stop if key.stop is not None else self.high
+        if self.high is not None:
+            high = min(high, self.high)
+            low = min(low, high)
+        return CrossShardQuery(self.queryset, self.aliases, low, high)
+    
+    def __iter__(self):
+        return iter(self._results())
+    
+    def __len__(self):
+        return len(self._results())
+    
+    def __bool__(self):
+        return bool(self._results())
+
+
+def across_shards(queryset):
+    """Return ``queryset`` read from every shard (see ``CrossShardQuery``)."""
+    if not settings.BRANCH_SHARDS:
+        return queryset
+    return CrossShardQuery(queryset, shard_aliases())
+
+
+def aggregate_across(queryset, **aggregates):
+    """``queryset.aggregate()`` summed over every shard (Count and Sum only)."""
+    totals = dict.fromkeys(aggregates)
+    for alias in shard_aliases():
+        for name, value in queryset.using(alias).aggregate(**aggregates).items():
+            if value is not None:
+                totals[name] = value if totals[name] is None else totals[name] + value
+    return totals
+
+
+def iterate_across(queryset, chunk_size):
+    """Stream ``queryset`` from each shard in turn."""
+    for alias in shard_aliases():
+        yield from queryset.using(alias).iterator(chunk_size=chunk_size)
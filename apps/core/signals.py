@@ -0,0 +1,49 @@
+import re
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from . import shards
+
+
+_PRAGMA_VALUE = re.compile(r'^-?\w+$')
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Apply ``settings.SQLITE_PRAGMAS`` to every new SQLite connection.
+    
+    WAL lets readers run alongside the single writer, and busy_timeout makes
+    a writer wait for the lock instead of failing at once with "database is
+    locked". The pragmas are empty with ``DJANGO_DB_PROFILE=default``.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            if not (name.isidentifier() and _PRAGMA_VALUE.match(str(value))):
+                raise ValueError(f'Invalid SQLite pragma: {name} = {value!r}')
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(post_migrate)
+def seed_shard_ids(sender, using, **kwargs):
+    """Move the id sequences of a freshly migrated branch shard to its range."""
+    shards.seed_ids(using)
+
+
+@receiver(post_save)
+def mirror_saved(sender, instance, using, **kwargs):
+    """Copy a saved user, branch, department or catalog item into the shards."""
+    if settings.BRANCH_SHARDS and using == DEFAULT_DB_ALIAS and shards.is_mirrored(sender):
+        transaction.on_commit(lambda: shards.mirror(sender, [instance]), using=using)
+
+
+@receiver(post_delete)
+def mirror_deleted(sender, instance, using, **kwargs):
+    if settings.BRANCH_SHARDS and using == DEFAULT_DB_ALIAS and shards.is_mirrored(sender):
+        pk = instance.pk
+        transaction.on_commit(lambda: shards.unmirror(sender, [pk]), using=using)
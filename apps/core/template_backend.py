@@ -0,0 +1,34 @@
+import time
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from .perf import current_timings
+
+
+class TimedTemplate(Template):
+    """Template that adds its render time to the current request's timings."""
+    
+    def render(self, context=None, request=None):
+        timings = current_timings.get()
+        if timings is None:
+            return super().render(context, request)
+        
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.add_template_time(time.perf_counter() - start)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend that times top-level renders.
+    
+    Includes and extends are rendered inside the top-level template, so each
+    ``render()``/``render_to_string()`` call is counted once.
+    """
+    
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+    
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
@@ -0,0 +1,75 @@
+"""Fragment caching keyed by the rows a fragment shows.
+
+``{% fragment %}`` caches its content under a key built from the name and
+the *versions* of the objects it varies on: a model instance contributes
+its primary key and ``updated_at``, a list or queryset the versions of its
+rows (so adding or removing one changes the key), anything else its text::
+    
+    {% load fragments %}
+    {% for order in page_obj %}
+    {% fragment 'pending_order_card' order order.items.all %}
+        ...
+    {% endfragment %}
+    {% endfor %}
+
+Saving a row moves its ``updated_at`` and so retires every fragment built
+from it; there is nothing to invalidate. Code that writes with
+``update()``/``bulk_update()`` must set ``updated_at`` itself. Related rows
+without ``updated_at`` that the fragment shows, such as a department or user
+name, are covered by their data version (``data_versions.reference``,
+``data_versions.users``). Keep request specific output (``{% csrf_token %}``,
+the current user) outside the tag, or vary on it.
+"""
+
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model
+
+
+register = template.Library()
+
+KEY = 'fragment:{name}:{digest}'
+
+
+def _version(value):
+    if isinstance(value, Model):
+        updated_at = getattr(value, 'updated_at', None)
+        stamp = updated_at.timestamp() if updated_at else ''
+        return f'{value._meta.label_lower}.{value.pk}.{stamp}'
+    if isinstance(value, (list, tuple)) or hasattr(value, 'model'):
+        return ','.join(_version(row) for row in value)
+    return str(value)
+
+
+def fragment_key(name, vary_on):
+    digest = hashlib.md5('|'.join(_version(value) for value in vary_on).encode(), usedforsecurity=False)
+    return KEY.format(name=name, digest=digest.hexdigest())
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+    
+    def render(self, context):
+        key = fragment_key(self.name.resolve(context), [value.resolve(context) for value in self.vary_on])
+        content = cache.get(key)
+        if content is None:
+            content = self.nodelist.render(context)
+            cache.set(key, content, settings.FRAGMENT_CACHE_TIMEOUT)
+        return content
+
+
+@register.tag
+def fragment(parser, token):
+    """``{% fragment name obj... %}...{% endfragment %}``, see the module docstring."""
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f'{bits[0]!r} takes a fragment name and at least one object to vary on.')
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+    return FragmentNode(nodelist, parser.compile_filter(bits[1]), [parser.compile_filter(bit) for bit in bits[2:]])
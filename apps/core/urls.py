@@ -0,0 +1,12 @@
+from django.urls import path
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('performance/', views.performance_view, name='performance'),
+    path('metrics/', views.metrics_view, name='metrics'),
+    path('profiles/', views.profile_list_view, name='profiles'),
+    path('profiles/<str:name>/', views.profile_detail_view, name='profile_detail'),
+    path('profiles/<str:name>/download/', views.profile_download_view, name='profile_download'),
+]
@@ -0,0 +1,47 @@
+"""Data version counters for caches built from frequently changing tables.
+
+A cached value includes the versions it was built from in its key; writes
+bump the version after commit, so stale entries are simply never read again
+and expire on their own::
+    
+    key = f'dashboard:{get_version("orders")}'
+    transaction.on_commit(lambda: bump_version('orders'))
+
+Model signals bump the versions for regular saves. Code that writes with
+``update()``/``bulk_create()`` bypasses signals and calls ``bump_version``.
+The counters live in the default cache, which is shared by all workers
+(see ``CACHES``), so a bump in one process retires the entries of all.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+KEY = 'core:version:{name}'
+
+
+def get_version(name):
+    """Return the current version of ``name``, creating it if needed."""
+    key = KEY.format(name=name)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old value.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(*names):
+    """Return the versions of ``names`` joined into one cache-key fragment."""
+    return '.'.join(str(get_version(name)) for name in names)
+
+
+def bump_version(*names, using=None):
+    """Advance the versions of ``names`` once the transaction on ``using`` commits."""
+    def bump():
+        # A fresh clock value rather than incr(): the file cache increments
+        # by read and write, so concurrent bumps could share a version.
+        cache.set_many({KEY.format(name=name): time.time_ns() for name in names}, None)
+    transaction.on_commit(bump, using=using)
@@ -0,0 +1,69 @@
+import hmac
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden
+from django.shortcuts import render
+
+from . import metrics, perf, profiling
+
+
+@staff_member_required
+def performance_view(request):
+    """Summarize the slowest endpoints and the recent slow requests."""
+    return render(request, 'core/performance.html', {
+        'endpoints': perf.endpoint_summary()[:50],
+        'slow_requests': perf.recent_slow_requests(),
+        'threshold_ms': settings.PERF_SLOW_REQUEST_MS,
+        'pid': os.getpid(),
+    })
+
+
+def _metrics_allowed(request):
+    if request.user.is_staff or request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+        return True
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return bool(settings.METRICS_TOKEN) and scheme.lower() == 'bearer' and hmac.compare_digest(
+        token.strip().encode(), settings.METRICS_TOKEN.encode()
+    )
+
+
+def metrics_view(request):
+    """Prometheus text endpoint for scrapers with the token (and staff)."""
+    if not _metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@staff_member_required
+def profile_list_view(request):
+    """List the saved request profiles."""
+    return render(request, 'core/profiles.html', {
+        'reports': profiling.list_reports(),
+        'parameter': profiling.PARAMETER,
+    })
+
+
+@staff_member_required
+def profile_detail_view(request, name):
+    """Show a profile sorted by cumulative time, plus its allocation report."""
+    path = profiling.report_path(name)
+    if path is None:
+        raise Http404
+    
+    memory_path = profiling.report_path(name, '.mem.txt')
+    return render(request, 'core/profile_detail.html', {
+        'name': name,
+        'summary': profiling.summarize(path),
+        'memory': memory_path.read_text(encoding='utf-8') if memory_path else None,
+    })
+
+
+@staff_member_required
+def profile_download_view(request, name):
+    """Download the raw ``.prof`` file (for snakeviz, pstats, ...)."""
+    path = profiling.report_path(name)
+    if path is None:
+        raise Http404
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name)
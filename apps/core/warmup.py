@@ -0,0 +1,142 @@
+"""Pay the one-off costs of a fresh worker before it serves traffic.
+
+The first request of a new process otherwise compiles the templates it
+renders, builds the URL resolvers, imports ReportLab and parses the PDF
+fonts. ``warm_up()`` does all of it up front; ``config/wsgi.py`` calls it
+when the application loads (``WARMUP_ON_STARTUP``), and ``manage.py warmup``
+runs it and measures startup and first-request times with and without it.
+"""
+
+import importlib
+import json
+import logging
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+from django.urls import URLResolver, get_resolver
+
+
+logger = logging.getLogger(__name__)
+
+# Imported lazily by views; missing optional ones are skipped.
+HEAVY_MODULES = [
+    'reportlab.lib.styles',
+    'reportlab.platypus',
+    'reportlab.pdfbase.ttfonts',
+    'arabic_reshaper',
+    'bidi.algorithm',
+]
+
+
+def _template_dirs(engine):
+    dirs = []
+    for loader in engine.engine.template_loaders:
+        for inner in getattr(loader, 'loaders', [loader]):
+            dirs.extend(inner.get_dirs())
+    return dirs
+
+
+def compile_templates():
+    """Load every template into the cached loaders; return the count."""
+    count = 0
+    for engine in engines.all():
+        names = set()
+        for directory in _template_dirs(engine):
+            for root, _, files in os.walk(directory):
+                for file in files:
+                    names.add(os.path.relpath(os.path.join(root, file), directory).replace(os.sep, '/'))
+        for name in sorted(names):
+            try:
+                engine.get_template(name)
+            except (TemplateSyntaxError, UnicodeDecodeError) as e:
+                logger.warning('Template %s not compiled: %s', name, e)
+                continue
+            count += 1
+    return count
+
+
+def build_url_resolvers(resolver=None):
+    """Populate the reverse lookups of every resolver; return the pattern count."""
+    resolver = resolver or get_resolver()
+    resolver.reverse_dict  # noqa: B018 (populates the resolver)
+    count = 0
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver):
+            count += build_url_resolvers(pattern)
+        else:
+            count += 1
+    return count
+
+
+def import_modules():
+    """Import ``HEAVY_MODULES``; return those available."""
+    imported = []
+    for name in HEAVY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            continue
+        imported.append(name)
+    return imported
+
+
+def register_pdf_fonts():
+    from apps.procurement.pdf import register_fonts
+    
+    return register_fonts()
+
+
+STEPS = [
+    ('templates', compile_templates),
+    ('url resolvers', build_url_resolvers),
+    ('modules', import_modules),
+    ('pdf fonts', register_pdf_fonts),
+]
+
+
+def warm_up():
+    """Run every step; return ``{step: (result, seconds)}``."""
+    results = {}
+    for name, step in STEPS:
+        start = time.perf_counter()
+        result = step()
+        results[name] = (result, time.perf_counter() - start)
+    total = sum(seconds for _, seconds in results.values())
+    logger.info('Warmed up in %.0f ms', total * 1000)
+    return results
+
+
+def probe(path, username=None):
+    """Time a fresh process: loading ``config.wsgi``, then two requests of ``path`` (a URL or URL name).
+    
+    Run in a subprocess by ``manage.py warmup --measure``; prints JSON.
+    """
+    start = time.perf_counter()
+    import config.wsgi  # noqa: F401 (warms up unless DJANGO_WARMUP=False)
+    startup = time.perf_counter() - start
+    
+    from django.contrib.auth import get_user_model
+    from django.shortcuts import resolve_url
+    from django.test import Client
+    
+    client = Client(HTTP_HOST='localhost')
+    if username:
+        client.force_login(get_user_model().objects.get(username=username))
+    
+    url = resolve_url(path)
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        response = client.get(url)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        timings.append(time.perf_counter() - start)
+    
+    print(json.dumps({
+        'status': response.status_code,
+        'startup_ms': round(startup * 1000, 1),
+        'first_request_ms': round(timings[0] * 1000, 1),
+        'second_request_ms': round(timings[1] * 1000, 1),
+    }))
@@ -0,0 +1,97 @@
+"""Short write transactions that wait for the SQLite write lock.
+
+SQLite allows one writer at a time. ``write_unit`` runs a function in
+``transaction.atomic``; when the database is still locked after
+busy_timeout, the transaction is rolled back and the function runs again
+after a jittered exponential backoff, until
+``WRITE_UNIT_DEADLINE_SECONDS`` have passed::
+    
+    @login_required
+    @procurement_committee_required
+    @write_unit(methods=['POST'])
+    def price_order_view(request, order_id):
+        ...
+
+``methods`` limits the unit to those request methods of a view, so GET
+pages are rendered outside the write transaction. Without ``using`` the
+unit runs on the branch shard of the request (see ``shards``), or
+``default``. Only the outermost unit
+retries: a unit called inside another transaction just joins it, since a
+savepoint cannot be retried on its own.
+
+A unit may run several times, so everything it reads and checks must be
+read inside it, and its effects outside the database (messages, metrics,
+cache bumps) must not happen on an attempt that is rolled back. Either
+keep them after the unit returns, or queue them with ``after_commit``,
+which runs them once the unit has committed::
+    
+    after_commit(messages.success, request, 'تم حفظ الأسعار.')
+"""
+
+import random
+import time
+from functools import partial, wraps
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+from .metrics import WRITE_FAILURES, WRITE_RETRIES, WRITE_WAIT
+from .shards import current_alias
+
+
+BACKOFF_BASE = 0.02
+BACKOFF_MAX = 1.0
+
+
+def is_lock_error(error):
+    return isinstance(error, OperationalError) and 'locked' in str(error)
+
+
+def after_commit(func, *args, **kwargs):
+    """Call ``func(*args, **kwargs)`` once the current write unit commits.
+    
+    Dropped if the attempt rolls back; called at once outside a transaction.
+    """
+    transaction.on_commit(partial(func, *args, **kwargs), using=current_alias.get())
+
+
+def write_unit(func=None, *, methods=None, using=None):
+    """Run ``func`` in a retried ``transaction.atomic`` (see module docstring)."""
+    if func is None:
+        return partial(write_unit, methods=methods, using=using)
+    
+    unit = f'{func.__module__.removeprefix("apps.")}.{func.__qualname__}'
+    
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if methods is not None and args and getattr(args[0], 'method', None) not in methods:
+            return func(*args, **kwargs)
+        alias = using or current_alias.get()
+        if transaction.get_connection(alias).in_atomic_block:
+            with transaction.atomic(using=alias):
+                return func(*args, **kwargs)
+        
+        start = time.monotonic()
+        deadline = start + settings.WRITE_UNIT_DEADLINE_SECONDS
+        attempt = 0
+        while True:
+            attempt_start = time.monotonic()
+            try:
+                with transaction.atomic(using=alias):
+                    result = func(*args, **kwargs)
+            except OperationalError as e:
+                if not is_lock_error(e):
+                    raise
+                attempt += 1
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+                if time.monotonic() + delay > deadline:
+                    WRITE_FAILURES.inc(unit=unit)
+                    WRITE_WAIT.observe(time.monotonic() - start, unit=unit)
+                    raise
+                WRITE_RETRIES.inc(unit=unit)
+                time.sleep(delay)
+            else:
+                WRITE_WAIT.observe(attempt_start - start, unit=unit)
+                return result
+    
+    return wrapper
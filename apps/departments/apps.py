@@ -5,5 +5,6 @@ class DepartmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.departments'
     verbose_name = 'الشعب'
-
-
+    
+    def ready(self):
+        from . import signals  # noqa: F401
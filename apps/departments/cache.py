@@ -0,0 +1,149 @@
+"""Branch/department reference data cache.
+
+The whole branch -> departments tree is small, so it is built once and kept
+in two layers: a per-process copy, and the Django cache shared by all
+workers (``CACHES``). A version number stored in the shared cache ties them
+together. Saving or deleting a branch or department replaces the version,
+which makes every process rebuild or refetch its copy on the next read.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import Branch, Department
+
+
+VERSION_KEY = 'departments:version'
+TREE_KEY = 'departments:tree:{version}'
+
+# (version, tree) of this process, replaced as a whole so threads never
+# see a tree paired with the wrong version.
+_process = (None, None)
+
+# Version and tree read during the current request (see ``pinned``), so code
+# reading them many times, e.g. ``str()`` of every department on a page,
+# reads the shared version once.
+_pinned = ContextVar('reference_data_pinned', default=None)
+
+
+@contextmanager
+def pinned():
+    """Read the version at most once within the block."""
+    token = _pinned.set({})
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+def get_version():
+    """Return the current reference-data version, creating it if needed."""
+    pins = _pinned.get()
+    if pins is not None and 'version' in pins:
+        return pins['version']
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted version never matches a stale
+        # per-process copy.
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    if pins is not None:
+        pins['version'] = version
+    return version
+
+
+def _build_tree():
+    # Shared by every worker until the next change, so never built from a
+    # lagging read replica.
+    branches = list(Branch.objects.using(DEFAULT_DB_ALIAS).values('id', 'name'))
+    departments = list(Department.objects.using(DEFAULT_DB_ALIAS).values('id', 'name', 'branch_id'))
+    
+    branch_names = {b['id']: b['name'] for b in branches}
+    labels = {}
+    for department in departments:
+        branch_name = branch_names.get(department['branch_id'])
+        labels[department['id']] = (
+            f"{department['name']} - {branch_name}" if branch_name else department['name']
+        )
+    
+    return {
+        'branches': branches,
+        'departments': departments,
+        'branch_names': branch_names,
+        'department_labels': labels,
+    }
+
+
+def get_tree():
+    """Return the cached reference-data tree.
+    
+    Keys: ``branches`` and ``departments`` (lists of dicts in model ordering),
+    ``branch_names`` (id -> name) and ``department_labels`` (id -> the same
+    text as ``str(department)``).
+    """
+    global _process
+    
+    version = get_version()
+    local_version, tree = _process
+    if local_version == version:
+        return tree
+    
+    key = TREE_KEY.format(version=version)
+    tree = cache.get(key)
+    if tree is None:
+        tree = _build_tree()
+        cache.set(key, tree, None)
+    
+    _process = (version, tree)
+    return tree
+
+
+def get_etag():
+    """ETag for responses built only from reference data."""
+    return f'"departments-{get_version()}"'
+
+
+def get_branch_options():
+    """Return cached ``{'id', 'name'}`` dicts for all branches."""
+    return get_tree()['branches']
+
+
+def get_department_options(branch_id=None):
+    """Return cached department dicts, optionally limited to a branch.
+    
+    Departments without a branch are always included, matching the
+    filtering used by the storage views.
+    """
+    options = get_tree()['departments']
+    
+    if branch_id:
+        branch_id = str(branch_id)
+        return [d for d in options if d['branch_id'] is None or str(d['branch_id']) == branch_id]
+    return options
+
+
+def get_branch_name(branch_id):
+    """Return the cached name of a branch, or ``None``."""
+    return get_tree()['branch_names'].get(branch_id)
+
+
+def get_department_label(department_id):
+    """Return ``str(department)`` for a department id without a query."""
+    return get_tree()['department_labels'].get(department_id)
+
+
+def clear_options(**kwargs):
+    """Invalidate the reference data (connected to Branch/Department signals)."""
+    global _process
+    
+    _process = (None, None)
+    pins = _pinned.get()
+    if pins is not None:
+        pins.clear()
+    # A fresh clock value rather than incr(): the file cache increments by
+    # read and write, so two processes could end up on the same version.
+    cache.set(VERSION_KEY, time.time_ns(), None)
@@ -50,6 +50,14 @@ class Department(models.Model):
         unique_together = ['name', 'branch']
     
     def __str__(self):
-        if self.branch:
+        if self.branch_id is None:
+            return self.name
+        if Department.branch.is_cached(self):
             return f'{self.name} - {self.branch.name}'
-        return self.name
+        # Avoid a lazy branch query per department; the name comes from
+        # the reference-data cache.
+        from .cache import get_branch_name
+        branch_name = get_branch_name(self.branch_id)
+        if branch_name is None:
+            branch_name = self.branch.name
+        return f'{self.name} - {branch_name}'
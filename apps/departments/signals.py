@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import clear_options
+from .models import Branch, Department
+
+
+@receiver([post_save, post_delete], sender=Branch)
+@receiver([post_save, post_delete], sender=Department)
+def reference_data_changed(sender, **kwargs):
+    """Invalidate cached reference data once the change is committed."""
+    transaction.on_commit(clear_options)
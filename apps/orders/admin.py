@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Item, Order, OrderItem
+from .models import Item, Order, OrderItem, OrderTransition
 
 
 class OrderItemInline(admin.TabularInline):
@@ -8,6 +8,16 @@ class OrderItemInline(admin.TabularInline):
     readonly_fields = ('item_name', 'item_description', 'quantity', 'price', 'item_status', 'approved_quantity')
 
 
+class OrderTransitionInline(admin.TabularInline):
+    model = OrderTransition
+    extra = 0
+    readonly_fields = ('from_status', 'to_status', 'changed_by', 'changed_at')
+    can_delete = False
+    
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Item)
 class ItemAdmin(admin.ModelAdmin):
     list_display = ('name', 'created_by', 'created_at')
@@ -22,7 +32,7 @@ class OrderAdmin(admin.ModelAdmin):
     list_filter = ('status', 'department', 'created_at')
     search_fields = ('department__name', 'created_by__username')
     ordering = ('-created_at',)
-    inlines = [OrderItemInline]
+    inlines = [OrderItemInline, OrderTransitionInline]
 
 
 @admin.register(OrderItem)
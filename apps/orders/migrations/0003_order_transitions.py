@@ -0,0 +1,100 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_transitions(apps, schema_editor):
+    """Record the pricing and decision steps already stored on orders."""
+    Order = apps.get_model('orders', 'Order')
+    OrderTransition = apps.get_model('orders', 'OrderTransition')
+    
+    transitions = []
+    orders = Order.objects.exclude(priced_at__isnull=True).annotate(
+        item_count=Count('items'),
+        declined_count=Count('items', filter=Q(items__item_status='declined')),
+        approved_count=Count('items', filter=Q(items__item_status='approved')),
+    ).values_list(
+        'id', 'status', 'priced_by_id', 'priced_at', 'decided_by_id', 'decided_at',
+        'item_count', 'declined_count', 'approved_count',
+    )
+    for (order_id, status, priced_by_id, priced_at, decided_by_id, decided_at,
+         item_count, declined_count, approved_count) in orders.iterator():
+        transitions.append(OrderTransition(
+            order_id=order_id,
+            from_status='pending_pricing',
+            to_status='pending_approval',
+            changed_by_id=priced_by_id,
+            changed_at=priced_at,
+        ))
+        if decided_at:
+            if status == 'acknowledged':
+                if item_count and declined_count == item_count:
+                    status = 'declined'
+                elif item_count and approved_count == item_count:
+                    status = 'approved'
+                else:
+                    status = 'partially_approved'
+            transitions.append(OrderTransition(
+                order_id=order_id,
+                from_status='pending_approval',
+                to_status=status,
+                changed_by_id=decided_by_id,
+                changed_at=decided_at,
+            ))
+    OrderTransition.objects.bulk_create(transitions, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0002_alter_order_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='acknowledged_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='تاريخ الإطلاع'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='submitted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='تاريخ التقديم'),
+        ),
+        # The verbose names of priced_at/priced_by were changed in models.py
+        # without a migration; recorded here so makemigrations --check passes.
+        # Labels only, no schema change.
+        migrations.AlterField(
+            model_name='order',
+            name='priced_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='تاريخ التحويل'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='priced_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='priced_orders', to=settings.AUTH_USER_MODEL, verbose_name='تم التحويل بواسطة'),
+        ),
+        migrations.CreateModel(
+            name='OrderTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('draft', 'مسودة'), ('pending_pricing', 'بانتظار الموافقة'), ('pending_approval', 'بانتظار الموافقة'), ('approved', 'موافق عليه'), ('partially_approved', 'موافق عليه جزئياً'), ('declined', 'مرفوض'), ('acknowledged', 'تم الإطلاع')], max_length=20, verbose_name='الحالة السابقة')),
+                ('to_status', models.CharField(choices=[('draft', 'مسودة'), ('pending_pricing', 'بانتظار الموافقة'), ('pending_approval', 'بانتظار الموافقة'), ('approved', 'موافق عليه'), ('partially_approved', 'موافق عليه جزئياً'), ('declined', 'مرفوض'), ('acknowledged', 'تم الإطلاع')], max_length=20, verbose_name='الحالة الجديدة')),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='تاريخ التغيير')),
+                ('changed_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_transitions', to=settings.AUTH_USER_MODEL, verbose_name='تم بواسطة')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transitions', to='orders.order', verbose_name='الطلب')),
+            ],
+            options={
+                'verbose_name': 'تغيير حالة',
+                'verbose_name_plural': 'سجل حالات الطلبات',
+                'ordering': ['changed_at'],
+                'indexes': [models.Index(fields=['order', 'changed_at'], name='orders_transition_order_idx'), models.Index(fields=['changed_at'], name='orders_transition_changed_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_transitions, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
+
+from apps.core.metrics import TRANSITIONS
 
 
 class Item(models.Model):
@@ -79,6 +82,11 @@ class Order(models.Model):
         auto_now=True,
         verbose_name='تاريخ التحديث'
     )
+    submitted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='تاريخ التقديم'
+    )
     priced_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -105,6 +113,11 @@ class Order(models.Model):
         blank=True,
         verbose_name='تاريخ القرار'
     )
+    acknowledged_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='تاريخ الإطلاع'
+    )
     admin_notes = models.TextField(
         blank=True,
         verbose_name='ملاحظات المدير'
@@ -114,6 +127,16 @@ class Order(models.Model):
         verbose_name = 'طلب'
         verbose_name_plural = 'الطلبات'
         ordering = ['-created_at']
+        indexes = [
+            # Workflow queues: pending pricing by -created_at, pending approval by -priced_at
+            models.Index(fields=['status', '-created_at'], name='orders_status_created_idx'),
+            models.Index(fields=['status', '-priced_at'], name='orders_status_priced_idx'),
+            # decisions_view and admin_history_view: decided orders, newest decision first
+            models.Index(fields=['-decided_at'], name='orders_decided_idx'),
+            # The user's draft, dashboard counts and my_orders_view
+            models.Index(fields=['created_by', 'status', '-created_at'], name='orders_creator_status_idx'),
+            models.Index(fields=['created_by', '-created_at'], name='orders_creator_created_idx'),
+        ]
     
     def __str__(self):
         return f'طلب #{self.id} - {self.department.name}'
@@ -152,6 +175,64 @@ class Order(models.Model):
             'acknowledged': 'bg-purple-100 text-purple-800',
         }
         return colors.get(self.status, 'bg-slate-100 text-slate-800')
+    
+    def record_transition(self, from_status, user, changed_at=None):
+        """Log the move from ``from_status`` to the order's current status."""
+        # Counted on commit, so a rolled-back or retried write unit is not
+        # counted twice
+        to_status = self.status
+        transaction.on_commit(lambda: TRANSITIONS.inc(from_status=from_status, to_status=to_status))
+        return OrderTransition.objects.create(
+            order=self,
+            from_status=from_status,
+            to_status=self.status,
+            changed_by=user,
+            changed_at=changed_at or timezone.now()
+        )
+
+
+class OrderTransition(models.Model):
+    """Timestamped status change of an order, used for cycle-time reports."""
+    
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name='transitions',
+        verbose_name='الطلب'
+    )
+    from_status = models.CharField(
+        max_length=20,
+        choices=Order.Status.choices,
+        verbose_name='الحالة السابقة'
+    )
+    to_status = models.CharField(
+        max_length=20,
+        choices=Order.Status.choices,
+        verbose_name='الحالة الجديدة'
+    )
+    changed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='order_transitions',
+        verbose_name='تم بواسطة'
+    )
+    changed_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='تاريخ التغيير'
+    )
+    
+    class Meta:
+        verbose_name = 'تغيير حالة'
+        verbose_name_plural = 'سجل حالات الطلبات'
+        ordering = ['changed_at']
+        indexes = [
+            models.Index(fields=['order', 'changed_at'], name='orders_transition_order_idx'),
+            models.Index(fields=['changed_at'], name='orders_transition_changed_idx'),
+        ]
+    
+    def __str__(self):
+        return f'#{self.order_id}: {self.get_from_status_display()} ← {self.get_to_status_display()}'
 
 
 class OrderItem(models.Model):
@@ -217,10 +298,21 @@ class OrderItem(models.Model):
         blank=True,
         verbose_name='ملاحظة المدير'
     )
+    # Versions cached fragments of the item; set it in update()/bulk_update()
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='تاريخ التحديث'
+    )
     
     class Meta:
         verbose_name = 'مادة في الطلب'
         verbose_name_plural = 'مواد الطلب'
+        indexes = [
+            # Item decisions of an order (approved/declined items, totals)
+            models.Index(fields=['order', 'item_status'], name='orders_item_status_idx'),
+            # Unpriced items of an order when forwarding it
+            models.Index(fields=['order'], condition=models.Q(price__isnull=True), name='orders_item_unpriced_idx'),
+        ]
     
     def __str__(self):
         return f'{self.item_name} x {self.quantity}'
@@ -0,0 +1,47 @@
+from apps.core.query_plans import hot_query
+from .models import Order, OrderItem
+
+
+DECIDED_STATUSES = [
+    Order.Status.APPROVED, Order.Status.PARTIALLY_APPROVED, Order.Status.DECLINED, Order.Status.ACKNOWLEDGED,
+]
+
+
+@hot_query('orders pending pricing')
+def pending_pricing():
+    return Order.objects.filter(status=Order.Status.PENDING_PRICING).order_by('-created_at')[:10]
+
+
+@hot_query('orders pending approval')
+def pending_approval():
+    return Order.objects.filter(status=Order.Status.PENDING_APPROVAL).order_by('-priced_at')[:10]
+
+
+@hot_query('orders decisions')
+def decisions():
+    return Order.objects.filter(status__in=DECIDED_STATUSES, decided_at__isnull=False).order_by('-decided_at')[:10]
+
+
+@hot_query('orders admin history')
+def admin_history():
+    return Order.objects.filter(decided_by__isnull=False).order_by('-decided_at')[:10]
+
+
+@hot_query('orders draft of user')
+def draft_of_user():
+    return Order.objects.filter(created_by_id=1, status=Order.Status.DRAFT).order_by('-created_at')[:1]
+
+
+@hot_query('orders of user')
+def orders_of_user():
+    return Order.objects.filter(created_by_id=1).exclude(status=Order.Status.DRAFT).order_by('-created_at')[:10]
+
+
+@hot_query('order items by decision')
+def order_items_by_decision():
+    return OrderItem.objects.filter(order_id=1, item_status=OrderItem.ItemStatus.DECLINED)
+
+
+@hot_query('order items without price')
+def order_items_without_price():
+    return OrderItem.objects.filter(order_id=1, price__isnull=True).values('pk')
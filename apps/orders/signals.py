@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.core.versions import bump_version
+from .models import Order, OrderItem
+
+
+@receiver([post_save, post_delete], sender=Order)
+@receiver([post_save, post_delete], sender=OrderItem)
+def order_data_changed(sender, using, **kwargs):
+    """Invalidate caches built from orders (dashboard fragments)."""
+    bump_version('orders', using=using)
@@ -4,31 +4,49 @@ from django.contrib import messages
 from django.http import HttpResponse
 from django.db.models import Q
 from django.core.paginator import Paginator
+from django.utils import timezone
 
 from apps.accounts.decorators import department_user_required
+from apps.core.metrics import SEARCHES
+from apps.core.replica import replica_reads
+from apps.core.shards import across_shards
+from apps.core.writes import after_commit, write_unit
 from apps.storage.models import StorageItem
 from .models import Item, Order, OrderItem
 from .forms import OrderItemForm
 
 
+def get_draft_order(user):
+    """Return the user's draft order, creating it when there is none.
+    
+    Returns None for users without a department.
+    """
+    draft_order = Order.objects.filter(created_by=user, status=Order.Status.DRAFT).first()
+    if draft_order or not user.department:
+        return draft_order
+    return _create_draft_order(user)
+
+
+@write_unit
+def _create_draft_order(user):
+    # Look again under the write lock so two requests don't create two drafts
+    return Order.objects.filter(created_by=user, status=Order.Status.DRAFT).first() or Order.objects.create(
+        department=user.department,
+        created_by=user,
+        status=Order.Status.DRAFT
+    )
+
+
 @login_required
 @department_user_required
+@write_unit(methods=['POST'])
 def create_order_view(request):
     """Create a new order with items."""
     # Get or create draft order for this user
-    draft_order = Order.objects.filter(
-        created_by=request.user,
-        status=Order.Status.DRAFT
-    ).first()
-    
-    if not draft_order and request.user.department:
-        draft_order = Order.objects.create(
-            department=request.user.department,
-            created_by=request.user,
-            status=Order.Status.DRAFT
-        )
-    elif not request.user.department:
-        messages.error(request, 'يجب أن تكون منتسباً لشعبة لإنشاء طلب.')
+    draft_order = get_draft_order(request.user)
+    
+    if not draft_order:
+        after_commit(messages.error, request, 'يجب أن تكون منتسباً لشعبة لإنشاء طلب.')
         return redirect('accounts:dashboard')
     
     if request.method == 'POST':
@@ -60,7 +78,7 @@ def create_order_view(request):
                     created_by=request.user
                 )
             
-            messages.success(request, 'تمت إضافة المادة بنجاح.')
+            after_commit(messages.success, request, 'تمت إضافة المادة بنجاح.')
             
             # Check if HTMX request
             if request.htmx:
@@ -87,28 +105,32 @@ def create_order_view(request):
 
 @login_required
 @department_user_required
+@write_unit
 def submit_order_view(request, order_id):
     """Submit a draft order for pricing."""
     order = get_object_or_404(Order, id=order_id, created_by=request.user, status=Order.Status.DRAFT)
     
     if order.items.count() == 0:
-        messages.error(request, 'لا يمكن تقديم طلب فارغ.')
+        after_commit(messages.error, request, 'لا يمكن تقديم طلب فارغ.')
         return redirect('orders:create')
     
     order.status = Order.Status.PENDING_PRICING
+    order.submitted_at = timezone.now()
     order.save()
+    order.record_transition(Order.Status.DRAFT, request.user, order.submitted_at)
     
-    messages.success(request, 'تم تقديم الطلب بنجاح.')
+    after_commit(messages.success, request, 'تم تقديم الطلب بنجاح.')
     return redirect('orders:my_orders')
 
 
 @login_required
 @department_user_required
+@replica_reads
 def my_orders_view(request):
     """View user's orders."""
     orders = Order.objects.filter(
         created_by=request.user
-    ).exclude(status=Order.Status.DRAFT).select_related('department').order_by('-created_at')
+    ).exclude(status=Order.Status.DRAFT).select_related('department').prefetch_related('items').order_by('-created_at')
     
     # Pagination
     paginator = Paginator(orders, 10)
@@ -143,6 +165,7 @@ def order_detail_view(request, order_id):
 
 @login_required
 @department_user_required
+@write_unit
 def remove_order_item_view(request, item_id):
     """Remove an item from a draft order."""
     order_item = get_object_or_404(
@@ -155,7 +178,7 @@ def remove_order_item_view(request, item_id):
     order = order_item.order
     order_item.delete()
     
-    messages.success(request, 'تم حذف المادة.')
+    after_commit(messages.success, request, 'تم حذف المادة.')
     
     if request.htmx:
         return render(request, 'orders/partials/order_items_list.html', {
@@ -167,6 +190,7 @@ def remove_order_item_view(request, item_id):
 
 @login_required
 @department_user_required
+@replica_reads
 def search_items_view(request):
     """HTMX endpoint for searching past items and storage items."""
     query = request.GET.get('item_name', '').strip()
@@ -174,6 +198,8 @@ def search_items_view(request):
     if len(query) < 2:
         return HttpResponse('')
     
+    SEARCHES.inc(source='item_suggestions')
+    
     # Search past items (user's own past items and items they've ordered before)
     past_items = Item.objects.filter(
         Q(name__icontains=query) &
@@ -181,10 +207,10 @@ def search_items_view(request):
     ).distinct()[:10]
     
     # Search ALL storage items with available quantity
-    storage_items = StorageItem.objects.filter(
+    storage_items = across_shards(StorageItem.objects.filter(
         Q(name__icontains=query) &
         Q(quantity__gt=0)  # Only show items with available quantity
-    ).select_related('department', 'branch').order_by('-quantity')[:15]
+    ).select_related('department', 'branch').order_by('-quantity'))[:15]
     
     return render(request, 'orders/partials/item_suggestions.html', {
         'items': past_items,
@@ -194,25 +220,16 @@ def search_items_view(request):
 
 @login_required
 @department_user_required
+@write_unit
 def quick_add_item_view(request, item_id):
     """Quickly add a past item to the current order."""
     item = get_object_or_404(Item, id=item_id)
     
     # Get or create draft order
-    draft_order = Order.objects.filter(
-        created_by=request.user,
-        status=Order.Status.DRAFT
-    ).first()
-    
-    if not draft_order and request.user.department:
-        draft_order = Order.objects.create(
-            department=request.user.department,
-            created_by=request.user,
-            status=Order.Status.DRAFT
-        )
+    draft_order = get_draft_order(request.user)
     
     if not draft_order:
-        messages.error(request, 'يجب أن تكون منتسباً لشعبة لإنشاء طلب.')
+        after_commit(messages.error, request, 'يجب أن تكون منتسباً لشعبة لإنشاء طلب.')
         return redirect('accounts:dashboard')
     
     # Add item to order
@@ -225,7 +242,7 @@ def quick_add_item_view(request, item_id):
         quantity=1
     )
     
-    messages.success(request, f'تمت إضافة "{item.name}" للطلب.')
+    after_commit(messages.success, request, f'تمت إضافة "{item.name}" للطلب.')
     
     if request.htmx:
         return render(request, 'orders/partials/order_items_list.html', {
@@ -0,0 +1,41 @@
+"""Fonts of the PDF receipts (``export_order_pdf``).
+
+Registering a TrueType font parses the whole file, so it is done once per
+process: by ``apps.core.warmup`` at startup, or by the first export.
+"""
+
+import functools
+import os
+
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+
+ARABIC_FONT_NAME = 'Arabic'
+FALLBACK_FONT_NAME = 'Helvetica'
+
+# Arabic-compatible fonts, in order of preference
+FONT_PATHS = [
+    # Windows fonts
+    'C:/Windows/Fonts/arial.ttf',
+    'C:/Windows/Fonts/tahoma.ttf',
+    'C:/Windows/Fonts/segoeui.ttf',
+    # Common Arabic fonts on Windows
+    'C:/Windows/Fonts/arabtype.ttf',
+    'C:/Windows/Fonts/tradbdo.ttf',
+    'C:/Windows/Fonts/simpbdo.ttf',
+]
+
+
+@functools.cache
+def register_fonts():
+    """Register the first Arabic font found; return the font name to use."""
+    for font_path in FONT_PATHS:
+        if os.path.exists(font_path):
+            try:
+                pdfmetrics.registerFont(TTFont(ARABIC_FONT_NAME, font_path))
+                return ARABIC_FONT_NAME
+            except Exception:
+                continue
+    # Fallback to default if no Arabic font found
+    return FALLBACK_FONT_NAME
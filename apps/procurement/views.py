@@ -6,7 +6,12 @@ from django.utils import timezone
 from django.http import HttpResponse
 
 from apps.accounts.decorators import procurement_committee_required, administrator_required
+from apps.core.metrics import PDF_RENDERS
+from apps.core.replica import replica_reads
+from apps.core.shards import across_shards
+from apps.core.writes import after_commit, write_unit
 from apps.orders.models import Order, OrderItem
+from apps.reports.models import SpendRollup
 from .forms import PriceItemForm, AdminDecisionForm, BulkDecisionForm
 
 
@@ -18,9 +23,9 @@ def pending_orders_view(request):
     """View orders pending pricing."""
     orders = Order.objects.filter(
         status=Order.Status.PENDING_PRICING
-    ).select_related('department', 'created_by').order_by('-created_at')
+    ).select_related('department', 'created_by').prefetch_related('items').order_by('-created_at')
     
-    paginator = Paginator(orders, 10)
+    paginator = Paginator(across_shards(orders), 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
@@ -31,6 +36,7 @@ def pending_orders_view(request):
 
 @login_required
 @procurement_committee_required
+@write_unit(methods=['POST'])
 def price_order_view(request, order_id):
     """Price items in an order."""
     order = get_object_or_404(
@@ -42,6 +48,7 @@ def price_order_view(request, order_id):
     if request.method == 'POST':
         # Process price form for each item
         all_priced = True
+        priced_items = []
         for item in order.items.all():
             price_field = f'price_{item.id}'
             if price_field in request.POST:
@@ -49,7 +56,8 @@ def price_order_view(request, order_id):
                     price = int(request.POST[price_field])
                     if price >= 0:
                         item.price = price
-                        item.save()
+                        item.updated_at = timezone.now()
+                        priced_items.append(item)
                     else:
                         all_priced = False
                 except (ValueError, TypeError):
@@ -57,11 +65,12 @@ def price_order_view(request, order_id):
             else:
                 if not item.price:
                     all_priced = False
+        OrderItem.objects.bulk_update(priced_items, ['price', 'updated_at'])
         
         action = request.POST.get('action')
         
         if action == 'save':
-            messages.success(request, 'تم حفظ الأسعار.')
+            after_commit(messages.success, request, 'تم حفظ الأسعار.')
             return redirect('procurement:price_order', order_id=order.id)
         
         elif action == 'forward':
@@ -69,15 +78,16 @@ def price_order_view(request, order_id):
             if not all_priced:
                 unpriced = order.items.filter(price__isnull=True).count()
                 if unpriced > 0:
-                    messages.error(request, f'يجب تسعير جميع المواد قبل الإرسال. ({unpriced} مواد بدون سعر)')
+                    after_commit(messages.error, request, f'يجب تسعير جميع المواد قبل الإرسال. ({unpriced} مواد بدون سعر)')
                     return redirect('procurement:price_order', order_id=order.id)
             
             order.status = Order.Status.PENDING_APPROVAL
             order.priced_by = request.user
             order.priced_at = timezone.now()
             order.save()
+            order.record_transition(Order.Status.PENDING_PRICING, request.user, order.priced_at)
             
-            messages.success(request, 'تم إرسال الطلب للمدير للموافقة.')
+            after_commit(messages.success, request, 'تم إرسال الطلب للمدير للموافقة.')
             return redirect('procurement:pending_orders')
     
     return render(request, 'procurement/price_order.html', {
@@ -89,11 +99,14 @@ def price_order_view(request, order_id):
 @procurement_committee_required
 def decisions_view(request):
     """View orders with admin decisions."""
+    # decided_at is set with every decision; filtering on it lets SQLite walk
+    # orders_decided_idx instead of sorting all decided orders.
     orders = Order.objects.filter(
-        status__in=[Order.Status.APPROVED, Order.Status.PARTIALLY_APPROVED, Order.Status.DECLINED, Order.Status.ACKNOWLEDGED]
+        status__in=[Order.Status.APPROVED, Order.Status.PARTIALLY_APPROVED, Order.Status.DECLINED, Order.Status.ACKNOWLEDGED],
+        decided_at__isnull=False,
     ).select_related('department', 'created_by', 'decided_by').order_by('-decided_at')
     
-    paginator = Paginator(orders, 10)
+    paginator = Paginator(across_shards(orders), 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
@@ -104,6 +117,7 @@ def decisions_view(request):
 
 @login_required
 @procurement_committee_required
+@write_unit
 def acknowledge_order_view(request, order_id):
     """Acknowledge admin decision on an order."""
     order = get_object_or_404(
@@ -112,15 +126,19 @@ def acknowledge_order_view(request, order_id):
         status__in=[Order.Status.APPROVED, Order.Status.PARTIALLY_APPROVED, Order.Status.DECLINED]
     )
     
+    decision_status = order.status
     order.status = Order.Status.ACKNOWLEDGED
+    order.acknowledged_at = timezone.now()
     order.save()
+    order.record_transition(decision_status, request.user, order.acknowledged_at)
     
-    messages.success(request, 'تم الإطلاع على قرار المدير.')
+    after_commit(messages.success, request, 'تم الإطلاع على قرار المدير.')
     return redirect('procurement:decisions')
 
 
 @login_required
 @procurement_committee_required
+@replica_reads
 def export_order_pdf(request, order_id):
     """Export approved order as PDF receipt."""
     order = get_object_or_404(
@@ -135,10 +153,9 @@ def export_order_pdf(request, order_id):
     from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     from reportlab.lib.units import cm
     from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
     from io import BytesIO
-    import os
+    
+    from .pdf import register_fonts
     
     try:
         import arabic_reshaper
@@ -147,34 +164,8 @@ def export_order_pdf(request, order_id):
     except ImportError:
         has_arabic = False
     
-    # Register Arabic font
-    arabic_font_name = 'Arabic'
-    font_registered = False
-    
-    # Try to find and register an Arabic-compatible font
-    font_paths = [
-        # Windows fonts
-        'C:/Windows/Fonts/arial.ttf',
-        'C:/Windows/Fonts/tahoma.ttf',
-        'C:/Windows/Fonts/segoeui.ttf',
-        # Common Arabic fonts on Windows
-        'C:/Windows/Fonts/arabtype.ttf',
-        'C:/Windows/Fonts/tradbdo.ttf',
-        'C:/Windows/Fonts/simpbdo.ttf',
-    ]
-    
-    for font_path in font_paths:
-        if os.path.exists(font_path):
-            try:
-                pdfmetrics.registerFont(TTFont(arabic_font_name, font_path))
-                font_registered = True
-                break
-            except Exception:
-                continue
-    
-    # Fallback to default if no Arabic font found
-    if not font_registered:
-        arabic_font_name = 'Helvetica'
+    # Register Arabic font (once per process)
+    arabic_font_name = register_fonts()
     
     def reshape_arabic(text):
         """Reshape Arabic text for proper RTL display."""
@@ -355,6 +346,7 @@ def export_order_pdf(request, order_id):
     # Get PDF content
     pdf = buffer.getvalue()
     buffer.close()
+    PDF_RENDERS.inc(document='order_receipt')
     
     # Return PDF response
     response = HttpResponse(content_type='application/pdf')
@@ -372,9 +364,9 @@ def admin_pending_view(request):
     """View orders pending admin approval."""
     orders = Order.objects.filter(
         status=Order.Status.PENDING_APPROVAL
-    ).select_related('department', 'created_by', 'priced_by').order_by('-priced_at')
+    ).select_related('department', 'created_by', 'priced_by').prefetch_related('items').order_by('-priced_at')
     
-    paginator = Paginator(orders, 10)
+    paginator = Paginator(across_shards(orders), 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
@@ -385,6 +377,7 @@ def admin_pending_view(request):
 
 @login_required
 @administrator_required
+@write_unit(methods=['POST'])
 def admin_review_view(request, order_id):
     """Review and decide on an order."""
     order = get_object_or_404(
@@ -400,27 +393,32 @@ def admin_review_view(request, order_id):
             # Approve all items
             order.items.update(
                 item_status=OrderItem.ItemStatus.APPROVED,
-                approved_quantity=None  # Use original quantity
+                approved_quantity=None,  # Use original quantity
+                updated_at=timezone.now()
             )
             order.status = Order.Status.APPROVED
             order.admin_notes = request.POST.get('admin_notes', '')
             order.decided_by = request.user
             order.decided_at = timezone.now()
             order.save()
+            order.record_transition(Order.Status.PENDING_APPROVAL, request.user, order.decided_at)
+            SpendRollup.record_decision(order)
             
-            messages.success(request, 'تمت الموافقة على جميع المواد.')
+            after_commit(messages.success, request, 'تمت الموافقة على جميع المواد.')
             return redirect('procurement:admin_pending')
         
         elif action == 'decline_all':
             # Decline all items
-            order.items.update(item_status=OrderItem.ItemStatus.DECLINED)
+            order.items.update(item_status=OrderItem.ItemStatus.DECLINED, updated_at=timezone.now())
             order.status = Order.Status.DECLINED
             order.admin_notes = request.POST.get('admin_notes', '')
             order.decided_by = request.user
             order.decided_at = timezone.now()
             order.save()
+            order.record_transition(Order.Status.PENDING_APPROVAL, request.user, order.decided_at)
+            SpendRollup.record_decision(order)
             
-            messages.success(request, 'تم رفض الطلب.')
+            after_commit(messages.success, request, 'تم رفض الطلب.')
             return redirect('procurement:admin_pending')
         
         elif action == 'save_decisions':
@@ -429,6 +427,7 @@ def admin_review_view(request, order_id):
             has_declined = False
             has_modified = False
             
+            decided_items = []
             for item in order.items.all():
                 status_field = f'status_{item.id}'
                 qty_field = f'qty_{item.id}'
@@ -452,7 +451,9 @@ def admin_review_view(request, order_id):
                             item.approved_quantity = item.quantity
                     
                     item.admin_note = request.POST.get(note_field, '')
-                    item.save()
+                    item.updated_at = timezone.now()
+                    decided_items.append(item)
+            OrderItem.objects.bulk_update(decided_items, ['item_status', 'approved_quantity', 'admin_note', 'updated_at'])
             
             # Determine overall order status
             if has_declined and not has_approved and not has_modified:
@@ -466,8 +467,10 @@ def admin_review_view(request, order_id):
             order.decided_by = request.user
             order.decided_at = timezone.now()
             order.save()
+            order.record_transition(Order.Status.PENDING_APPROVAL, request.user, order.decided_at)
+            SpendRollup.record_decision(order)
             
-            messages.success(request, 'تم حفظ القرارات.')
+            after_commit(messages.success, request, 'تم حفظ القرارات.')
             return redirect('procurement:admin_pending')
     
     return render(request, 'procurement/admin_review.html', {
@@ -477,13 +480,14 @@ def admin_review_view(request, order_id):
 
 @login_required
 @administrator_required
+@replica_reads
 def admin_history_view(request):
     """View history of admin decisions."""
     orders = Order.objects.filter(
         decided_by__isnull=False
-    ).select_related('department', 'created_by', 'decided_by').order_by('-decided_at')
+    ).select_related('department', 'created_by', 'decided_by').prefetch_related('items').order_by('-decided_at')
     
-    paginator = Paginator(orders, 10)
+    paginator = Paginator(across_shards(orders), 10)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
@@ -0,0 +1 @@
+# Reports app
@@ -0,0 +1,13 @@
+from django.contrib import admin
+from .models import SpendRollup
+
+
+@admin.register(SpendRollup)
+class SpendRollupAdmin(admin.ModelAdmin):
+    list_display = ('month', 'branch', 'department', 'status', 'order_count',
+                    'item_count', 'requested_total', 'approved_total')
+    list_filter = ('status', 'branch', 'month')
+    search_fields = ('department__name', 'branch__name')
+    ordering = ('-month',)
+    readonly_fields = ('branch', 'department', 'month', 'status', 'order_count', 'item_count',
+                       'approved_item_count', 'requested_total', 'approved_total', 'updated_at')
@@ -0,0 +1,94 @@
+"""Time-in-stage percentiles computed from the order transition log.
+
+The whole report is one SQL statement: ``LAG`` pairs every transition
+with the previous one of the same order, ``CUME_DIST`` ranks the
+resulting durations inside each (stage, group) partition and a final
+``GROUP BY`` picks the first duration at or above each percentile.
+"""
+
+from django.db import connections, router
+
+from apps.orders.models import Order, OrderTransition
+
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+GROUP_COLUMNS = {
+    'department': 'department_id',
+    'approver': 'changed_by_id',
+}
+
+_SQL = """
+WITH steps AS (
+    SELECT t.from_status AS stage,
+           t.changed_at,
+           t.changed_by_id,
+           o.department_id,
+           COALESCE(
+               LAG(t.changed_at) OVER (PARTITION BY t.order_id ORDER BY t.changed_at, t.id),
+               CASE WHEN t.from_status = 'draft' THEN o.created_at END
+           ) AS entered_at
+    FROM {transition_table} t
+    JOIN {order_table} o ON o.id = t.order_id
+    WHERE t.order_id IN (
+        SELECT order_id FROM {transition_table}
+        WHERE changed_at >= %s AND changed_at < %s
+    )
+),
+durations AS (
+    SELECT stage,
+           {group_column} AS group_id,
+           (julianday(changed_at) - julianday(entered_at)) * 86400.0 AS seconds
+    FROM steps
+    WHERE entered_at IS NOT NULL AND changed_at >= %s AND changed_at < %s
+),
+ranked AS (
+    SELECT stage, group_id, seconds,
+           CUME_DIST() OVER (PARTITION BY stage, group_id ORDER BY seconds) AS cume
+    FROM durations
+)
+SELECT stage, group_id, COUNT(*), AVG(seconds), {percentile_columns}, MAX(seconds)
+FROM ranked
+GROUP BY stage, group_id
+ORDER BY stage, group_id
+"""
+
+
+def stage_percentiles(start, end, group_by='department', using=None):
+    """Return time-in-stage statistics (in seconds) between ``start`` and ``end``.
+
+    Each row describes the time orders spent in ``stage`` before leaving it
+    inside the window, grouped by department or by the user who moved the
+    order on (the approver of that stage). ``using`` picks the database;
+    by default the routers do, as raw SQL bypasses them.
+    """
+    connection = connections[using or router.db_for_read(OrderTransition)]
+    percentile_columns = ', '.join(
+        f'MIN(CASE WHEN cume >= {p} THEN seconds END)' for p in PERCENTILES
+    )
+    sql = _SQL.format(
+        transition_table=OrderTransition._meta.db_table,
+        order_table=Order._meta.db_table,
+        group_column=GROUP_COLUMNS[group_by],
+        percentile_columns=percentile_columns,
+    )
+    start = connection.ops.adapt_datetimefield_value(start)
+    end = connection.ops.adapt_datetimefield_value(end)
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [start, end, start, end])
+        rows = cursor.fetchall()
+
+    return [
+        {
+            'stage': stage,
+            'group_id': group_id,
+            'count': count,
+            'mean': mean,
+            'p50': p50,
+            'p90': p90,
+            'p99': p99,
+            'max': maximum,
+        }
+        for stage, group_id, count, mean, p50, p90, p99, maximum in rows
+    ]
@@ -0,0 +1,244 @@
+"""Streaming CSV/XLSX exports of orders and storage data.
+
+Every export is a ``values_list`` projection read with
+``.iterator(chunk_size=...)``, shard by shard with branch shards, so memory
+stays bounded whatever the row count, and CSV rows are written to the
+response as they are fetched.
+"""
+
+import csv
+import tempfile
+from abc import ABC, abstractmethod
+
+from django.db.models import Case, DecimalField, F, Q, Value, When
+from django.db.models.functions import Coalesce
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from apps.core.shards import iterate_across
+from apps.orders.models import Order, OrderItem
+from apps.storage.models import StorageItem, StorageItemHistory
+
+try:
+    from openpyxl import Workbook
+    has_xlsx = True
+except ImportError:
+    has_xlsx = False
+
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose ``write`` returns the value, for csv.writer."""
+    
+    def write(self, value):
+        return value
+
+
+def _format_value(value):
+    if hasattr(value, 'tzinfo'):
+        if value.tzinfo is not None:
+            value = timezone.localtime(value)
+        return value.strftime('%Y/%m/%d %H:%M')
+    if value is None:
+        return ''
+    return value
+
+
+class BaseExport(ABC):
+    """A named dataset: columns, role access and a role-scoped queryset."""
+    
+    name = ''
+    filename = ''
+    roles = ()
+    # (header, values_list field) pairs
+    columns = []
+    choice_labels = {}
+    
+    def __init__(self, request):
+        self.request = request
+        self.user = request.user
+    
+    def get_columns(self):
+        return self.columns
+    
+    @abstractmethod
+    def get_queryset(self):
+        """Return the rows the user may export, as a queryset."""
+    
+    def rows(self):
+        columns = self.get_columns()
+        fields = [field for _, field in columns]
+        labels = [self.choice_labels.get(field) for field in fields]
+        queryset = self.get_queryset().values_list(*fields)
+        for row in iterate_across(queryset, CHUNK_SIZE):
+            yield [
+                _format_value(label.get(value, value) if label else value)
+                for value, label in zip(row, labels)
+            ]
+    
+    def headers(self):
+        return [header for header, _ in self.get_columns()]
+    
+    def csv_response(self):
+        writer = csv.writer(Echo())
+        
+        def stream():
+            # BOM so spreadsheet programs detect UTF-8 Arabic text
+            yield '﻿'
+            yield writer.writerow(self.headers())
+            for row in self.rows():
+                yield writer.writerow(row)
+        
+        response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{self.filename}.csv"'
+        return response
+    
+    def xlsx_response(self):
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(self.name)
+        sheet.append(self.headers())
+        for row in self.rows():
+            sheet.append(row)
+        
+        # write_only workbooks stream rows to disk, so only the file is kept
+        output = tempfile.TemporaryFile()
+        workbook.save(output)
+        output.seek(0)
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f'{self.filename}.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+
+
+class OrderItemExport(BaseExport):
+    """One row per order item, with the order columns and approved total."""
+    
+    name = 'orders'
+    filename = 'orders'
+    roles = ('department_user', 'procurement_committee', 'administrator')
+    columns = [
+        ('رقم الطلب', 'order_id'),
+        ('الفرع', 'order__department__branch__name'),
+        ('الشعبة', 'order__department__name'),
+        ('منشئ الطلب', 'order__created_by__username'),
+        ('حالة الطلب', 'order__status'),
+        ('تاريخ الإنشاء', 'order__created_at'),
+        ('تاريخ القرار', 'order__decided_at'),
+        ('المادة', 'item_name'),
+        ('الكمية المطلوبة', 'quantity'),
+        ('الكمية الموافق عليها', 'approved_quantity'),
+        ('حالة المادة', 'item_status'),
+        ('السعر', 'price'),
+        ('الإجمالي الموافق عليه', 'export_approved_total'),
+    ]
+    price_fields = ('price', 'export_approved_total')
+    choice_labels = {
+        'order__status': dict(Order.Status.choices),
+        'item_status': dict(OrderItem.ItemStatus.choices),
+    }
+    
+    def get_columns(self):
+        # Department users never see prices (same rule as order_detail_view)
+        if self.user.is_department_user:
+            return [c for c in self.columns if c[1] not in self.price_fields]
+        return self.columns
+    
+    def get_queryset(self):
+        items = OrderItem.objects.exclude(order__status=Order.Status.DRAFT)
+        if self.user.is_department_user:
+            items = items.filter(order__created_by=self.user)
+        
+        params = self.request.GET
+        if params.get('status'):
+            items = items.filter(order__status=params['status'])
+        if params.get('branch'):
+            items = items.filter(order__department__branch_id=params['branch'])
+        if params.get('department'):
+            items = items.filter(order__department_id=params['department'])
+        
+        return items.annotate(
+            export_approved_total=Case(
+                When(Q(item_status=OrderItem.ItemStatus.DECLINED) | Q(price__isnull=True), then=Value(0)),
+                default=F('price') * Coalesce('approved_quantity', 'quantity'),
+                output_field=DecimalField(max_digits=20, decimal_places=0),
+            )
+        ).order_by('order_id', 'id')
+
+
+class StorageItemExport(BaseExport):
+    """Storage items, scoped like storage_list_view."""
+    
+    name = 'storage'
+    filename = 'storage_items'
+    roles = ('department_user', 'procurement_committee', 'administrator', 'storage_user')
+    columns = [
+        ('الرقم', 'id'),
+        ('اسم المادة', 'name'),
+        ('الوصف', 'description'),
+        ('الكمية', 'quantity'),
+        ('الفرع', 'branch__name'),
+        ('الشعبة', 'department__name'),
+        ('أضيف بواسطة', 'created_by__username'),
+        ('تاريخ الإضافة', 'created_at'),
+        ('تاريخ التحديث', 'updated_at'),
+    ]
+    
+    def get_queryset(self):
+        items = StorageItem.objects.all()
+        if self.user.is_department_user:
+            if self.user.department_id:
+                items = items.filter(department_id=self.user.department_id)
+            else:
+                items = items.none()
+        
+        params = self.request.GET
+        if params.get('branch'):
+            items = items.filter(branch_id=params['branch'])
+        if params.get('department'):
+            items = items.filter(department_id=params['department'])
+        if params.get('search', '').strip():
+            items = items.filter(name__icontains=params['search'].strip())
+        
+        return items.order_by('-created_at')
+
+
+class StorageHistoryExport(BaseExport):
+    """Storage change history, available to storage users."""
+    
+    name = 'storage_history'
+    filename = 'storage_history'
+    roles = ('storage_user',)
+    columns = [
+        ('رقم المادة', 'storage_item_id'),
+        ('المادة', 'storage_item__name'),
+        ('الإجراء', 'action'),
+        ('تم بواسطة', 'changed_by__username'),
+        ('تاريخ التغيير', 'changed_at'),
+        ('الاسم السابق', 'old_name'),
+        ('الاسم الجديد', 'new_name'),
+        ('الكمية السابقة', 'old_quantity'),
+        ('الكمية الجديدة', 'new_quantity'),
+        ('ملاحظات', 'notes'),
+    ]
+    choice_labels = {
+        'action': dict(StorageItemHistory.ActionType.choices),
+    }
+    
+    def get_queryset(self):
+        history = StorageItemHistory.objects.all()
+        params = self.request.GET
+        if params.get('item'):
+            history = history.filter(storage_item_id=params['item'])
+        if params.get('branch'):
+            history = history.filter(storage_item__branch_id=params['branch'])
+        return history.order_by('-changed_at')
+
+
+EXPORTS = {
+    export.name: export
+    for export in (OrderItemExport, StorageItemExport, StorageHistoryExport)
+}
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.core.shards import shard_aliases
+from apps.reports.models import SpendRollup
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the spend rollup table from all decided orders.'
+
+    def handle(self, *args, **options):
+        # Each branch shard keeps the rollups of its own orders.
+        count = sum(SpendRollup.rebuild(using=alias) for alias in shard_aliases())
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} spend rollup rows.'))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('departments', '0002_branch_alter_department_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpendRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(verbose_name='الشهر')),
+                ('status', models.CharField(choices=[('draft', 'مسودة'), ('pending_pricing', 'بانتظار الموافقة'), ('pending_approval', 'بانتظار الموافقة'), ('approved', 'موافق عليه'), ('partially_approved', 'موافق عليه جزئياً'), ('declined', 'مرفوض'), ('acknowledged', 'تم الإطلاع')], max_length=20, verbose_name='القرار')),
+                ('order_count', models.PositiveIntegerField(default=0, verbose_name='عدد الطلبات')),
+                ('item_count', models.PositiveIntegerField(default=0, verbose_name='عدد المواد')),
+                ('approved_item_count', models.PositiveIntegerField(default=0, verbose_name='عدد المواد الموافق عليها')),
+                ('requested_total', models.DecimalField(decimal_places=0, default=0, max_digits=20, verbose_name='المبلغ المطلوب')),
+                ('approved_total', models.DecimalField(decimal_places=0, default=0, max_digits=20, verbose_name='المبلغ الموافق عليه')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='تاريخ التحديث')),
+                ('branch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='spend_rollups', to='departments.branch', verbose_name='الفرع')),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spend_rollups', to='departments.department', verbose_name='الشعبة')),
+            ],
+            options={
+                'verbose_name': 'ملخص إنفاق',
+                'verbose_name_plural': 'ملخصات الإنفاق',
+                'ordering': ['-month', 'branch', 'department', 'status'],
+                'unique_together': {('branch', 'department', 'month', 'status')},
+            },
+        ),
+    ]
@@ -0,0 +1,194 @@
+from django.db import models, transaction
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.orders.models import Order
+
+
+DECISION_STATUSES = [
+    Order.Status.APPROVED,
+    Order.Status.PARTIALLY_APPROVED,
+    Order.Status.DECLINED,
+]
+
+_MONEY = DecimalField(max_digits=20, decimal_places=0)
+
+
+def annotate_decision_totals(orders):
+    """Annotate orders with the item totals used by the spend rollup.
+
+    Mirrors the rules of Order.total_price in SQL: declined items are
+    excluded from the approved total and approved_quantity replaces the
+    requested quantity when it is set.
+    """
+    approved_qty = Coalesce('items__approved_quantity', 'items__quantity')
+    not_declined = ~Q(items__item_status='declined')
+    return orders.annotate(
+        rollup_item_count=Count('items'),
+        rollup_approved_item_count=Count('items', filter=not_declined),
+        rollup_declined_item_count=Count('items', filter=Q(items__item_status='declined')),
+        rollup_fully_approved_item_count=Count('items', filter=Q(items__item_status='approved')),
+        rollup_requested_total=Coalesce(
+            Sum(F('items__price') * F('items__quantity'), output_field=_MONEY),
+            Value(0), output_field=_MONEY
+        ),
+        rollup_approved_total=Coalesce(
+            Sum(F('items__price') * approved_qty, filter=not_declined, output_field=_MONEY),
+            Value(0), output_field=_MONEY
+        ),
+    )
+
+
+def month_start(value):
+    """Return the first day of the (local) month of a datetime."""
+    return timezone.localdate(value).replace(day=1)
+
+
+class SpendRollup(models.Model):
+    """Pre-aggregated spend per branch, department, month and decision."""
+
+    branch = models.ForeignKey(
+        'departments.Branch',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='spend_rollups',
+        verbose_name='الفرع'
+    )
+    department = models.ForeignKey(
+        'departments.Department',
+        on_delete=models.CASCADE,
+        related_name='spend_rollups',
+        verbose_name='الشعبة'
+    )
+    month = models.DateField(
+        verbose_name='الشهر'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=Order.Status.choices,
+        verbose_name='القرار'
+    )
+    order_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='عدد الطلبات'
+    )
+    item_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='عدد المواد'
+    )
+    approved_item_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='عدد المواد الموافق عليها'
+    )
+    requested_total = models.DecimalField(
+        max_digits=20,
+        decimal_places=0,
+        default=0,
+        verbose_name='المبلغ المطلوب'
+    )
+    approved_total = models.DecimalField(
+        max_digits=20,
+        decimal_places=0,
+        default=0,
+        verbose_name='المبلغ الموافق عليه'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='تاريخ التحديث'
+    )
+
+    class Meta:
+        verbose_name = 'ملخص إنفاق'
+        verbose_name_plural = 'ملخصات الإنفاق'
+        ordering = ['-month', 'branch', 'department', 'status']
+        unique_together = ['branch', 'department', 'month', 'status']
+
+    def __str__(self):
+        return f'{self.department} - {self.month:%Y/%m} - {self.get_status_display()}'
+
+    @classmethod
+    def record_decision(cls, order):
+        """Add a freshly decided order to its rollup bucket (in the order's database)."""
+        using = order._state.db
+        totals = annotate_decision_totals(Order.objects.using(using).filter(pk=order.pk)).values(
+            'rollup_item_count', 'rollup_approved_item_count',
+            'rollup_requested_total', 'rollup_approved_total',
+        ).get()
+
+        with transaction.atomic(using=using):
+            rollup, _ = cls.objects.using(using).get_or_create(
+                branch_id=order.department.branch_id,
+                department_id=order.department_id,
+                month=month_start(order.decided_at),
+                status=order.status,
+            )
+            cls.objects.using(using).filter(pk=rollup.pk).update(
+                order_count=F('order_count') + 1,
+                item_count=F('item_count') + totals['rollup_item_count'],
+                approved_item_count=F('approved_item_count') + totals['rollup_approved_item_count'],
+                requested_total=F('requested_total') + totals['rollup_requested_total'],
+                approved_total=F('approved_total') + totals['rollup_approved_total'],
+                updated_at=timezone.now(),
+            )
+
+    @classmethod
+    def rebuild(cls, using=None):
+        """Recompute every rollup bucket from the decided orders.
+
+        Acknowledged orders no longer carry their decision in ``status``,
+        so it is derived from the item decisions the same way
+        admin_review_view derives it. ``using`` names the database (a
+        branch shard) to rebuild.
+        """
+        orders = annotate_decision_totals(
+            Order.objects.using(using).filter(decided_at__isnull=False).exclude(
+                status__in=[Order.Status.DRAFT, Order.Status.PENDING_PRICING, Order.Status.PENDING_APPROVAL]
+            )
+        ).values_list(
+            'department__branch_id', 'department_id', 'decided_at', 'status',
+            'rollup_item_count', 'rollup_approved_item_count',
+            'rollup_declined_item_count', 'rollup_fully_approved_item_count',
+            'rollup_requested_total', 'rollup_approved_total',
+        ).order_by()
+
+        buckets = {}
+        for (branch_id, department_id, decided_at, status, item_count, approved_items,
+             declined_items, fully_approved_items, requested_total, approved_total) in orders.iterator(chunk_size=2000):
+            if status == Order.Status.ACKNOWLEDGED:
+                if item_count and declined_items == item_count:
+                    status = Order.Status.DECLINED
+                elif item_count and fully_approved_items == item_count:
+                    status = Order.Status.APPROVED
+                else:
+                    status = Order.Status.PARTIALLY_APPROVED
+
+            key = (branch_id, department_id, month_start(decided_at), status)
+            bucket = buckets.setdefault(key, [0, 0, 0, 0, 0])
+            bucket[0] += 1
+            bucket[1] += item_count
+            bucket[2] += approved_items
+            bucket[3] += requested_total
+            bucket[4] += approved_total
+
+        rollups = [
+            cls(
+                branch_id=branch_id,
+                department_id=department_id,
+                month=month,
+                status=status,
+                order_count=values[0],
+                item_count=values[1],
+                approved_item_count=values[2],
+                requested_total=values[3],
+                approved_total=values[4],
+            )
+            for (branch_id, department_id, month, status), values in buckets.items()
+        ]
+
+        with transaction.atomic(using=using):
+            cls.objects.using(using).all().delete()
+            cls.objects.using(using).bulk_create(rollups, batch_size=500)
+
+        return len(rollups)
@@ -0,0 +1,10 @@
+from django.urls import path
+from . import views
+
+app_name = 'reports'
+
+urlpatterns = [
+    path('spend/', views.spend_report_view, name='spend'),
+    path('cycle-times/', views.cycle_time_report_view, name='cycle_times'),
+    path('export/<slug:dataset>/<str:fmt>/', views.export_view, name='export'),
+]
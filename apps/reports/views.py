@@ -0,0 +1,159 @@
+from datetime import date, datetime, time, timedelta
+
+from django.shortcuts import render, redirect
+from django.contrib.auth.decorators import login_required
+from django.contrib import messages
+from django.http import Http404
+from django.db.models import Q, Sum
+from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
+
+from apps.accounts.decorators import role_required
+from apps.accounts.models import User
+from apps.core.replica import replica_reads
+from apps.core.shards import across_shards, aggregate_across, shard_aliases
+from apps.departments.cache import get_branch_options, get_department_options, get_department_label
+from apps.orders.models import Order
+from .cycle_times import GROUP_COLUMNS, stage_percentiles
+from .exports import EXPORTS, has_xlsx
+from .models import SpendRollup
+
+
+def _parse_month(value):
+    """Parse a YYYY-MM query value into the first day of that month."""
+    try:
+        year, month = value.split('-')
+        return date(int(year), int(month), 1)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _parse_date(value):
+    """Parse a YYYY-MM-DD query value."""
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+@login_required
+@role_required('administrator', 'procurement_committee')
+@replica_reads
+def spend_report_view(request):
+    """Spend and approval rates per branch, department and month."""
+    rollups = SpendRollup.objects.all()
+
+    branch_id = request.GET.get('branch')
+    department_id = request.GET.get('department')
+    month_from = _parse_month(request.GET.get('from'))
+    month_to = _parse_month(request.GET.get('to'))
+
+    if branch_id:
+        rollups = rollups.filter(branch_id=branch_id)
+    if department_id:
+        rollups = rollups.filter(department_id=department_id)
+    if month_from:
+        rollups = rollups.filter(month__gte=month_from)
+    if month_to:
+        rollups = rollups.filter(month__lte=month_to)
+
+    aggregates = {
+        'orders': Sum('order_count'),
+        'approved_orders': Sum('order_count', filter=Q(status=Order.Status.APPROVED)),
+        'partial_orders': Sum('order_count', filter=Q(status=Order.Status.PARTIALLY_APPROVED)),
+        'declined_orders': Sum('order_count', filter=Q(status=Order.Status.DECLINED)),
+        'items': Sum('item_count'),
+        'approved_items': Sum('approved_item_count'),
+        'requested_total': Sum('requested_total'),
+        'approved_total': Sum('approved_total'),
+    }
+
+    # Rows are per branch, so each one comes from a single shard.
+    rows = list(across_shards(
+        rollups.values('month', 'branch__name', 'department__name')
+        .annotate(**aggregates)
+        .order_by('-month', 'branch__name', 'department__name')
+    ))
+    totals = aggregate_across(rollups, **aggregates)
+
+    for row in rows + [totals]:
+        decided = row['orders'] or 0
+        approved = (row['approved_orders'] or 0) + (row['partial_orders'] or 0)
+        row['approval_rate'] = round(approved * 100 / decided, 1) if decided else None
+
+    return render(request, 'reports/spend.html', {
+        'rows': rows,
+        'totals': totals,
+        'branches': get_branch_options(),
+        'departments': get_department_options(branch_id),
+        'selected_branch': branch_id,
+        'selected_department': department_id,
+        'month_from': request.GET.get('from', ''),
+        'month_to': request.GET.get('to', ''),
+    })
+
+
+@login_required
+@role_required('administrator', 'procurement_committee')
+@replica_reads
+def cycle_time_report_view(request):
+    """Time-in-stage percentiles per department or per approver."""
+    today = timezone.localdate()
+    date_from = _parse_date(request.GET.get('from')) or today - timedelta(days=30)
+    date_to = _parse_date(request.GET.get('to')) or today
+    group_by = request.GET.get('group', 'department')
+    if group_by not in GROUP_COLUMNS:
+        group_by = 'department'
+
+    start = timezone.make_aware(datetime.combine(date_from, time.min))
+    end = timezone.make_aware(datetime.combine(date_to + timedelta(days=1), time.min))
+    # Exact per department; with branch shards an approver gets a row per branch.
+    rows = [
+        row for alias in shard_aliases()
+        for row in stage_percentiles(start, end, group_by=group_by, using=alias)
+    ]
+
+    if group_by == 'department':
+        name_of = get_department_label
+    else:
+        group_ids = {row['group_id'] for row in rows if row['group_id'] is not None}
+        name_of = {user.pk: str(user) for user in User.objects.filter(pk__in=group_ids)}.get
+
+    for row in rows:
+        row['stage_label'] = Order.Status(row['stage']).label
+        row['group_name'] = name_of(row['group_id']) or '-'
+        for key in ('mean', 'p50', 'p90', 'p99', 'max'):
+            row[key] = round(row[key] / 3600, 1) if row[key] is not None else None
+
+    return render(request, 'reports/cycle_times.html', {
+        'rows': rows,
+        'group_by': group_by,
+        'date_from': date_from,
+        'date_to': date_to,
+    })
+
+
+@login_required
+@replica_reads
+def export_view(request, dataset, fmt):
+    """Stream a dataset as CSV or XLSX, scoped to the user's role."""
+    export_class = EXPORTS.get(dataset)
+    if export_class is None or fmt not in ('csv', 'xlsx'):
+        raise Http404
+    
+    if request.user.role not in export_class.roles:
+        messages.error(request, 'ليس لديك صلاحية للوصول إلى هذه الصفحة.')
+        return redirect('accounts:dashboard')
+    
+    export = export_class(request)
+    if fmt == 'xlsx':
+        if not has_xlsx:
+            messages.error(request, 'تصدير Excel غير متاح، يرجى تثبيت openpyxl.')
+            referer = request.META.get('HTTP_REFERER')
+            if not url_has_allowed_host_and_scheme(
+                referer, allowed_hosts={request.get_host()}, require_https=request.is_secure()
+            ):
+                referer = 'accounts:dashboard'
+            return redirect(referer)
+        return export.xlsx_response()
+    return export.csv_response()
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import StorageItem, StorageItemHistory
+from django.db import transaction
+
+from .models import StorageItem, StorageItemHistory, StockMovement, StockSnapshot
 
 
 class StorageItemHistoryInline(admin.TabularInline):
@@ -23,9 +25,28 @@ class StorageItemAdmin(admin.ModelAdmin):
     inlines = [StorageItemHistoryInline]
     
     def save_model(self, request, obj, form, change):
-        if not change:
-            obj.created_by = request.user
-        super().save_model(request, obj, form, change)
+        # The quantity changes only through the ledger: the entered value
+        # becomes a receipt (new item) or an adjustment against the current
+        # stock, so sum(StockMovement.delta) stays equal to quantity.
+        quantity = obj.quantity
+        with transaction.atomic():
+            if change:
+                current = StorageItem.objects.select_for_update().filter(pk=obj.pk)
+                obj.quantity = current.values_list('quantity', flat=True).get()
+            else:
+                obj.created_by = request.user
+                obj.quantity = 0
+            super().save_model(request, obj, form, change)
+            
+            delta = quantity - obj.quantity
+            if delta:
+                StockMovement.record(
+                    obj,
+                    StockMovement.MovementType.ADJUSTMENT if change else StockMovement.MovementType.RECEIPT,
+                    delta,
+                    request.user,
+                    notes='تعديل من لوحة الإدارة' if change else 'الكمية الافتتاحية',
+                )
 
 
 @admin.register(StorageItemHistory)
@@ -37,3 +58,27 @@ class StorageItemHistoryAdmin(admin.ModelAdmin):
     readonly_fields = ('storage_item', 'action', 'changed_by', 'changed_at', 
                        'old_name', 'new_name', 'old_quantity', 'new_quantity',
                        'old_description', 'new_description', 'notes')
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ('storage_item', 'movement_type', 'delta', 'created_by', 'created_at')
+    list_filter = ('movement_type', 'created_at')
+    search_fields = ('storage_item__name', 'created_by__username')
+    ordering = ('-created_at',)
+    readonly_fields = ('storage_item', 'movement_type', 'delta', 'counterpart',
+                       'created_by', 'created_at', 'notes')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('storage_item', 'quantity', 'taken_at')
+    search_fields = ('storage_item__name',)
+    ordering = ('-taken_at',)
+    readonly_fields = ('storage_item', 'quantity', 'taken_at')
@@ -5,4 +5,6 @@ class StorageConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.storage'
     verbose_name = 'المخزن'
-
+    
+    def ready(self):
+        from . import signals  # noqa: F401
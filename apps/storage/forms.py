@@ -1,6 +1,8 @@
 from django import forms
 from django.db.models import Q
-from .models import StorageItem
+from .models import StorageItem, StockMovement
+from apps.core.shards import across_shards, alias_for_pk
+from apps.departments.cache import get_branch_options, get_department_options, get_department_label
 from apps.departments.models import Department, Branch
 
 
@@ -23,6 +25,13 @@ class StorageItemForm(forms.ModelForm):
         })
     )
     
+    # Quantity shown when the form was rendered; an edit applies the
+    # difference as an adjustment instead of overwriting concurrent changes.
+    original_quantity = forms.IntegerField(
+        required=False,
+        widget=forms.HiddenInput()
+    )
+    
     class Meta:
         model = StorageItem
         fields = ['name', 'description', 'quantity', 'branch', 'department']
@@ -46,16 +55,116 @@ class StorageItemForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
-        # Always load all branches
-        self.fields['branch'].queryset = Branch.objects.all()
+        if self.instance and self.instance.pk:
+            self.fields['original_quantity'].initial = self.instance.quantity
         
-        # Load all departments initially
+        # Querysets are only evaluated to validate a submitted value; the
+        # rendered choices come from the reference-data cache.
+        self.fields['branch'].queryset = Branch.objects.all()
         self.fields['department'].queryset = Department.objects.all()
         
         # If editing and instance has a branch, filter departments by that branch
         # Include departments that belong to this branch OR have no branch assigned
-        if self.instance and self.instance.pk and self.instance.branch:
+        branch_id = None
+        if self.instance and self.instance.pk and self.instance.branch_id:
+            branch_id = self.instance.branch_id
             self.fields['department'].queryset = Department.objects.filter(
-                Q(branch=self.instance.branch) | Q(branch__isnull=True)
+                Q(branch_id=branch_id) | Q(branch__isnull=True)
             )
+        
+        self.fields['branch'].choices = [('', '---------')] + [
+            (b['id'], b['name']) for b in get_branch_options()
+        ]
+        self.fields['department'].choices = [('', '---------')] + [
+            (d['id'], get_department_label(d['id'])) for d in get_department_options(branch_id)
+        ]
+
 
+class StockMovementForm(forms.Form):
+    """Form for recording a receipt, issue or transfer of a storage item."""
+    
+    MOVEMENT_CHOICES = [
+        (StockMovement.MovementType.RECEIPT, 'استلام'),
+        (StockMovement.MovementType.ISSUE, 'صرف'),
+        (StockMovement.MovementType.TRANSFER, 'نقل إلى مادة أخرى'),
+    ]
+    
+    movement_type = forms.ChoiceField(
+        label='نوع الحركة',
+        choices=MOVEMENT_CHOICES,
+        widget=forms.Select(attrs={
+            'class': 'w-full px-4 py-2.5 rounded-lg border border-slate-300 focus:border-primary-500 focus:ring-2 focus:ring-primary-200'
+        })
+    )
+    quantity = forms.IntegerField(
+        label='الكمية',
+        min_value=1,
+        widget=forms.NumberInput(attrs={
+            'class': 'w-full px-4 py-2.5 rounded-lg border border-slate-300 focus:border-primary-500 focus:ring-2 focus:ring-primary-200',
+            'min': 1,
+            'placeholder': 'الكمية'
+        })
+    )
+    target = forms.TypedChoiceField(
+        coerce=int,
+        empty_value=None,
+        label='المادة المستلمة (للنقل)',
+        required=False,
+        widget=forms.Select(attrs={
+            'class': 'w-full px-4 py-2.5 rounded-lg border border-slate-300 focus:border-primary-500 focus:ring-2 focus:ring-primary-200'
+        })
+    )
+    notes = forms.CharField(
+        label='ملاحظات',
+        required=False,
+        widget=forms.Textarea(attrs={
+            'class': 'w-full px-4 py-2.5 rounded-lg border border-slate-300 focus:border-primary-500 focus:ring-2 focus:ring-primary-200',
+            'rows': 2,
+            'placeholder': 'ملاحظات (اختياري)'
+        })
+    )
+    
+    def __init__(self, *args, storage_item, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Transfers go to the same material held by another branch/department,
+        # which may live in another branch shard
+        targets = across_shards(StorageItem.objects.filter(
+            name__iexact=storage_item.name
+        ).exclude(pk=storage_item.pk).select_related('branch', 'department'))
+        self.fields['target'].choices = [('', '---------')] + [
+            (item.pk, f'{item.name} - {item.branch.name} / {item.department.name} ({item.quantity})')
+            for item in targets
+        ]
+    
+    def clean_target(self):
+        pk = self.cleaned_data['target']
+        if pk is None:
+            return None
+        # Read from the shard named by the id
+        return StorageItem.objects.using(alias_for_pk(pk)).get(pk=pk)
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        if cleaned_data.get('movement_type') == StockMovement.MovementType.TRANSFER and not cleaned_data.get('target'):
+            self.add_error('target', 'يجب اختيار المادة المستلمة عند النقل.')
+        return cleaned_data
+
+
+class StorageImportForm(forms.Form):
+    """Form for uploading a storage inventory spreadsheet."""
+    
+    file = forms.FileField(
+        label='الملف (CSV أو Excel)',
+        widget=forms.FileInput(attrs={
+            'class': 'w-full px-4 py-2.5 rounded-lg border border-slate-300 focus:border-primary-500',
+            'accept': '.csv,.xlsx',
+        })
+    )
+    dry_run = forms.BooleanField(
+        label='معاينة فقط بدون حفظ',
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={
+            'class': 'accent-primary-600',
+        })
+    )
@@ -0,0 +1,276 @@
+"""Bulk import of storage inventory from CSV or Excel files.
+
+All rows are parsed and validated before anything is written. Branches,
+departments and existing items are each resolved with one query, and the
+resulting creates/updates are written with ``bulk_create``/``bulk_update``
+together with their history, ledger and snapshot rows in a single
+transaction.
+"""
+
+import csv
+import io
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.versions import bump_version
+from apps.core.writes import write_unit
+from apps.departments.models import Branch, Department
+from .models import StorageItem, StorageItemHistory, StockMovement, StockSnapshot
+
+try:
+    from openpyxl import load_workbook
+    has_xlsx = True
+except ImportError:
+    has_xlsx = False
+
+
+# Accepted column headers (Arabic headers match the storage CSV export)
+HEADERS = {
+    'name': ('name', 'اسم المادة'),
+    'description': ('description', 'الوصف'),
+    'quantity': ('quantity', 'الكمية'),
+    'branch': ('branch', 'الفرع'),
+    'department': ('department', 'الشعبة'),
+}
+
+BATCH_SIZE = 500
+IMPORT_NOTE = 'استيراد من ملف'
+
+
+def read_rows(file, filename):
+    """Return the rows of an uploaded CSV/XLSX file as lists of strings.
+    
+    Raises ``ValueError`` with a message for the user on unreadable files.
+    """
+    if filename.lower().endswith('.xlsx'):
+        if not has_xlsx:
+            raise ValueError('قراءة ملفات Excel غير متاحة، يرجى تثبيت openpyxl.')
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        return [
+            ['' if value is None else str(value) for value in row]
+            for row in workbook.active.iter_rows(values_only=True)
+        ]
+    
+    content = file.read()
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ValueError('يجب أن يكون الملف بترميز UTF-8.')
+    return list(csv.reader(io.StringIO(content)))
+
+
+class StorageImport:
+    """Validate and apply a storage inventory spreadsheet."""
+    
+    def __init__(self, rows, user=None):
+        self.user = user
+        self.errors = []
+        self.creates = []
+        self.updates = []
+        self.unchanged = 0
+        self._parse(rows)
+    
+    @property
+    def is_valid(self):
+        return not self.errors
+    
+    def _parse(self, rows):
+        if not rows:
+            self.errors.append((0, 'الملف فارغ.'))
+            return
+        
+        header = [cell.strip().lower() for cell in rows[0]]
+        columns = {}
+        for field, names in HEADERS.items():
+            for name in names:
+                if name in header:
+                    columns[field] = header.index(name)
+                    break
+        missing = [HEADERS[f][1] for f in ('name', 'quantity', 'branch', 'department') if f not in columns]
+        if missing:
+            self.errors.append((1, f'أعمدة مفقودة: {", ".join(missing)}'))
+            return
+        
+        def cell(row, field):
+            index = columns.get(field)
+            if index is None or index >= len(row):
+                return ''
+            return row[index].strip()
+        
+        parsed = []
+        for line, row in enumerate(rows[1:], start=2):
+            if not any(value.strip() for value in row):
+                continue
+            values = {field: cell(row, field) for field in HEADERS}
+            try:
+                values['quantity'] = int(float(values['quantity'] or 0))
+                if values['quantity'] < 0:
+                    raise ValueError
+            except ValueError:
+                self.errors.append((line, f'كمية غير صالحة: {cell(row, "quantity")}'))
+                continue
+            if not values['name']:
+                self.errors.append((line, 'اسم المادة مطلوب.'))
+                continue
+            parsed.append((line, values))
+        
+        self._resolve(parsed)
+    
+    def _resolve(self, parsed):
+        branch_names = {values['branch'] for _, values in parsed}
+        department_names = {values['department'] for _, values in parsed}
+        
+        branches = dict(Branch.objects.filter(name__in=branch_names).values_list('name', 'id'))
+        departments = {}
+        for pk, name, branch_id in Department.objects.filter(
+            name__in=department_names
+        ).values_list('id', 'name', 'branch_id'):
+            departments[(name, branch_id)] = pk
+        
+        keyed = {}
+        for line, values in parsed:
+            branch_id = branches.get(values['branch'])
+            if branch_id is None:
+                self.errors.append((line, f'الفرع غير موجود: {values["branch"]}'))
+                continue
+            # Departments of the branch, or departments without a branch
+            department_id = departments.get((values['department'], branch_id)) or departments.get((values['department'], None))
+            if department_id is None:
+                self.errors.append((line, f'الشعبة غير موجودة في الفرع: {values["department"]}'))
+                continue
+            key = (values['name'], branch_id, department_id)
+            if key in keyed:
+                self.errors.append((line, f'المادة مكررة في الملف (السطر {keyed[key][0]}).'))
+                continue
+            keyed[key] = (line, values)
+        
+        existing = {}
+        names = list({key[0] for key in keyed})
+        for start in range(0, len(names), BATCH_SIZE):
+            for item in StorageItem.objects.filter(name__in=names[start:start + BATCH_SIZE]):
+                existing[(item.name, item.branch_id, item.department_id)] = item
+        
+        for key, (line, values) in keyed.items():
+            item = existing.get(key)
+            if item is None:
+                self.creates.append(StorageItem(
+                    name=values['name'],
+                    description=values['description'],
+                    quantity=values['quantity'],
+                    branch_id=key[1],
+                    department_id=key[2],
+                    created_by=self.user,
+                ))
+                continue
+            
+            # An empty description cell keeps the current description
+            description = values['description'] or item.description
+            if item.quantity == values['quantity'] and item.description == description:
+                self.unchanged += 1
+                continue
+            self.updates.append((item, item.quantity, item.description, values['quantity'], description))
+    
+    def report(self):
+        """Summarise what ``apply`` would change, for dry runs."""
+        return {
+            'errors': self.errors,
+            'creates': [(item.name, item.quantity) for item in self.creates],
+            'updates': [
+                (item.name, old_quantity, new_quantity, old_description != new_description)
+                for item, old_quantity, old_description, new_quantity, new_description in self.updates
+            ],
+            'unchanged': self.unchanged,
+        }
+    
+    @write_unit
+    def apply(self):
+        """Write all creates and updates in one transaction.
+        
+        Updates are checked against the locked current rows, so movements
+        recorded since the import was parsed are kept in the adjustments.
+        """
+        if not self.is_valid:
+            raise ValueError('Cannot apply an import with errors.')
+        
+        now = timezone.now()
+        history = []
+        movements = []
+        snapshots = []
+        
+        with transaction.atomic():
+            created = StorageItem.objects.bulk_create(self.creates, batch_size=BATCH_SIZE)
+            for item in created:
+                history.append(StorageItemHistory(
+                    storage_item=item,
+                    action=StorageItemHistory.ActionType.CREATED,
+                    changed_by=self.user,
+                    new_name=item.name,
+                    new_quantity=item.quantity,
+                    new_description=item.description,
+                    notes=IMPORT_NOTE,
+                ))
+                if item.quantity:
+                    movements.append(StockMovement(
+                        storage_item=item,
+                        movement_type=StockMovement.MovementType.RECEIPT,
+                        delta=item.quantity,
+                        created_by=self.user,
+                        created_at=now,
+                        notes=IMPORT_NOTE,
+                    ))
+                snapshots.append(StockSnapshot(storage_item=item, quantity=item.quantity, taken_at=now))
+            
+            # Quantities and descriptions may have changed since the file was
+            # parsed (e.g. a movement was recorded), so the adjustments are
+            # computed from the rows as they are now, locked until commit.
+            current = {}
+            pks = [item.pk for item, *_ in self.updates]
+            for start in range(0, len(pks), BATCH_SIZE):
+                for pk, quantity, description in StorageItem.objects.select_for_update().filter(
+                    pk__in=pks[start:start + BATCH_SIZE]
+                ).values_list('pk', 'quantity', 'description'):
+                    current[pk] = (quantity, description)
+            
+            updated = []
+            for item, _, _, new_quantity, new_description in self.updates:
+                if item.pk not in current:
+                    continue
+                old_quantity, old_description = current[item.pk]
+                if old_quantity == new_quantity and old_description == new_description:
+                    continue
+                item.quantity = new_quantity
+                item.description = new_description
+                item.updated_at = now
+                updated.append(item)
+                history.append(StorageItemHistory(
+                    storage_item=item,
+                    action=StorageItemHistory.ActionType.UPDATED,
+                    changed_by=self.user,
+                    old_name=item.name,
+                    new_name=item.name,
+                    old_quantity=old_quantity,
+                    new_quantity=new_quantity,
+                    old_description=old_description,
+                    new_description=new_description,
+                    notes=IMPORT_NOTE,
+                ))
+                if new_quantity != old_quantity:
+                    movements.append(StockMovement(
+                        storage_item=item,
+                        movement_type=StockMovement.MovementType.ADJUSTMENT,
+                        delta=new_quantity - old_quantity,
+                        created_by=self.user,
+                        created_at=now,
+                        notes=IMPORT_NOTE,
+                    ))
+                    snapshots.append(StockSnapshot(storage_item=item, quantity=new_quantity, taken_at=now))
+            
+            StorageItem.objects.bulk_update(updated, ['quantity', 'description', 'updated_at'], batch_size=BATCH_SIZE)
+            StorageItemHistory.objects.bulk_create(history, batch_size=BATCH_SIZE)
+            StockMovement.objects.bulk_create(movements, batch_size=BATCH_SIZE)
+            StockSnapshot.objects.bulk_create(snapshots, batch_size=BATCH_SIZE)
+            bump_version('storage')
+        
+        return len(created), len(updated)
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.models import User
+from apps.storage.importer import StorageImport, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Import storage items from a CSV or XLSX file.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file to import.')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would change.')
+        parser.add_argument('--user', help='Username recorded as the author of the changes.')
+    
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f'Unknown user: {options["user"]}')
+        
+        try:
+            with open(options['path'], 'rb') as f:
+                rows = read_rows(f, options['path'])
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+        
+        storage_import = StorageImport(rows, user=user)
+        report = storage_import.report()
+        
+        for line, message in report['errors']:
+            self.stdout.write(self.style.ERROR(f'line {line}: {message}'))
+        for name, quantity in report['creates']:
+            self.stdout.write(f'+ {name} ({quantity})')
+        for name, old_quantity, new_quantity, description_changed in report['updates']:
+            suffix = ' [description]' if description_changed else ''
+            self.stdout.write(f'~ {name}: {old_quantity} -> {new_quantity}{suffix}')
+        self.stdout.write(
+            f'{len(report["creates"])} to create, {len(report["updates"])} to update, '
+            f'{report["unchanged"]} unchanged, {len(report["errors"])} errors.'
+        )
+        
+        if not storage_import.is_valid:
+            raise CommandError('Import has errors; nothing was written.')
+        if options['dry_run']:
+            return
+        
+        created, updated = storage_import.apply()
+        self.stdout.write(self.style.SUCCESS(f'Imported {created} new and {updated} updated items.'))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery
+
+from apps.storage.models import StorageItem, StockMovement, StockSnapshot
+
+
+class Command(BaseCommand):
+    help = 'Snapshot every storage item that has movements since its last snapshot.'
+    
+    def handle(self, *args, **options):
+        last_movement = StockMovement.objects.filter(
+            storage_item=OuterRef('pk')
+        ).order_by('-created_at').values('created_at')[:1]
+        last_snapshot = StockSnapshot.objects.filter(
+            storage_item=OuterRef('pk')
+        ).order_by('-taken_at').values('taken_at')[:1]
+        
+        with transaction.atomic():
+            items = StorageItem.objects.annotate(
+                last_movement_at=Subquery(last_movement),
+                last_snapshot_at=Subquery(last_snapshot),
+            ).filter(
+                Q(last_snapshot_at__isnull=True) | Q(last_movement_at__gt=F('last_snapshot_at')),
+                last_movement_at__isnull=False,
+            ).values_list('pk', 'quantity', 'last_movement_at')
+            
+            # Taken at the last movement read in the same transaction, so the
+            # snapshot covers exactly the movements up to taken_at.
+            snapshots = [
+                StockSnapshot(storage_item_id=pk, quantity=quantity, taken_at=last_movement_at)
+                for pk, quantity, last_movement_at in items.iterator(chunk_size=2000)
+            ]
+            StockSnapshot.objects.bulk_create(snapshots, batch_size=500)
+        
+        self.stdout.write(self.style.SUCCESS(f'Took {len(snapshots)} stock snapshots.'))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('departments', '0002_branch_alter_department_options_and_more'),
+        ('storage', '0002_storageitemhistory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='storageitem',
+            index=models.Index(fields=['-created_at'], name='storage_item_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storageitem',
+            index=models.Index(fields=['branch', '-created_at'], name='storage_item_branch_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storageitem',
+            index=models.Index(fields=['department', '-created_at'], name='storage_item_dept_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:07
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def opening_snapshots(apps, schema_editor):
+    """Anchor the ledger with the quantities on hand before it existed."""
+    StorageItem = apps.get_model('storage', 'StorageItem')
+    StockSnapshot = apps.get_model('storage', 'StockSnapshot')
+    
+    now = django.utils.timezone.now()
+    StockSnapshot.objects.bulk_create(
+        [
+            StockSnapshot(storage_item_id=pk, quantity=quantity, taken_at=now)
+            for pk, quantity in StorageItem.objects.values_list('pk', 'quantity').iterator()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('storage', '0003_storage_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('movement_type', models.CharField(choices=[('receipt', 'استلام'), ('issue', 'صرف'), ('adjustment', 'تسوية'), ('transfer', 'نقل')], max_length=20, verbose_name='نوع الحركة')),
+                ('delta', models.IntegerField(verbose_name='التغيير في الكمية')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='التاريخ')),
+                ('notes', models.TextField(blank=True, verbose_name='ملاحظات')),
+                ('counterpart', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='storage.stockmovement', verbose_name='الحركة المقابلة')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to=settings.AUTH_USER_MODEL, verbose_name='تم بواسطة')),
+                ('storage_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='storage.storageitem', verbose_name='المادة')),
+            ],
+            options={
+                'verbose_name': 'حركة مخزنية',
+                'verbose_name_plural': 'الحركات المخزنية',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['storage_item', 'created_at'], name='storage_movement_item_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.PositiveIntegerField(verbose_name='الكمية')),
+                ('taken_at', models.DateTimeField(verbose_name='تاريخ الجرد')),
+                ('storage_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='storage.storageitem', verbose_name='المادة')),
+            ],
+            options={
+                'verbose_name': 'لقطة مخزون',
+                'verbose_name_plural': 'لقطات المخزون',
+                'ordering': ['-taken_at'],
+                'indexes': [models.Index(fields=['storage_item', '-taken_at'], name='storage_snapshot_item_idx')],
+            },
+        ),
+        migrations.RunPython(opening_snapshots, migrations.RunPython.noop),
+    ]
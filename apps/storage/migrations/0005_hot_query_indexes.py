@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('departments', '0002_branch_alter_department_options_and_more'),
+        ('storage', '0004_stock_ledger'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='storageitem',
+            index=models.Index(condition=models.Q(('quantity__gt', 0)), fields=['-quantity'], name='storage_item_in_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='storageitemhistory',
+            index=models.Index(fields=['storage_item', '-changed_at'], name='storage_history_item_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:06
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # After every index migration and table rebuild, so the statistics cover
+    # all the indexes
+    dependencies = [
+        ('orders', '0005_orderitem_updated_at'),
+        ('storage', '0006_stockmovement_counterpart'),
+    ]
+
+    operations = [
+        # Statistics let the planner choose between the indexes, e.g. the
+        # order status and decided_at ones.
+        migrations.RunSQL('ANALYZE', migrations.RunSQL.noop),
+    ]
@@ -1,5 +1,13 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import F, Sum
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+
+# A snapshot is written every SNAPSHOT_INTERVAL movements of an item, so a
+# point-in-time quantity never sums more than this many deltas.
+SNAPSHOT_INTERVAL = 50
 
 
 class StorageItem(models.Model):
@@ -49,9 +57,31 @@ class StorageItem(models.Model):
         verbose_name = 'مادة في المخزن'
         verbose_name_plural = 'مواد المخزن'
         ordering = ['-created_at']
+        indexes = [
+            # storage_list_view: default listing and per-branch/department filters
+            models.Index(fields=['-created_at'], name='storage_item_created_idx'),
+            models.Index(fields=['branch', '-created_at'], name='storage_item_branch_idx'),
+            models.Index(fields=['department', '-created_at'], name='storage_item_dept_idx'),
+            # search_items_view: items in stock, largest quantity first
+            models.Index(fields=['-quantity'], condition=models.Q(quantity__gt=0), name='storage_item_in_stock_idx'),
+        ]
     
     def __str__(self):
         return f'{self.name} ({self.quantity})'
+    
+    def quantity_at(self, when):
+        """Return the quantity on hand at ``when``.
+        
+        Reads the latest snapshot taken at or before ``when`` and adds the
+        (at most SNAPSHOT_INTERVAL) movement deltas recorded after it.
+        """
+        snapshot = self.snapshots.filter(taken_at__lte=when).order_by('-taken_at').first()
+        movements = self.movements.filter(created_at__lte=when)
+        base = 0
+        if snapshot:
+            base = snapshot.quantity
+            movements = movements.filter(created_at__gt=snapshot.taken_at)
+        return base + (movements.aggregate(total=Sum('delta'))['total'] or 0)
 
 
 class StorageItemHistory(models.Model):
@@ -97,6 +127,10 @@ class StorageItemHistory(models.Model):
         verbose_name = 'سجل تعديل'
         verbose_name_plural = 'سجل التعديلات'
         ordering = ['-changed_at']
+        indexes = [
+            # Latest changes of an item (storage_edit_view)
+            models.Index(fields=['storage_item', '-changed_at'], name='storage_history_item_idx'),
+        ]
     
     def __str__(self):
         return f'{self.get_action_display()} - {self.storage_item.name} - {self.changed_by}'
@@ -111,3 +145,144 @@ class StorageItemHistory(models.Model):
         if self.old_description != self.new_description:
             changes.append('تم تعديل الوصف')
         return changes if changes else ['لا توجد تغييرات']
+
+
+class StockMovement(models.Model):
+    """Append-only ledger entry changing the quantity of a storage item."""
+    
+    class MovementType(models.TextChoices):
+        RECEIPT = 'receipt', 'استلام'
+        ISSUE = 'issue', 'صرف'
+        ADJUSTMENT = 'adjustment', 'تسوية'
+        TRANSFER = 'transfer', 'نقل'
+    
+    storage_item = models.ForeignKey(
+        StorageItem,
+        on_delete=models.CASCADE,
+        related_name='movements',
+        verbose_name='المادة'
+    )
+    movement_type = models.CharField(
+        max_length=20,
+        choices=MovementType.choices,
+        verbose_name='نوع الحركة'
+    )
+    delta = models.IntegerField(
+        verbose_name='التغيير في الكمية'
+    )
+    # The other leg of a transfer, which may live in another branch shard,
+    # hence no database constraint
+    counterpart = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='الحركة المقابلة'
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='stock_movements',
+        verbose_name='تم بواسطة'
+    )
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='التاريخ'
+    )
+    notes = models.TextField(blank=True, verbose_name='ملاحظات')
+    
+    class Meta:
+        verbose_name = 'حركة مخزنية'
+        verbose_name_plural = 'الحركات المخزنية'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['storage_item', 'created_at'], name='storage_movement_item_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.get_movement_type_display()} {self.delta:+d} - {self.storage_item.name}'
+    
+    @classmethod
+    def record(cls, storage_item, movement_type, delta, user=None, notes='', counterpart=None):
+        """Apply ``delta`` to the item's quantity and append it to the ledger.
+        
+        The quantity is changed with a single conditional ``F()`` update, so
+        concurrent movements never overwrite each other and stock can't go
+        negative. Raises ValidationError when there is not enough stock.
+        Runs on the database of the item, which may be a branch shard.
+        """
+        using = router.db_for_write(StorageItem, instance=storage_item)
+        with transaction.atomic(using=using):
+            updated = StorageItem.objects.using(using).filter(
+                pk=storage_item.pk, quantity__gte=max(-delta, 0)
+            ).update(quantity=F('quantity') + delta, updated_at=timezone.now())
+            if not updated:
+                raise ValidationError('الكمية المتوفرة غير كافية لهذه الحركة.')
+            
+            movement = cls.objects.using(using).create(
+                storage_item=storage_item,
+                movement_type=movement_type,
+                delta=delta,
+                counterpart_id=counterpart.pk if counterpart is not None else None,
+                created_by=user,
+                notes=notes,
+            )
+            storage_item.refresh_from_db(using=using, fields=['quantity', 'updated_at'])
+            StockSnapshot.take_if_due(storage_item, movement.created_at, using=using)
+        return movement
+    
+    @classmethod
+    def transfer(cls, source, target, quantity, user=None, notes=''):
+        """Move ``quantity`` from ``source`` to ``target`` as a linked pair.
+        
+        Each leg is written on the database of its item. When the items live
+        in different branch shards, the target's transaction commits first
+        and the source's right after it; the two are not one atomic commit.
+        """
+        source_db = router.db_for_write(StorageItem, instance=source)
+        target_db = router.db_for_write(StorageItem, instance=target)
+        with transaction.atomic(using=source_db), transaction.atomic(using=target_db):
+            outgoing = cls.record(source, cls.MovementType.TRANSFER, -quantity, user, notes)
+            incoming = cls.record(target, cls.MovementType.TRANSFER, quantity, user, notes, counterpart=outgoing)
+            cls.objects.using(source_db).filter(pk=outgoing.pk).update(counterpart_id=incoming.pk)
+            outgoing.counterpart_id = incoming.pk
+        return outgoing, incoming
+
+
+class StockSnapshot(models.Model):
+    """Quantity of an item including every movement up to ``taken_at``."""
+    
+    storage_item = models.ForeignKey(
+        StorageItem,
+        on_delete=models.CASCADE,
+        related_name='snapshots',
+        verbose_name='المادة'
+    )
+    quantity = models.PositiveIntegerField(verbose_name='الكمية')
+    taken_at = models.DateTimeField(verbose_name='تاريخ الجرد')
+    
+    class Meta:
+        verbose_name = 'لقطة مخزون'
+        verbose_name_plural = 'لقطات المخزون'
+        ordering = ['-taken_at']
+        indexes = [
+            models.Index(fields=['storage_item', '-taken_at'], name='storage_snapshot_item_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.storage_item.name}: {self.quantity} @ {self.taken_at:%Y/%m/%d %H:%M}'
+    
+    @classmethod
+    def take_if_due(cls, storage_item, taken_at, using=None):
+        """Snapshot the item once SNAPSHOT_INTERVAL movements have piled up."""
+        using = using or router.db_for_write(StorageItem, instance=storage_item)
+        last = cls.objects.using(using).filter(storage_item=storage_item).order_by('-taken_at').values_list('taken_at', flat=True).first()
+        pending = StockMovement.objects.using(using).filter(storage_item=storage_item, created_at__lte=taken_at)
+        if last:
+            pending = pending.filter(created_at__gt=last)
+        if pending.count() >= SNAPSHOT_INTERVAL:
+            return cls.objects.using(using).create(storage_item=storage_item, quantity=storage_item.quantity, taken_at=taken_at)
+        return None
@@ -0,0 +1,44 @@
+from apps.core.query_plans import hot_query
+from .models import StorageItem, StorageItemHistory
+
+
+def _list_queryset():
+    return StorageItem.objects.select_related('department', 'branch').only(
+        'name', 'description', 'quantity', 'created_at',
+        'branch__name', 'department__name',
+    )
+
+
+@hot_query('storage list')
+def storage_list():
+    return _list_queryset()[:15]
+
+
+@hot_query('storage list by branch')
+def storage_list_by_branch():
+    return _list_queryset().filter(branch_id=1)[:15]
+
+
+@hot_query('storage list by department')
+def storage_list_by_department():
+    return _list_queryset().filter(department_id=1)[:15]
+
+
+@hot_query('storage list by branch and department')
+def storage_list_by_branch_and_department():
+    return _list_queryset().filter(branch_id=1, department_id=1)[:15]
+
+
+@hot_query('storage list count by branch')
+def storage_count_by_branch():
+    return StorageItem.objects.filter(branch_id=1).values('pk')
+
+
+@hot_query('storage items in stock by quantity')
+def storage_in_stock():
+    return StorageItem.objects.filter(name__icontains='ورق', quantity__gt=0).order_by('-quantity')[:15]
+
+
+@hot_query('storage item history')
+def storage_item_history():
+    return StorageItemHistory.objects.filter(storage_item_id=1)[:10]
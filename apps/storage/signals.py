@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.core.versions import bump_version
+from .models import StorageItem, StockMovement
+
+
+@receiver([post_save, post_delete], sender=StorageItem)
+@receiver(post_save, sender=StockMovement)
+def storage_data_changed(sender, using, **kwargs):
+    """Invalidate caches built from storage items (dashboard fragments).
+    
+    Movements change quantities with ``update()``, so their creation is
+    treated as a storage item change.
+    """
+    bump_version('storage', using=using)
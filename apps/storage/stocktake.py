@@ -0,0 +1,94 @@
+"""Apply physical stock-take counts to many storage items at once."""
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.versions import bump_version
+from apps.core.writes import write_unit
+from .models import StorageItem, StorageItemHistory, StockMovement, StockSnapshot
+
+
+BATCH_SIZE = 500
+STOCK_TAKE_NOTE = 'جرد'
+
+
+def parse_counts(post):
+    """Return ``{item_id: counted}`` for rows whose count differs from the shown quantity.
+    
+    Each grid row posts ``count_<id>`` and the quantity it displayed as
+    ``shown_<id>``; untouched or invalid rows are skipped.
+    """
+    counts = {}
+    errors = []
+    for key, value in post.items():
+        if not key.startswith('count_'):
+            continue
+        item_id = key[len('count_'):]
+        value = value.strip()
+        if not item_id.isdigit() or value == '' or value == post.get(f'shown_{item_id}', '').strip():
+            continue
+        try:
+            counted = int(value)
+            if counted < 0:
+                raise ValueError
+        except ValueError:
+            errors.append(item_id)
+            continue
+        counts[int(item_id)] = counted
+    return counts, errors
+
+
+@write_unit
+def apply_counts(counts, user, items=None):
+    """Set the counted quantities with one bulk_update and batched history.
+    
+    The difference from the quantity currently stored is recorded as an
+    adjustment movement, followed by a snapshot, since a physical count is
+    a natural checkpoint. Returns the number of items that changed.
+    """
+    if items is None:
+        items = StorageItem.objects.all()
+    now = timezone.now()
+    
+    with transaction.atomic():
+        changed = []
+        history = []
+        movements = []
+        snapshots = []
+        # Locked, so the adjustments are computed from the quantities as
+        # they are when the counts are written
+        for item in items.select_for_update().filter(pk__in=list(counts)).only('id', 'name', 'quantity'):
+            counted = counts[item.pk]
+            if counted == item.quantity:
+                continue
+            history.append(StorageItemHistory(
+                storage_item=item,
+                action=StorageItemHistory.ActionType.UPDATED,
+                changed_by=user,
+                old_name=item.name,
+                new_name=item.name,
+                old_quantity=item.quantity,
+                new_quantity=counted,
+                notes=STOCK_TAKE_NOTE,
+            ))
+            movements.append(StockMovement(
+                storage_item=item,
+                movement_type=StockMovement.MovementType.ADJUSTMENT,
+                delta=counted - item.quantity,
+                created_by=user,
+                created_at=now,
+                notes=STOCK_TAKE_NOTE,
+            ))
+            snapshots.append(StockSnapshot(storage_item=item, quantity=counted, taken_at=now))
+            item.quantity = counted
+            item.updated_at = now
+            changed.append(item)
+        
+        StorageItem.objects.bulk_update(changed, ['quantity', 'updated_at'], batch_size=BATCH_SIZE)
+        StorageItemHistory.objects.bulk_create(history, batch_size=BATCH_SIZE)
+        StockMovement.objects.bulk_create(movements, batch_size=BATCH_SIZE)
+        StockSnapshot.objects.bulk_create(snapshots, batch_size=BATCH_SIZE)
+        if changed:
+            bump_version('storage')
+    
+    return len(changed)
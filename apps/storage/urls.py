@@ -6,7 +6,10 @@ app_name = 'storage'
 urlpatterns = [
     path('', views.storage_list_view, name='list'),
     path('add/', views.storage_add_view, name='add'),
+    path('import/', views.storage_import_view, name='import'),
+    path('stock-take/', views.storage_stock_take_view, name='stock_take'),
     path('edit/<int:item_id>/', views.storage_edit_view, name='edit'),
+    path('movements/<int:item_id>/', views.storage_movement_view, name='movements'),
     path('delete/<int:item_id>/', views.storage_delete_view, name='delete'),
     path('api/departments/', views.get_departments_by_branch, name='get_departments'),
 ]
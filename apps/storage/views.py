@@ -3,21 +3,35 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.paginator import Paginator
 from django.http import JsonResponse
-from django.db.models import Q
+from django.views.decorators.http import condition
+from django.db import transaction
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from datetime import date, datetime, time
 
 from apps.accounts.decorators import storage_user_required
-from apps.departments.models import Department, Branch
-from .models import StorageItem, StorageItemHistory
-from .forms import StorageItemForm
+from apps.core.metrics import SEARCHES
+from apps.core.replica import replica_reads
+from apps.core.shards import across_shards
+from apps.core.writes import after_commit, write_unit
+from apps.departments.cache import get_branch_options, get_department_options, get_etag
+from .models import StorageItem, StorageItemHistory, StockMovement
+from .forms import StorageItemForm, StockMovementForm, StorageImportForm
+from .importer import StorageImport, read_rows
+from .stocktake import apply_counts, parse_counts
 
 
 @login_required
+@replica_reads
 def storage_list_view(request):
     """View storage items based on user role."""
     user = request.user
     
-    # Base queryset
-    items = StorageItem.objects.select_related('department', 'branch', 'created_by')
+    # Base queryset, limited to the columns the table shows
+    items = StorageItem.objects.select_related('department', 'branch').only(
+        'name', 'description', 'quantity', 'created_at',
+        'branch__name', 'department__name',
+    )
     
     # Filter by role
     if user.is_department_user:
@@ -38,19 +52,17 @@ def storage_list_view(request):
     if department_id:
         items = items.filter(department_id=department_id)
     if search:
+        SEARCHES.inc(source='storage_list')
         items = items.filter(name__icontains=search)
     
     # Pagination
-    paginator = Paginator(items, 15)
+    paginator = Paginator(across_shards(items), 15)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
-    # Get filter options
-    branches = Branch.objects.all()
-    departments = Department.objects.all()
-    if branch_id:
-        # Include departments that belong to this branch OR have no branch assigned
-        departments = departments.filter(Q(branch_id=branch_id) | Q(branch__isnull=True))
+    # Get filter options (cached, invalidated when branches/departments change)
+    branches = get_branch_options()
+    departments = get_department_options(branch_id)
     
     context = {
         'page_obj': page_obj,
@@ -67,14 +79,23 @@ def storage_list_view(request):
 
 @login_required
 @storage_user_required
+@write_unit(methods=['POST'])
 def storage_add_view(request):
     """Add a new storage item."""
     if request.method == 'POST':
         form = StorageItemForm(request.POST)
         if form.is_valid():
-            item = form.save(commit=False)
-            item.created_by = request.user
-            item.save()
+            with transaction.atomic():
+                item = form.save(commit=False)
+                item.created_by = request.user
+                # The opening stock enters through the ledger as a receipt
+                item.quantity = 0
+                item.save()
+                if form.cleaned_data['quantity']:
+                    StockMovement.record(
+                        item, StockMovement.MovementType.RECEIPT, form.cleaned_data['quantity'],
+                        request.user, notes='الكمية الافتتاحية'
+                    )
             
             # Record creation in history
             StorageItemHistory.objects.create(
@@ -87,7 +108,7 @@ def storage_add_view(request):
                 notes='تم إنشاء المادة'
             )
             
-            messages.success(request, 'تم إضافة المادة بنجاح.')
+            after_commit(messages.success, request, 'تم إضافة المادة بنجاح.')
             return redirect('storage:list')
     else:
         form = StorageItemForm()
@@ -99,8 +120,86 @@ def storage_add_view(request):
     })
 
 
+@write_unit
+def _import_rows(rows, user):
+    # Resolve and validate in the same unit as the writes, so a retry checks
+    # the file against the rows as they are then
+    storage_import = StorageImport(rows, user=user)
+    return storage_import, storage_import.apply() if storage_import.is_valid else None
+
+
+@login_required
+@storage_user_required
+def storage_import_view(request):
+    """Import many storage items from a spreadsheet, with a dry-run report."""
+    report = None
+    
+    if request.method == 'POST':
+        form = StorageImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                rows = read_rows(upload, upload.name)
+            except ValueError as e:
+                form.add_error('file', str(e))
+            else:
+                if form.cleaned_data['dry_run']:
+                    storage_import, result = StorageImport(rows, user=request.user), None
+                else:
+                    storage_import, result = _import_rows(rows, request.user)
+                report = storage_import.report()
+                
+                if result is not None:
+                    created, updated = result
+                    messages.success(request, f'تم استيراد الملف: {created} مادة جديدة، {updated} مادة معدلة.')
+                    return redirect('storage:list')
+    else:
+        form = StorageImportForm()
+    
+    return render(request, 'storage/import.html', {
+        'form': form,
+        'report': report,
+    })
+
+
 @login_required
 @storage_user_required
+def storage_stock_take_view(request):
+    """Enter physical counts for a page of items in one submit."""
+    branch_id = request.GET.get('branch')
+    department_id = request.GET.get('department')
+    
+    items = StorageItem.objects.only('id', 'name', 'quantity').order_by('name', 'id')
+    if branch_id:
+        items = items.filter(branch_id=branch_id)
+    if department_id:
+        items = items.filter(department_id=department_id)
+    
+    if request.method == 'POST':
+        counts, errors = parse_counts(request.POST)
+        # The items are read and locked inside the unit of apply_counts; the
+        # messages follow it, so a retry does not repeat them
+        changed = apply_counts(counts, request.user, items) if counts else 0
+        if errors:
+            messages.error(request, f'تم تجاهل {len(errors)} كمية غير صالحة.')
+        messages.success(request, f'تم حفظ الجرد: تم تعديل {changed} مادة.')
+        return redirect(request.get_full_path())
+    
+    paginator = Paginator(items, 200)
+    page_obj = paginator.get_page(request.GET.get('page'))
+    
+    return render(request, 'storage/stock_take.html', {
+        'page_obj': page_obj,
+        'branches': get_branch_options(),
+        'departments': get_department_options(branch_id),
+        'selected_branch': branch_id,
+        'selected_department': department_id,
+    })
+
+
+@login_required
+@storage_user_required
+@write_unit(methods=['POST'])
 def storage_edit_view(request, item_id):
     """Edit an existing storage item."""
     item = get_object_or_404(StorageItem, id=item_id)
@@ -113,27 +212,45 @@ def storage_edit_view(request, item_id):
     if request.method == 'POST':
         form = StorageItemForm(request.POST, instance=item)
         if form.is_valid():
-            updated_item = form.save()
+            # Quantity changes go through the ledger as the difference from the
+            # quantity the user saw, so concurrent edits are merged, not lost.
+            seen_quantity = form.cleaned_data.get('original_quantity')
+            if seen_quantity is None:
+                seen_quantity = old_quantity
+            delta = form.cleaned_data['quantity'] - seen_quantity
             
-            # Check if anything changed and record history
-            if (old_name != updated_item.name or 
-                old_quantity != updated_item.quantity or 
-                old_description != updated_item.description):
+            updated_item = form.save(commit=False)
+            updated_item.quantity = old_quantity
+            try:
+                with transaction.atomic():
+                    updated_item.save(update_fields=['name', 'description', 'branch', 'department', 'updated_at'])
+                    if delta:
+                        StockMovement.record(
+                            updated_item, StockMovement.MovementType.ADJUSTMENT, delta,
+                            request.user, notes='تعديل من نموذج المادة'
+                        )
+            except ValidationError as e:
+                form.add_error('quantity', e)
+            else:
+                # Check if anything changed and record history
+                if (old_name != updated_item.name or 
+                    old_quantity != updated_item.quantity or 
+                    old_description != updated_item.description):
+                    
+                    StorageItemHistory.objects.create(
+                        storage_item=updated_item,
+                        action=StorageItemHistory.ActionType.UPDATED,
+                        changed_by=request.user,
+                        old_name=old_name,
+                        new_name=updated_item.name,
+                        old_quantity=old_quantity,
+                        new_quantity=updated_item.quantity,
+                        old_description=old_description,
+                        new_description=updated_item.description,
+                    )
                 
-                StorageItemHistory.objects.create(
-                    storage_item=updated_item,
-                    action=StorageItemHistory.ActionType.UPDATED,
-                    changed_by=request.user,
-                    old_name=old_name,
-                    new_name=updated_item.name,
-                    old_quantity=old_quantity,
-                    new_quantity=updated_item.quantity,
-                    old_description=old_description,
-                    new_description=updated_item.description,
-                )
-            
-            messages.success(request, 'تم تحديث المادة بنجاح.')
-            return redirect('storage:list')
+                after_commit(messages.success, request, 'تم تحديث المادة بنجاح.')
+                return redirect('storage:list')
     else:
         form = StorageItemForm(instance=item)
     
@@ -151,13 +268,62 @@ def storage_edit_view(request, item_id):
 
 @login_required
 @storage_user_required
+@write_unit(methods=['POST'])
+def storage_movement_view(request, item_id):
+    """Record receipts, issues and transfers, and look up past quantities."""
+    item = get_object_or_404(StorageItem.objects.select_related('branch', 'department'), id=item_id)
+    
+    if request.method == 'POST':
+        form = StockMovementForm(request.POST, storage_item=item)
+        if form.is_valid():
+            movement_type = form.cleaned_data['movement_type']
+            quantity = form.cleaned_data['quantity']
+            notes = form.cleaned_data.get('notes', '')
+            try:
+                if movement_type == StockMovement.MovementType.TRANSFER:
+                    StockMovement.transfer(item, form.cleaned_data['target'], quantity, request.user, notes)
+                else:
+                    delta = quantity if movement_type == StockMovement.MovementType.RECEIPT else -quantity
+                    StockMovement.record(item, movement_type, delta, request.user, notes)
+            except ValidationError as e:
+                form.add_error('quantity', e)
+            else:
+                after_commit(messages.success, request, 'تم تسجيل الحركة بنجاح.')
+                return redirect('storage:movements', item_id=item.id)
+    else:
+        form = StockMovementForm(storage_item=item)
+    
+    # Quantity on hand at the end of a given day
+    quantity_at = None
+    at_date = request.GET.get('at')
+    if at_date:
+        try:
+            at = timezone.make_aware(datetime.combine(date.fromisoformat(at_date), time.max))
+            quantity_at = item.quantity_at(at)
+        except ValueError:
+            at_date = None
+    
+    movements = item.movements.select_related('created_by').all()[:20]
+    
+    return render(request, 'storage/movements.html', {
+        'form': form,
+        'item': item,
+        'movements': movements,
+        'at_date': at_date,
+        'quantity_at': quantity_at,
+    })
+
+
+@login_required
+@storage_user_required
+@write_unit(methods=['POST'])
 def storage_delete_view(request, item_id):
     """Delete a storage item."""
     item = get_object_or_404(StorageItem, id=item_id)
     
     if request.method == 'POST':
         item.delete()
-        messages.success(request, 'تم حذف المادة بنجاح.')
+        after_commit(messages.success, request, 'تم حذف المادة بنجاح.')
         return redirect('storage:list')
     
     return render(request, 'storage/confirm_delete.html', {
@@ -166,18 +332,16 @@ def storage_delete_view(request, item_id):
 
 
 @login_required
+@condition(etag_func=lambda request: get_etag())
 def get_departments_by_branch(request):
-    """AJAX endpoint to get departments for a specific branch."""
-    branch_id = request.GET.get('branch_id')
+    """AJAX endpoint to get departments for a specific branch.
     
-    if branch_id:
-        # Include departments that belong to this branch OR have no branch assigned
-        departments = Department.objects.filter(
-            Q(branch_id=branch_id) | Q(branch__isnull=True)
-        ).values('id', 'name')
-        return JsonResponse(list(departments), safe=False)
-    
-    # Return all departments if no branch selected
-    departments = Department.objects.all().values('id', 'name')
-    return JsonResponse(list(departments), safe=False)
+    Served from the reference-data cache with an ETag, so browsers revalidate
+    instead of refetching until a branch or department changes.
+    """
+    # Includes departments that have no branch assigned when a branch is given
+    departments = get_department_options(request.GET.get('branch_id'))
+    response = JsonResponse([{'id': d['id'], 'name': d['name']} for d in departments], safe=False)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
 
@@ -41,19 +41,27 @@ INSTALLED_APPS = [
     'django_htmx',
     'widget_tweaks',
     # Local apps
+    'apps.core',
     'apps.accounts',
     'apps.departments',
     'apps.orders',
     'apps.procurement',
     'apps.storage',
+    'apps.reports',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'apps.core.middleware.StaticFilesMiddleware',
+    'apps.core.middleware.PerformanceMiddleware',
+    'apps.core.middleware.ReplicaStickinessMiddleware',
+    'apps.core.middleware.ReferenceDataMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.middleware.BranchShardMiddleware',
+    'apps.core.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
@@ -63,15 +71,25 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'apps.core.template_backend.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'apps.core.context_processors.frontend_assets',
+                'apps.core.context_processors.data_versions',
+            ],
+            # Templates are compiled once per process (at startup, see
+            # apps.core.warmup); the dev server's autoreloader resets the
+            # cache when a template changes.
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
             ],
         },
     },
@@ -79,14 +97,65 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
-# Database
+# Warm each worker up when config.wsgi loads (apps.core.warmup): compile the
+# templates, build the URL resolvers and load the PDF libraries and fonts
+WARMUP_ON_STARTUP = os.environ.get('DJANGO_WARMUP', 'True') == 'True'
+
+# Database profile: 'tuned' (default) applies SQLITE_PRAGMAS to every new
+# connection (apps.core.signals) and starts write transactions with BEGIN IMMEDIATE;
+# 'default' keeps SQLite's own settings.
+DB_PROFILE = os.environ.get('DJANGO_DB_PROFILE', 'tuned')
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('DJANGO_SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('DJANGO_SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('DJANGO_SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'busy_timeout': SQLITE_BUSY_TIMEOUT_MS,
+    'mmap_size': int(os.environ.get('DJANGO_SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    # Negative values are KiB: 64 MiB of page cache per connection
+    'cache_size': int(os.environ.get('DJANGO_SQLITE_CACHE_SIZE', '-65536')),
+    'temp_store': os.environ.get('DJANGO_SQLITE_TEMP_STORE', 'MEMORY'),
+} if DB_PROFILE == 'tuned' else {}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Seconds a connection is reused; 0 closes it after every request
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', '0')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000,
+            'transaction_mode': 'IMMEDIATE' if DB_PROFILE == 'tuned' else 'DEFERRED',
+        },
     }
 }
 
+# Read replica (apps.core.replica): a copy of the database, refreshed with
+# 'manage.py refresh_replica', that serves history, exports, reports and
+# storage browsing. Unset, everything reads from 'default'.
+DATABASE_REPLICA = os.environ.get('DJANGO_DB_REPLICA', '')
+if DATABASE_REPLICA:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': DATABASE_REPLICA,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Branch shards (apps.core.shards): orders and storage data of the listed
+# branches in databases of their own, e.g.
+# DJANGO_BRANCH_SHARDS="1=/srv/db/branch_1.sqlite3,2=/srv/db/branch_2.sqlite3".
+# Prepare them with 'manage.py prepare_shards'.
+BRANCH_SHARDS = {}
+for shard in filter(None, os.environ.get('DJANGO_BRANCH_SHARDS', '').split(',')):
+    branch_id, name = shard.split('=', 1)
+    BRANCH_SHARDS[int(branch_id)] = f'branch_{int(branch_id)}'
+    DATABASES[f'branch_{int(branch_id)}'] = {**DATABASES['default'], 'NAME': name.strip()}
+
+DATABASE_ROUTERS = ['apps.core.shards.BranchShardRouter', 'apps.core.replica.ReplicaRouter']
+# Seconds a client reads from 'default' after writing; keep it above the
+# refresh interval so a redirect after a POST shows the change.
+REPLICA_STICKY_SECONDS = int(os.environ.get('DJANGO_REPLICA_STICKY_SECONDS', '30'))
+
 # Password validation (disabled)
 AUTH_PASSWORD_VALIDATORS = []
 
@@ -101,16 +170,89 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # Hashed names plus .gz (and, with brotli installed, .br) copies written by
+    # collectstatic (apps.core.assets)
+    'staticfiles': {'BACKEND': 'apps.core.assets.CompressedManifestStaticFilesStorage'},
+}
+
+# Serve STATIC_ROOT from the workers (apps.core.middleware.StaticFilesMiddleware);
+# set to False when a web server in front serves it
+STATIC_SERVE = os.environ.get('DJANGO_STATIC_SERVE', 'True') == 'True'
+
+# Front-end assets: 'vendored' loads Tailwind, htmx, Alpine.js and the Tajawal
+# font from static/vendor (fetched and built by 'manage.py vendor_assets' and
+# committed), 'cdn' (default) from the public CDNs. Switch the default to
+# 'vendored' once static/vendor is in the tree; 'manage.py check' warns when
+# it is selected and static/vendor is incomplete.
+FRONTEND_ASSETS = os.environ.get('DJANGO_FRONTEND_ASSETS', 'cdn')
+
 # Media files (Uploaded files)
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Cache shared by all worker processes, so invalidations (reference data,
+# data versions, cached users) reach every one of them: 'file' (default, a
+# directory on this host), 'redis' (DJANGO_REDIS_URL) or 'locmem' (a single
+# process only, e.g. the development server)
+CACHE_BACKEND = os.environ.get('DJANGO_CACHE_BACKEND', 'file')
+CACHES = {
+    'default': {
+        'file': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('DJANGO_CACHE_DIR', str(BASE_DIR / 'cache')),
+            'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('DJANGO_CACHE_MAX_ENTRIES', '10000'))},
+        },
+        'redis': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('DJANGO_REDIS_URL', 'redis://127.0.0.1:6379/0'),
+        },
+        'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    }[CACHE_BACKEND],
+}
+
+# Write units (apps.core.writes) retry on "database is locked" until this deadline
+WRITE_UNIT_DEADLINE_SECONDS = float(os.environ.get('DJANGO_WRITE_UNIT_DEADLINE', '10'))
+
+# Template fragments ({% fragment %}, apps.core.templatetags.fragments) are keyed
+# by the rows they show; the timeout bounds how long names of related rows
+# (department, user) can lag behind
+FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('DJANGO_FRAGMENT_CACHE_TIMEOUT', str(24 * 3600)))
+
+# Performance instrumentation (apps.core.middleware.PerformanceMiddleware)
+PERF_MONITORING = os.environ.get('DJANGO_PERF_MONITORING', 'True') == 'True'
+PERF_SLOW_REQUEST_MS = int(os.environ.get('DJANGO_PERF_SLOW_MS', '500'))
+PERF_SLOW_LOG = Path(os.environ.get('DJANGO_PERF_SLOW_LOG', BASE_DIR / 'logs' / 'slow_requests.jsonl'))
+
+# Metrics shared by worker processes (apps.core.metrics), served at /core/metrics/
+METRICS_DB = Path(os.environ.get('DJANGO_METRICS_DB', BASE_DIR / 'logs' / 'metrics.sqlite3'))
+METRICS_FLUSH_SECONDS = int(os.environ.get('DJANGO_METRICS_FLUSH_SECONDS', '10'))
+# Scrapers authenticate with "Authorization: Bearer <DJANGO_METRICS_TOKEN>";
+# staff can open the page in the browser. Addresses in DJANGO_METRICS_ALLOWED_IPS
+# (comma separated, none by default) need no token: behind a reverse proxy on
+# the same host every request comes from 127.0.0.1, so only list addresses
+# that are reached directly.
+METRICS_TOKEN = os.environ.get('DJANGO_METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = list(filter(None, os.environ.get('DJANGO_METRICS_ALLOWED_IPS', '').split(',')))
+
+# Staff request profiling (?_profile=1 or ?_profile=memory), listed at /core/profiles/
+PROFILE_DIR = Path(os.environ.get('DJANGO_PROFILE_DIR', BASE_DIR / 'logs' / 'profiles'))
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
 
+# request.user is served from the cache instead of one query per request (read
+# from the database with the per-process 'locmem' cache)
+AUTHENTICATION_BACKENDS = ['apps.accounts.backends.CachedModelBackend']
+
+# Session storage: 'db' (default), 'cached_db' or 'signed_cookies'.
+# The cached and cookie backends avoid reading django_session per request.
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.environ.get('DJANGO_SESSION_BACKEND', 'db')
+
 # Login settings
 LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'accounts:dashboard'
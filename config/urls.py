@@ -13,6 +13,8 @@ urlpatterns = [
     path('orders/', include('apps.orders.urls')),
     path('procurement/', include('apps.procurement.urls')),
     path('storage/', include('apps.storage.urls')),
+    path('reports/', include('apps.reports.urls')),
+    path('core/', include('apps.core.urls')),
 ]
 
 if settings.DEBUG:
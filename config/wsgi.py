@@ -4,10 +4,15 @@ WSGI config for ali_purchases project.
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
 
-
+# Pay the first request's one-off costs before accepting traffic.
+if settings.WARMUP_ON_STARTUP:
+    from apps.core.warmup import warm_up
+    
+    warm_up()
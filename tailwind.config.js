@@ -0,0 +1,37 @@
+/**
+ * Build config of static/vendor/tailwind.css ('manage.py vendor_assets').
+ * Keep the theme in sync with the tailwind.config block of templates/base.html.
+ */
+module.exports = {
+    content: [
+        './templates/**/*.html',
+        // Status colors returned by models, e.g. Order.get_status_color()
+        './apps/**/*.py',
+    ],
+    theme: {
+        extend: {
+            fontFamily: {
+                'arabic': ['Tajawal', 'sans-serif'],
+            },
+            colors: {
+                'primary': {
+                    50: '#f0f9ff',
+                    100: '#e0f2fe',
+                    200: '#bae6fd',
+                    300: '#7dd3fc',
+                    400: '#38bdf8',
+                    500: '#0ea5e9',
+                    600: '#0284c7',
+                    700: '#0369a1',
+                    800: '#075985',
+                    900: '#0c4a6e',
+                },
+                'accent': {
+                    500: '#f59e0b',
+                    600: '#d97706',
+                }
+            }
+        }
+    },
+    plugins: [],
+}